@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+# Job phân tích chạy nền: trạng thái / tiến độ / kết quả ghi ra đĩa (1 file JSON / job)
+# để trình duyệt refresh hay chuyển trang rồi quay lại vẫn xem được.
+JOBS_DIR = os.environ.get("GOLF_JOBS_DIR", ".analysis_jobs")
+JOB_MAX_AGE_SEC = 24 * 3600
+
+# Ghi tiến độ tối đa mỗi PROGRESS_INTERVAL giây (trừ khi xong/lỗi)
+PROGRESS_INTERVAL = 0.5
+
+# Job đang chạy trong process này; job "running" của process cũ là đã bị ngắt
+_active = set()
+_lock = threading.Lock()
+
+
+def _job_path(job_id, jobs_dir):
+    return os.path.join(jobs_dir, job_id + ".json")
+
+
+def _write_job(job, jobs_dir):
+    path = _job_path(job["id"], jobs_dir)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_job(job_id, jobs_dir=None):
+    """Đọc trạng thái job, None nếu không có (id sai / đã bị dọn)"""
+    jobs_dir = jobs_dir or JOBS_DIR
+    # job_id đến từ URL -> chỉ nhận hex để không đọc được file ngoài jobs_dir
+    if not job_id or not all(c in "0123456789abcdef" for c in job_id):
+        return None
+
+    try:
+        with open(_job_path(job_id, jobs_dir), "r", encoding="utf-8") as f:
+            job = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if job["status"] in ("queued", "running") and job_id not in _active:
+        job["status"] = "error"
+        job["error"] = "Job bị ngắt (server đã khởi động lại)"
+    return job
+
+
+def _run_job(job, jobs_dir, target, args, kwargs):
+    last_write = [0.0]
+
+    def report(progress, message=None, parts=None):
+        # Gọi từ trong target: progress 0..1, parts: {tên: (done, total)} cho từng phần chạy song song
+        job["progress"] = min(1.0, max(0.0, float(progress)))
+        if message is not None:
+            job["message"] = message
+        if parts:
+            job["parts"].update(parts)
+        now = time.time()
+        if now - last_write[0] >= PROGRESS_INTERVAL:
+            job["updated"] = now
+            _write_job(job, jobs_dir)
+            last_write[0] = now
+
+    job["status"] = "running"
+    job["started"] = time.time()
+    _write_job(job, jobs_dir)
+
+    try:
+        job["result"] = target(report, *args, **kwargs)
+        job["status"] = "done"
+        job["progress"] = 1.0
+    except Exception as e:
+        job["status"] = "error"
+        job["error"] = str(e)
+    finally:
+        job["updated"] = time.time()
+        try:
+            try:
+                _write_job(job, jobs_dir)
+            except Exception as e:
+                # Kết quả không ghi được (không serialize ra JSON, lỗi đĩa...) -> job lỗi
+                job["status"] = "error"
+                job["result"] = None
+                job["error"] = f"Không lưu được kết quả: {e}"
+                _write_job(job, jobs_dir)
+        finally:
+            # Luôn bỏ khỏi _active: ghi lỗi tiếp thì load_job báo job bị ngắt thay vì "running" mãi
+            with _lock:
+                _active.discard(job["id"])
+
+
+def submit_job(executor, kind, target, *args, jobs_dir=None, params=None, **kwargs):
+    """Đưa job vào executor, trả về job_id
+
+    target(report, *args, **kwargs) chạy ở worker, gọi report(progress, message, parts)
+    để cập nhật tiến độ và trả về kết quả (phải serialize được ra JSON).
+    params: thông tin kèm theo job (view, tên file...) để hiển thị lại sau này.
+    Số worker của executor chính là giới hạn số phân tích chạy cùng lúc.
+    """
+    jobs_dir = jobs_dir or JOBS_DIR
+    os.makedirs(jobs_dir, exist_ok=True)
+
+    now = time.time()
+    job = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "params": params or {},
+        "status": "queued",
+        "progress": 0.0,
+        "message": "Đang chờ worker...",
+        "parts": {},
+        "created": now,
+        "updated": now,
+        "result": None,
+        "error": None,
+    }
+    _write_job(job, jobs_dir)
+    with _lock:
+        _active.add(job["id"])
+
+    executor.submit(_run_job, job, jobs_dir, target, args, kwargs)
+    return job["id"]
+
+
+def cleanup_jobs(jobs_dir=None, max_age_sec=JOB_MAX_AGE_SEC):
+    """Xóa file job cũ hơn max_age_sec, trả về số file đã xóa"""
+    jobs_dir = jobs_dir or JOBS_DIR
+    if not os.path.isdir(jobs_dir):
+        return 0
+
+    removed = 0
+    cutoff = time.time() - max_age_sec
+    for name in os.listdir(jobs_dir):
+        path = os.path.join(jobs_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
@@ -10,10 +10,43 @@ import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
 from compute_features import compute_swing_features, calculate_score
-import time
+import landmark_cache
+import pose_stream
+import analysis_jobs
+import pro_library
+import pro_index
+import baseline_strata
+import swing_dtw
+import contextlib
+import os
+import queue
+import threading
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 mp_pose = mp.solutions.pose
 
+# Pose settings của app (cũng là một phần của key landmark cache)
+APP_POSE_SETTINGS = {
+    "model_complexity": 1,
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5,
+}
+
+# Ngưỡng motion gate: frame tĩnh (setup, sau follow-through) không chạy lại pose.
+# Mặc định tắt như extract_pose / CLI (landmarks + điểm giống hệt), bật bằng
+# GOLF_MOTION_THRESHOLD (vd 1.5 = motion_gate.DEFAULT_MOTION_THRESHOLD)
+APP_MOTION_THRESHOLD = float(os.environ["GOLF_MOTION_THRESHOLD"]) if os.environ.get("GOLF_MOTION_THRESHOLD") else None
+
+# Dừng decode khi đã xác nhận follow-through (phần video thừa phía sau không chạy pose)
+APP_STOP_AFTER_FOLLOW = os.environ.get("GOLF_STOP_AFTER_FOLLOW", "1") != "0"
+
+# Số Pose model warm dùng chung toàn process = số phân tích chạy song song tối đa
+APP_POSE_POOL_SIZE = int(os.environ.get("GOLF_POSE_POOL_SIZE", "2"))
+
+# Số job phân tích chạy nền cùng lúc trên toàn server (job khác xếp hàng chờ)
+APP_JOB_WORKERS = int(os.environ.get("GOLF_JOB_WORKERS", str(APP_POSE_POOL_SIZE)))
+
 # =====================================================
 # CẤU HÌNH TRANG
 # =====================================================
@@ -120,32 +153,159 @@ st.markdown("""
 # =====================================================
 # HÀM HỖ TRỢ
 # =====================================================
-def extract_landmarks_from_video(video_bytes):
-    """Trích xuất pose landmarks từ video"""
-    tfile = "temp_video.mp4"
-    with open(tfile, "wb") as f:
-        f.write(video_bytes.read())
+@st.cache_resource
+def get_pose_pool(size=APP_POSE_POOL_SIZE):
+    """Pool Pose model khởi tạo sẵn, dùng chung cho mọi session trong process
+
+    Trả về {"queue": Queue các model, "lock": Lock}. Lock nằm cùng object cache
+    với queue (không phải biến global của script, bị tạo lại mỗi lần rerun):
+    lấy nhiều model cùng lúc phải lần lượt, tránh 2 job mỗi bên giữ 1 model rồi chờ nhau.
+    """
+    models = queue.Queue(maxsize=size)
+    for _ in range(size):
+        models.put(mp_pose.Pose(**APP_POSE_SETTINGS))
+    return {"queue": models, "lock": threading.Lock()}
+
+@contextlib.contextmanager
+def borrow_poses(pool, n):
+    """Mượn n Pose model khác nhau từ pool (tối đa bằng size pool), trả lại khi xong
+
+    pool lấy từ get_pose_pool() ở script thread rồi truyền vào: job chạy ở worker
+    thread không có ScriptRunContext nên không gọi hàm st.cache_* ở đó.
+    """
+    models = pool["queue"]
+    n = max(1, min(n, models.maxsize))
+    with pool["lock"]:
+        poses = [models.get() for _ in range(n)]
+    try:
+        # Xóa tracking state còn lại từ video trước
+        for pose in poses:
+            pose.reset()
+        yield poses
+    finally:
+        for pose in poses:
+            models.put(pose)
+
+@contextlib.contextmanager
+def borrow_pose(pool):
+    """Mượn 1 Pose model từ pool (chờ nếu tất cả đang bận), trả lại khi xong"""
+    with borrow_poses(pool, 1) as poses:
+        yield poses[0]
+
+@st.cache_data(max_entries=8)
+def _read_baseline(path, mtime):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+@st.cache_resource(max_entries=4)
+def _build_pro_index(view, mtime):
+    return pro_index.build_from_library(view)
+
+def get_pro_index(view):
+    """Index Pro gần nhất dựng từ thư viện Pro, dựng lại khi thư viện thay đổi"""
+    path = os.path.join(pro_library.LIBRARY_DIR, pro_library.INDEX_FILE)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    return _build_pro_index(view, mtime)
+
+def load_baseline(view):
+    """Đọc baseline_pro_{view}.json, giữ trong bộ nhớ tới khi file đổi mtime"""
+    path = f"baseline_pro_{view}.json"
+    return _read_baseline(path, os.path.getmtime(path))
+
+def load_baseline_strata(view):
+    """Baseline theo nhóm golfer (baseline_pro_{view}.strata.json), None nếu chưa dựng"""
+    path = baseline_strata.strata_path(f"baseline_pro_{view}.json")
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    return _read_baseline(path, mtime)
+
+@contextlib.contextmanager
+def spool_upload(data, name=None):
+    """Ghi video upload ra file tạm riêng (tên duy nhất), luôn xóa khi xong
+
+    cv2.VideoCapture không đọc được video từ buffer trong bộ nhớ nên vẫn phải
+    ghi ra đĩa, nhưng mỗi lần phân tích một file riêng để các session chạy
+    song song không ghi đè video của nhau.
+    """
+    suffix = os.path.splitext(name or "")[1] or ".mp4"
+    fd, path = tempfile.mkstemp(prefix="golf_upload_", suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def extract_landmarks_from_video(video_bytes, motion_threshold=APP_MOTION_THRESHOLD, return_stats=False,
+                                 progress=None, name=None, pose=None, pool=None,
+                                 stop_after_follow=APP_STOP_AFTER_FOLLOW):
+    """Trích xuất pose landmarks từ video
+    
+    video_bytes: file upload hoặc bytes của video.
+    return_stats: trả thêm dict {"frames", "skipped", "cached", "stopped_at"} để hiển thị.
+    progress: callback(frame đã xử lý, tổng số frame) gọi sau mỗi frame.
+    pose: Pose model đã mượn sẵn từ pool, None thì tự mượn từ `pool`
+        (None = get_pose_pool(), chỉ dùng được ở script thread).
+    stop_after_follow: dừng decode ngay khi xác nhận được follow-through.
+    """
+    if isinstance(video_bytes, (bytes, bytearray)):
+        data = video_bytes
+    else:
+        data = video_bytes.read()
+        name = name or getattr(video_bytes, "name", None)
+    stats = {"frames": 0, "skipped": 0, "cached": False, "stopped_at": None}
     
-    cap = cv2.VideoCapture(tfile)
-    pose = mp_pose.Pose(model_complexity=1, min_detection_confidence=0.5)
+    # Video đã phân tích trước đó -> lấy luôn từ cache
+    cache_settings = APP_POSE_SETTINGS
+    if motion_threshold:
+        cache_settings = dict(cache_settings, motion_threshold=motion_threshold)
+    if stop_after_follow:
+        cache_settings = dict(cache_settings, stop_after_follow=pose_stream.FOLLOW_SETTINGS)
+    cache_key = landmark_cache.video_key(data, cache_settings)
+    cached = landmark_cache.load_cached(cache_key)
+    if cached is not None:
+        stats["cached"] = True
+        return (cached[0], stats) if return_stats else cached[0]
     
+    # Dùng chung generator với extract_pose (pipeline decode/inference + motion gate)
     frames = []
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            break
-        
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        res = pose.process(rgb)
-        
-        if res.pose_landmarks:
-            pts = []
-            for lm in res.pose_landmarks.landmark:
-                pts.append([lm.x, lm.y, lm.z])
-            frames.append(pts)
+    stream_stats = {}
+    with contextlib.ExitStack() as stack:
+        tfile = stack.enter_context(spool_upload(data, name))
+        if pose is None:
+            pose = stack.enter_context(borrow_pose(pool if pool is not None else get_pose_pool()))
+        cap = cv2.VideoCapture(tfile)
+        total = max(1, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+        follow_done = pose_stream.make_follow_through_check(cap.get(cv2.CAP_PROP_FPS)) if stop_after_follow else None
+        stream = pose_stream.iter_landmarks(cap, pose, motion_threshold=motion_threshold, stats=stream_stats)
+        try:
+            # closing: break giữa chừng thì thread decode dừng ngay, không đọc nốt video
+            with contextlib.closing(stream):
+                for idx, _, landmarks in stream:
+                    if landmarks is not None:
+                        frames.append(landmarks)
+                    if progress is not None:
+                        # Số frame ước lượng từ header có thể lệch -> kẹp lại
+                        progress(min(stream_stats["frames"], total), total)
+                    if follow_done is not None and follow_done(landmarks):
+                        stats["stopped_at"] = idx
+                        break
+        finally:
+            cap.release()
+    stats["frames"] = stream_stats["frames"]
+    stats["skipped"] = stream_stats["skipped"]
     
-    cap.release()
-    return frames
+    if frames:
+        landmark_cache.save_cached(cache_key, frames)
+    return (frames, stats) if return_stats else frames
 
 def get_score_color(score):
     if score >= 85:
@@ -524,6 +684,360 @@ def get_improvement_tips(metric, phase, diff):
         "exercises": ["💪 Tham khảo HLV để có bài tập phù hợp"]
     })
 
+def render_results(score, detailed_scores, view, view_type, custom_pro=False):
+    """Hiển thị kết quả chấm điểm (dùng chung cho 2 chế độ)
+    
+    custom_pro: so sánh với video Pro người dùng upload thay vì baseline có sẵn.
+    """
+    st.markdown("---")
+    st.markdown("## 🎯 KẾT QUẢ PHÂN TÍCH")
+    if custom_pro:
+        st.info("📌 **Lưu ý:** Bạn đang so sánh với video Pro mẫu đã upload, không phải baseline có sẵn!")
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.plotly_chart(create_gauge_chart(score, "ĐIỂM TỔNG SWING"), use_container_width=True)
+    
+    with col2:
+        st.markdown("<br><br>", unsafe_allow_html=True)
+        st.markdown(f"### Đánh Giá Của Bạn")
+        st.markdown(f'<div class="{get_badge_class(score)}" style="font-size: 1.5rem; text-align: center; margin: 1rem 0;">{get_score_label(score)}</div>', unsafe_allow_html=True)
+        
+        if score >= 85:
+            st.success("Swing của bạn rất gần với mẫu Pro. Xuất sắc!" if custom_pro else
+                       "Swing của bạn gần với trình độ chuyên nghiệp. Tiếp tục duy trì và luyện tập đều đặn!")
+        elif score >= 70:
+            st.info("Kỹ thuật tốt! Tập trung vào các khuyến nghị bên dưới." if custom_pro else
+                    "Kỹ thuật tốt! Tập trung vào các khuyến nghị bên dưới để đạt trình độ Pro.")
+        elif score >= 55:
+            st.warning("Swing có tiềm năng. Cải thiện các điểm được gợi ý." if custom_pro else
+                       "Swing có tiềm năng. Cải thiện các điểm yếu để nâng điểm số.")
+        else:
+            st.error("Tiếp tục luyện tập! Xem phân tích chi tiết bên dưới." if custom_pro else
+                     "Tiếp tục luyện tập! Xem phân tích chi tiết bên dưới để tập trung cải thiện.")
+    
+    st.markdown("---")
+    st.markdown("## 📈 ĐIỂM THEO GIAI ĐOẠN")
+    st.plotly_chart(create_phase_scores_chart(detailed_scores), use_container_width=True)
+    
+    st.markdown("---")
+    st.markdown("## 🔍 CHỈ SỐ CHI TIẾT")
+    
+    for phase in detailed_scores:
+        if "phase_score" in detailed_scores[phase]:
+            phase_names = {"setup": "SETUP", "top": "TOP", "impact": "IMPACT", "follow": "FOLLOW"}
+            with st.expander(f"📊 {phase_names.get(phase, phase.upper())} - Điểm: {detailed_scores[phase]['phase_score']}/100", expanded=(phase=="impact")):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.plotly_chart(create_radar_chart(detailed_scores, phase), use_container_width=True)
+                
+                with col2:
+                    st.plotly_chart(create_bar_comparison(detailed_scores, phase), use_container_width=True)
+    
+    st.markdown("---")
+    st.markdown("## 💡 KHUYẾN NGHỊ CẢI THIỆN (TOP 3 ƯU TIÊN)")
+    
+    priorities = []
+    metric_names = {
+        "spine_tilt": "Độ nghiêng lưng", "lead_arm_angle": "Góc tay dẫn",
+        "knee_flex_avg": "Góc gập đầu gối", "posture_stability": "Ổn định tư thế",
+        "hip_rotation": "Xoay hông", "shoulder_rotation": "Xoay vai",
+        "x_factor": "X-Factor", "shoulder_tilt": "Nghiêng vai",
+        "hip_tilt": "Nghiêng hông", "spine_lateral_bend": "Nghiêng bên lưng",
+        "weight_shift": "Chuyển trọng tâm", "head_stability": "Ổn định đầu"
+    }
+    
+    for phase in detailed_scores:
+        phase_names_full = {"setup": "SETUP", "top": "TOP", "impact": "IMPACT", "follow": "FOLLOW"}
+        for metric, data in detailed_scores[phase].items():
+            if metric != "phase_score" and isinstance(data, dict):
+                if data["score"] < 70:
+                    priorities.append({
+                        "phase": phase_names_full.get(phase, phase.upper()),
+                        "metric": metric,
+                        "metric_vn": metric_names.get(metric, metric.replace("_", " ").title()),
+                        "score": data["score"],
+                        "user": data["user"],
+                        "pro": data["pro"]
+                    })
+    
+    priorities = sorted(priorities, key=lambda x: x["score"])[:3]
+    
+    if len(priorities) == 0:
+        st.success("🎉 **Xuất sắc!** Tất cả chỉ số đều đạt mức tốt!" if custom_pro else
+                   "🎉 **Xuất sắc!** Tất cả chỉ số đều đạt mức tốt (≥70 điểm). Tiếp tục duy trì!")
+    else:
+        cols = st.columns(3)
+        for idx, item in enumerate(priorities):
+            with cols[idx]:
+                actual_diff = abs(item['user'] - item['pro'])
+                st.markdown(f"""
+                <div class="score-card" style="border-left: 4px solid {get_score_color(item['score'])};">
+                    <h4>Ưu tiên #{idx+1}</h4>
+                    <h3 style="color: {get_score_color(item['score'])};">{item['score']:.0f}/100</h3>
+                    <p><strong>{item['metric_vn']}</strong></p>
+                    <p style="font-size: 0.9rem; color: #666;">
+                        Giai đoạn: {item['phase']}<br>
+                        Chênh lệch: {actual_diff:.1f}°
+                    </p>
+                </div>
+                """, unsafe_allow_html=True)
+        
+        st.markdown("---")
+        st.markdown("## 📋 HƯỚNG DẪN CẢI THIỆN CHI TIẾT")
+        
+        for idx, item in enumerate(priorities):
+            actual_diff = abs(item['user'] - item['pro'])
+            tips = get_improvement_tips(item['metric'], item['phase'], actual_diff)
+            
+            with st.expander(f"🎯 Ưu tiên #{idx+1}: {item['metric_vn']} ({item['phase']}) - {item['score']:.0f}/100", expanded=(idx==0)):
+                st.markdown(f"### {tips['title']}")
+                
+                st.markdown("#### 📌 Các Điểm Cần Lưu Ý:")
+                for tip in tips['tips']:
+                    st.markdown(f'<div class="tip-box">{tip}</div>', unsafe_allow_html=True)
+                
+                st.markdown("#### 💪 Bài Tập Cải Thiện:")
+                for exercise in tips['exercises']:
+                    st.markdown(f'<div class="exercise-box">{exercise}</div>', unsafe_allow_html=True)
+    
+    # Chế độ video Pro tự upload không xuất báo cáo
+    if custom_pro:
+        return
+    
+    # EXPORT BÁO CÁO - ĐÃ FIX
+    st.markdown("---")
+    st.markdown("## 📥 TẢI BÁO CÁO")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        report = {
+            "diem_tong": score,
+            "goc_quay": view,
+            "chi_tiet": detailed_scores
+        }
+        st.download_button(
+            "📄 Tải Báo Cáo JSON",
+            data=json.dumps(report, indent=2, ensure_ascii=False),
+            file_name=f"phan_tich_golf_{view}.json",
+            mime="application/json",
+            use_container_width=True
+        )
+    
+    with col2:
+        phase_names = {"setup": "SETUP", "top": "TOP", "impact": "IMPACT", "follow": "FOLLOW"}
+        summary = f"""
+=== BÁO CÁO PHÂN TÍCH GOLF SWING ===
+Góc quay: {view_type}
+Điểm tổng: {score}/100
+Đánh giá: {get_score_label(score)}
+
+=== ĐIỂM THEO GIAI ĐOẠN ===
+"""
+        for phase in detailed_scores:
+            if "phase_score" in detailed_scores[phase]:
+                summary += f"{phase_names.get(phase, phase.upper())}: {detailed_scores[phase]['phase_score']}/100\n"
+        
+        st.download_button(
+            "📝 Tải Tóm Tắt Text",
+            data=summary,
+            file_name=f"tom_tat_golf_{view}.txt",
+            mime="text/plain",
+            use_container_width=True
+        )
+
+@st.cache_resource
+def get_job_executor(workers=APP_JOB_WORKERS):
+    """Worker pool chạy job phân tích, dùng chung toàn server (giới hạn throughput)"""
+    analysis_jobs.cleanup_jobs()
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis")
+
+def run_baseline_job(report, pose_pool, data, name, view, baseline_features, index=None,
+                     club=None, handedness=None):
+    """Job chế độ 1: trích xuất landmarks -> features -> chấm điểm với baseline
+
+    pose_pool, baseline_features, index (Pro gần nhất) được lấy ở script thread
+    trước start_job: job chạy ở worker thread, không gọi hàm st.cache_*.
+    baseline_features là strata index thì chấm với baseline của nhóm khớp nhất
+    (gậy, tay thuận chọn trên app, vóc dáng tính từ landmarks).
+    """
+    report(0, "📊 Đang trích xuất tư thế...")
+    frames, extract_stats = extract_landmarks_from_video(
+        data, name=name, return_stats=True, pool=pose_pool,
+        progress=lambda done, total: report(0.9 * done / total, f"📊 Đang xử lý frame {done}/{total}...")
+    )
+    if len(frames) < 10:
+        raise ValueError("Video quá ngắn hoặc không phát hiện được tư thế. Vui lòng upload video khác!")
+    
+    report(0.9, "🧮 Đang tính điểm...")
+    user_features = compute_swing_features(frames, view)
+    attributes = baseline_strata.user_attributes(frames, baseline_features, club, handedness)
+    score, detailed_scores = calculate_score(user_features, baseline_features, view, attributes=attributes)
+    
+    stratum = None
+    if "strata" in baseline_features:
+        key, entry = baseline_strata.select_stratum(baseline_features, attributes)
+        stratum = {"key": key, "count": entry["count"]}
+    
+    nearest = pro_index.nearest_pros(index, user_features, k=3) if index else []
+    return {"score": score, "detailed_scores": detailed_scores, "extract_stats": extract_stats,
+            "nearest_pros": nearest, "stratum": stratum}
+
+def run_compare_job(report, pose_pool, user_data, user_name, pro_data, pro_name, view, save_to_library=None):
+    """Job chế độ 2: trích xuất video người dùng và video Pro song song rồi so sánh
+    
+    save_to_library: tên Pro để lưu video Pro vào thư viện (None thì không lưu).
+    """
+    parts = {"📊 Video của bạn": (0, 1), "🏆 Video Pro mẫu": (0, 1)}
+    report(0, "⚙️ Đang phân tích cả 2 video...", parts=parts)
+    
+    def extract(data, name, label, pose):
+        def progress(done, total):
+            parts[label] = (done, total)
+            overall = sum(d / t for d, t in parts.values()) / len(parts)
+            report(0.9 * overall, parts={label: (done, total)})
+        return extract_landmarks_from_video(data, name=name, progress=progress, pose=pose)
+    
+    # Mỗi video 1 Pose model riêng (tracking state độc lập), chạy ở 2 thread
+    with borrow_poses(pose_pool, 2) as poses:
+        if len(poses) < 2:
+            # Pool chỉ có 1 model -> đành chạy lần lượt
+            user_frames = extract(user_data, user_name, "📊 Video của bạn", poses[0])
+            poses[0].reset()
+            pro_frames = extract(pro_data, pro_name, "🏆 Video Pro mẫu", poses[0])
+        else:
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix="extract") as pool:
+                user_future = pool.submit(extract, user_data, user_name, "📊 Video của bạn", poses[0])
+                pro_future = pool.submit(extract, pro_data, pro_name, "🏆 Video Pro mẫu", poses[1])
+                user_frames = user_future.result()
+                pro_frames = pro_future.result()
+    if len(user_frames) < 10 or len(pro_frames) < 10:
+        raise ValueError("Một trong 2 video quá ngắn hoặc không phát hiện được tư thế!")
+    
+    report(0.9, "🧮 Đang tính điểm...")
+    user_features = compute_swing_features(user_frames, view)
+    pro_features = compute_swing_features(pro_frames, view)
+    score, detailed_scores = calculate_score(user_features, pro_features, view)
+    dtw = swing_dtw.compare_swings(user_frames, pro_frames, view)
+    
+    if save_to_library:
+        pro_library.add_pro(save_to_library, view, pro_frames, source=pro_name)
+    return {"score": score, "detailed_scores": detailed_scores, "dtw": dtw}
+
+def run_library_compare_job(report, pose_pool, user_data, user_name, pro_id, view):
+    """Job chế độ 2 với Pro từ thư viện: chỉ extract video người dùng"""
+    entry = pro_library.get_pro(pro_id)
+    if entry is None:
+        raise ValueError("Không tìm thấy swing Pro này trong thư viện!")
+    
+    report(0, "📊 Đang xử lý video của bạn...")
+    user_frames = extract_landmarks_from_video(
+        user_data, name=user_name, pool=pose_pool,
+        progress=lambda done, total: report(0.9 * done / total, f"📊 Đang xử lý frame {done}/{total}...")
+    )
+    if len(user_frames) < 10:
+        raise ValueError("Video quá ngắn hoặc không phát hiện được tư thế. Vui lòng upload video khác!")
+    
+    report(0.9, "🧮 Đang tính điểm...")
+    user_features = compute_swing_features(user_frames, view)
+    score, detailed_scores = calculate_score(user_features, entry["features"], view)
+    pro_frames, _ = pro_library.load_pro_landmarks(pro_id)
+    dtw = swing_dtw.compare_swings(user_frames, pro_frames, view)
+    return {"score": score, "detailed_scores": detailed_scores, "dtw": dtw}
+
+def render_dtw(dtw):
+    """Kết quả căn chỉnh DTW toàn bộ swing user với Pro"""
+    st.markdown("---")
+    st.markdown("## ⏱️ SO SÁNH TOÀN BỘ SWING (DTW)")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Độ lệch trung bình", f"{dtw['normalized_cost']:.2f}",
+                  help="Khoảng cách trung bình mỗi frame sau khi căn chỉnh, đơn vị tolerance")
+    with col2:
+        st.metric("Tổng chi phí căn chỉnh", f"{dtw['cost']:.1f}")
+    with col3:
+        st.metric("Tempo (Bạn / Pro)", f"{dtw['tempo']:.2f}x",
+                  help=">1: swing của bạn dài hơn Pro, <1: nhanh hơn")
+    
+    path = np.array(dtw["path"])
+    fig = go.Figure(go.Scatter(x=path[:, 1], y=path[:, 0], mode="lines",
+                               line=dict(color="#667eea", width=3), name="Đường căn chỉnh"))
+    fig.update_layout(
+        title="Frame của bạn ứng với frame nào của Pro",
+        xaxis_title="Frame Pro", yaxis_title="Frame của bạn",
+        height=350, margin=dict(l=20, r=20, t=60, b=20),
+        paper_bgcolor="rgba(0,0,0,0)", font={'family': "Poppins"}
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+def start_job(kind, target, *args, params=None):
+    """Submit job và ghi job_id vào session + URL (refresh trang vẫn xem lại được)"""
+    job_id = analysis_jobs.submit_job(get_job_executor(), kind, target, *args, params=params)
+    st.session_state[f"job_{kind}"] = job_id
+    st.query_params["job"] = job_id
+
+def get_current_job(kind):
+    """Job gần nhất của chế độ `kind` trong session này (hoặc từ ?job= trên URL)"""
+    job_id = st.session_state.get(f"job_{kind}") or st.query_params.get("job")
+    job = analysis_jobs.load_job(job_id) if job_id else None
+    if job is None or job["kind"] != kind:
+        return None
+    st.session_state[f"job_{kind}"] = job_id
+    return job
+
+@st.fragment(run_every=1.0)
+def show_job_progress(job_id):
+    """Poll tiến độ job mỗi giây, chỉ rerun fragment này cho tới khi job xong"""
+    job = analysis_jobs.load_job(job_id)
+    if job is None or job["status"] not in ("queued", "running"):
+        st.rerun()
+    st.progress(job["progress"], text=job["message"])
+    for label, (done, total) in job.get("parts", {}).items():
+        st.progress(done / total, text=f"{label}: frame {done}/{total}")
+
+def show_job(job, custom_pro=False):
+    if job["status"] in ("queued", "running"):
+        show_job_progress(job["id"])
+        return
+    if job["status"] == "error":
+        st.error(f"❌ {job['error']}")
+        return
+    
+    result = job["result"]
+    params = job["params"]
+    extract_stats = result.get("extract_stats")
+    if extract_stats and extract_stats["cached"]:
+        st.caption("⚡ Video đã phân tích trước đó - dùng lại kết quả từ cache")
+    elif extract_stats and extract_stats["skipped"]:
+        st.caption(f"⏭️ Bỏ qua inference cho {extract_stats['skipped']}/{extract_stats['frames']} frame tĩnh")
+    if extract_stats and extract_stats.get("stopped_at") is not None:
+        st.caption(f"🏁 Dừng phân tích ở frame {extract_stats['stopped_at']} (đã xác nhận follow-through)")
+    
+    if custom_pro:
+        st.success("✅ Phân tích hoàn tất! Đã so sánh 2 video thành công!")
+    else:
+        st.success("✅ Phân tích hoàn tất! Swing của bạn đã được đánh giá chi tiết.")
+    stratum = result.get("stratum")
+    if stratum:
+        st.caption(f"🎯 Baseline nhóm: {stratum['key'] or 'tất cả Pro'} ({stratum['count']} swing Pro)")
+    render_results(result["score"], result["detailed_scores"], params["view"], params["view_type"], custom_pro)
+    
+    if result.get("dtw"):
+        render_dtw(result["dtw"])
+    
+    if result.get("nearest_pros"):
+        st.markdown("---")
+        st.markdown("## 🏆 SWING CỦA BẠN GIỐNG PRO NÀO NHẤT")
+        st.caption("Khoảng cách tính theo số lần tolerance của từng chỉ số - càng nhỏ càng giống")
+        cols = st.columns(len(result["nearest_pros"]))
+        for idx, (_, name, dist) in enumerate(result["nearest_pros"]):
+            with cols[idx]:
+                st.metric(f"#{idx+1}", name, f"khoảng cách {dist:.2f}", delta_color="off")
+
 # =====================================================
 # GIAO DIỆN CHÍNH
 # =====================================================
@@ -590,6 +1104,18 @@ if analysis_mode == "📊 So sánh với Pro Baseline có sẵn":
         help="Upload video swing để phân tích"
     )
     
+    # Chọn nhóm golfer nếu đã có baseline theo nhóm (vóc dáng tự tính từ video)
+    strata = load_baseline_strata(view)
+    club = handedness = None
+    if strata:
+        col_club, col_hand = st.columns(2)
+        with col_club:
+            club = st.selectbox("🏌️ Gậy", ["Tất cả"] + baseline_strata.attribute_values(strata, "club"))
+        with col_hand:
+            handedness = st.selectbox("✋ Tay thuận", ["Tất cả"] + baseline_strata.attribute_values(strata, "handedness"))
+        club = None if club == "Tất cả" else club
+        handedness = None if handedness == "Tất cả" else handedness
+    
     if uploaded_file:
         col1, col2 = st.columns([1, 1])
         
@@ -603,182 +1129,23 @@ if analysis_mode == "📊 So sánh với Pro Baseline có sẵn":
             st.info(f"**Chế độ:** So sánh với Pro Baseline")
         
         if st.button("🚀 Bắt Đầu Phân Tích", type="primary", use_container_width=True):
-            with st.spinner("⚙️ Đang phân tích video của bạn..."):
-                progress_bar = st.progress(0)
-                
-                progress_bar.progress(30)
-                frames = extract_landmarks_from_video(uploaded_file)
-                
-                if len(frames) < 10:
-                    st.error("❌ Video quá ngắn hoặc không phát hiện được tư thế. Vui lòng upload video khác!")
-                else:
-                    progress_bar.progress(60)
-                    user_features = compute_swing_features(frames, view)
-                    
-                    baseline_file = f"baseline_pro_{view}.json"
-                    
-                    try:
-                        with open(baseline_file, 'r') as f:
-                            baseline_features = json.load(f)
-                    except:
-                        st.error(f"❌ Không tìm thấy file baseline: {baseline_file}")
-                        st.stop()
-                    
-                    progress_bar.progress(90)
-                    score, detailed_scores = calculate_score(user_features, baseline_features, view)
-                    progress_bar.progress(100)
-                    
-                    time.sleep(0.5)
-                    st.success("✅ Phân tích hoàn tất! Swing của bạn đã được đánh giá chi tiết.")
-                    
-                    st.markdown("---")
-                    st.markdown("## 🎯 KẾT QUẢ PHÂN TÍCH")
-                    
-                    col1, col2 = st.columns([2, 1])
-                    
-                    with col1:
-                        st.plotly_chart(create_gauge_chart(score, "ĐIỂM TỔNG SWING"), use_container_width=True)
-                    
-                    with col2:
-                        st.markdown("<br><br>", unsafe_allow_html=True)
-                        st.markdown(f"### Đánh Giá Của Bạn")
-                        st.markdown(f'<div class="{get_badge_class(score)}" style="font-size: 1.5rem; text-align: center; margin: 1rem 0;">{get_score_label(score)}</div>', unsafe_allow_html=True)
-                        
-                        if score >= 85:
-                            st.success("Swing của bạn gần với trình độ chuyên nghiệp. Tiếp tục duy trì và luyện tập đều đặn!")
-                        elif score >= 70:
-                            st.info("Kỹ thuật tốt! Tập trung vào các khuyến nghị bên dưới để đạt trình độ Pro.")
-                        elif score >= 55:
-                            st.warning("Swing có tiềm năng. Cải thiện các điểm yếu để nâng điểm số.")
-                        else:
-                            st.error("Tiếp tục luyện tập! Xem phân tích chi tiết bên dưới để tập trung cải thiện.")
-                    
-                    st.markdown("---")
-                    st.markdown("## 📈 ĐIỂM THEO GIAI ĐOẠN")
-                    st.plotly_chart(create_phase_scores_chart(detailed_scores), use_container_width=True)
-                    
-                    st.markdown("---")
-                    st.markdown("## 🔍 CHỈ SỐ CHI TIẾT")
-                    
-                    for phase in detailed_scores:
-                        if "phase_score" in detailed_scores[phase]:
-                            phase_names = {"setup": "SETUP", "top": "TOP", "impact": "IMPACT", "follow": "FOLLOW"}
-                            with st.expander(f"📊 {phase_names.get(phase, phase.upper())} - Điểm: {detailed_scores[phase]['phase_score']}/100", expanded=(phase=="impact")):
-                                col1, col2 = st.columns(2)
-                                
-                                with col1:
-                                    st.plotly_chart(create_radar_chart(detailed_scores, phase), use_container_width=True)
-                                
-                                with col2:
-                                    st.plotly_chart(create_bar_comparison(detailed_scores, phase), use_container_width=True)
-                    
-                    st.markdown("---")
-                    st.markdown("## 💡 KHUYẾN NGHỊ CẢI THIỆN (TOP 3 ƯU TIÊN)")
-                    
-                    priorities = []
-                    metric_names = {
-                        "spine_tilt": "Độ nghiêng lưng", "lead_arm_angle": "Góc tay dẫn",
-                        "knee_flex_avg": "Góc gập đầu gối", "posture_stability": "Ổn định tư thế",
-                        "hip_rotation": "Xoay hông", "shoulder_rotation": "Xoay vai",
-                        "x_factor": "X-Factor", "shoulder_tilt": "Nghiêng vai",
-                        "hip_tilt": "Nghiêng hông", "spine_lateral_bend": "Nghiêng bên lưng",
-                        "weight_shift": "Chuyển trọng tâm", "head_stability": "Ổn định đầu"
-                    }
-                    
-                    for phase in detailed_scores:
-                        phase_names_full = {"setup": "SETUP", "top": "TOP", "impact": "IMPACT", "follow": "FOLLOW"}
-                        for metric, data in detailed_scores[phase].items():
-                            if metric != "phase_score" and isinstance(data, dict):
-                                if data["score"] < 70:
-                                    priorities.append({
-                                        "phase": phase_names_full.get(phase, phase.upper()),
-                                        "metric": metric,
-                                        "metric_vn": metric_names.get(metric, metric.replace("_", " ").title()),
-                                        "score": data["score"],
-                                        "user": data["user"],
-                                        "pro": data["pro"]
-                                    })
-                    
-                    priorities = sorted(priorities, key=lambda x: x["score"])[:3]
-                    
-                    if len(priorities) == 0:
-                        st.success("🎉 **Xuất sắc!** Tất cả chỉ số đều đạt mức tốt (≥70 điểm). Tiếp tục duy trì!")
-                    else:
-                        cols = st.columns(3)
-                        for idx, item in enumerate(priorities):
-                            with cols[idx]:
-                                actual_diff = abs(item['user'] - item['pro'])
-                                st.markdown(f"""
-                                <div class="score-card" style="border-left: 4px solid {get_score_color(item['score'])};">
-                                    <h4>Ưu tiên #{idx+1}</h4>
-                                    <h3 style="color: {get_score_color(item['score'])};">{item['score']:.0f}/100</h3>
-                                    <p><strong>{item['metric_vn']}</strong></p>
-                                    <p style="font-size: 0.9rem; color: #666;">
-                                        Giai đoạn: {item['phase']}<br>
-                                        Chênh lệch: {actual_diff:.1f}°
-                                    </p>
-                                </div>
-                                """, unsafe_allow_html=True)
-                        
-                        st.markdown("---")
-                        st.markdown("## 📋 HƯỚNG DẪN CẢI THIỆN CHI TIẾT")
-                        
-                        for idx, item in enumerate(priorities):
-                            actual_diff = abs(item['user'] - item['pro'])
-                            tips = get_improvement_tips(item['metric'], item['phase'], actual_diff)
-                            
-                            with st.expander(f"🎯 Ưu tiên #{idx+1}: {item['metric_vn']} ({item['phase']}) - {item['score']:.0f}/100", expanded=(idx==0)):
-                                st.markdown(f"### {tips['title']}")
-                                
-                                st.markdown("#### 📌 Các Điểm Cần Lưu Ý:")
-                                for tip in tips['tips']:
-                                    st.markdown(f'<div class="tip-box">{tip}</div>', unsafe_allow_html=True)
-                                
-                                st.markdown("#### 💪 Bài Tập Cải Thiện:")
-                                for exercise in tips['exercises']:
-                                    st.markdown(f'<div class="exercise-box">{exercise}</div>', unsafe_allow_html=True)
-                    
-                    # EXPORT BÁO CÁO - ĐÃ FIX
-                    st.markdown("---")
-                    st.markdown("## 📥 TẢI BÁO CÁO")
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        report = {
-                            "diem_tong": score,
-                            "goc_quay": view,
-                            "chi_tiet": detailed_scores
-                        }
-                        st.download_button(
-                            "📄 Tải Báo Cáo JSON",
-                            data=json.dumps(report, indent=2, ensure_ascii=False),
-                            file_name=f"phan_tich_golf_{view}.json",
-                            mime="application/json",
-                            use_container_width=True
-                        )
-                    
-                    with col2:
-                        phase_names = {"setup": "SETUP", "top": "TOP", "impact": "IMPACT", "follow": "FOLLOW"}
-                        summary = f"""
-=== BÁO CÁO PHÂN TÍCH GOLF SWING ===
-Góc quay: {view_type}
-Điểm tổng: {score}/100
-Đánh giá: {get_score_label(score)}
-
-=== ĐIỂM THEO GIAI ĐOẠN ===
-"""
-                        for phase in detailed_scores:
-                            if "phase_score" in detailed_scores[phase]:
-                                summary += f"{phase_names.get(phase, phase.upper())}: {detailed_scores[phase]['phase_score']}/100\n"
-                        
-                        st.download_button(
-                            "📝 Tải Tóm Tắt Text",
-                            data=summary,
-                            file_name=f"tom_tat_golf_{view}.txt",
-                            mime="text/plain",
-                            use_container_width=True
-                        )
+            try:
+                baseline_features = strata or load_baseline(view)
+            except:
+                st.error(f"❌ Không tìm thấy file baseline: baseline_pro_{view}.json")
+                st.stop()
+            
+            # Chạy nền ở worker pool, trang chỉ poll tiến độ
+            start_job(
+                "baseline", run_baseline_job,
+                get_pose_pool(), uploaded_file.getvalue(), uploaded_file.name, view, baseline_features,
+                get_pro_index(view), club, handedness,
+                params={"view": view, "view_type": view_type, "video": uploaded_file.name},
+            )
+    
+    job = get_current_job("baseline")
+    if job:
+        show_job(job)
 
 # =====================================================
 # CHẾ ĐỘ 2: UPLOAD 2 VIDEO
@@ -800,148 +1167,61 @@ else:
     
     with col2:
         st.markdown("### 🏆 Video Pro Mẫu")
-        pro_video = st.file_uploader(
-            "Upload video Pro mẫu để so sánh",
-            type=['mp4', 'mov', 'avi'],
-            key="pro_video"
+        library = pro_library.list_pros(view)
+        pro_source = st.radio(
+            "Nguồn Pro mẫu:",
+            ["📚 Thư viện Pro", "📤 Upload video Pro"],
+            index=0 if library else 1,
+            horizontal=True,
+            key="pro_source"
         )
-        if pro_video:
-            st.video(pro_video)
+        
+        pro_video = None
+        pro_id = None
+        save_name = None
+        if pro_source == "📚 Thư viện Pro":
+            if library:
+                entries = dict(library)
+                pro_id = st.selectbox(
+                    "Chọn swing Pro",
+                    list(entries),
+                    format_func=lambda p: entries[p]["name"],
+                    key="pro_id"
+                )
+                st.caption(f"🎞️ {entries[pro_id]['frames']} frame • Features đã tính sẵn, không cần extract lại")
+            else:
+                st.warning("📚 Thư viện chưa có swing Pro nào cho góc quay này. Hãy upload video Pro.")
+        else:
+            pro_video = st.file_uploader(
+                "Upload video Pro mẫu để so sánh",
+                type=['mp4', 'mov', 'avi'],
+                key="pro_video"
+            )
+            if pro_video:
+                st.video(pro_video)
+                if st.checkbox("💾 Lưu video Pro này vào thư viện", key="save_pro"):
+                    save_name = st.text_input("Tên Pro", value=os.path.splitext(pro_video.name)[0], key="pro_name")
     
-    if user_video and pro_video:
+    if user_video and (pro_video or pro_id):
         if st.button("🚀 Phân Tích & So Sánh", type="primary", use_container_width=True):
-            with st.spinner("⚙️ Đang phân tích cả 2 video..."):
-                progress_bar = st.progress(0)
-                
-                progress_bar.progress(20)
-                st.info("📊 Đang xử lý video của bạn...")
-                user_frames = extract_landmarks_from_video(user_video)
-                
-                progress_bar.progress(50)
-                st.info("🏆 Đang xử lý video Pro mẫu...")
-                pro_frames = extract_landmarks_from_video(pro_video)
-                
-                if len(user_frames) < 10 or len(pro_frames) < 10:
-                    st.error("❌ Một trong 2 video quá ngắn hoặc không phát hiện được tư thế!")
-                else:
-                    progress_bar.progress(70)
-                    user_features = compute_swing_features(user_frames, view)
-                    pro_features = compute_swing_features(pro_frames, view)
-                    
-                    progress_bar.progress(90)
-                    score, detailed_scores = calculate_score(user_features, pro_features, view)
-                    progress_bar.progress(100)
-                    
-                    time.sleep(0.5)
-                    st.success("✅ Phân tích hoàn tất! Đã so sánh 2 video thành công!")
-                    
-                    st.markdown("---")
-                    st.markdown("## 🎯 KẾT QUẢ PHÂN TÍCH")
-                    st.info("📌 **Lưu ý:** Bạn đang so sánh với video Pro mẫu đã upload, không phải baseline có sẵn!")
-                    
-                    col1, col2 = st.columns([2, 1])
-                    
-                    with col1:
-                        st.plotly_chart(create_gauge_chart(score, "ĐIỂM TỔNG SWING"), use_container_width=True)
-                    
-                    with col2:
-                        st.markdown("<br><br>", unsafe_allow_html=True)
-                        st.markdown(f"### Đánh Giá Của Bạn")
-                        st.markdown(f'<div class="{get_badge_class(score)}" style="font-size: 1.5rem; text-align: center; margin: 1rem 0;">{get_score_label(score)}</div>', unsafe_allow_html=True)
-                        
-                        if score >= 85:
-                            st.success("Swing của bạn rất gần với mẫu Pro. Xuất sắc!")
-                        elif score >= 70:
-                            st.info("Kỹ thuật tốt! Tập trung vào các khuyến nghị bên dưới.")
-                        elif score >= 55:
-                            st.warning("Swing có tiềm năng. Cải thiện các điểm được gợi ý.")
-                        else:
-                            st.error("Tiếp tục luyện tập! Xem phân tích chi tiết bên dưới.")
-                    
-                    st.markdown("---")
-                    st.markdown("## 📈 ĐIỂM THEO GIAI ĐOẠN")
-                    st.plotly_chart(create_phase_scores_chart(detailed_scores), use_container_width=True)
-                    
-                    st.markdown("---")
-                    st.markdown("## 🔍 CHỈ SỐ CHI TIẾT")
-                    
-                    for phase in detailed_scores:
-                        if "phase_score" in detailed_scores[phase]:
-                            phase_names = {"setup": "SETUP", "top": "TOP", "impact": "IMPACT", "follow": "FOLLOW"}
-                            with st.expander(f"📊 {phase_names.get(phase, phase.upper())} - Điểm: {detailed_scores[phase]['phase_score']}/100", expanded=(phase=="impact")):
-                                col1, col2 = st.columns(2)
-                                
-                                with col1:
-                                    st.plotly_chart(create_radar_chart(detailed_scores, phase), use_container_width=True)
-                                
-                                with col2:
-                                    st.plotly_chart(create_bar_comparison(detailed_scores, phase), use_container_width=True)
-                    
-                    st.markdown("---")
-                    st.markdown("## 💡 KHUYẾN NGHỊ CẢI THIỆN (TOP 3 ƯU TIÊN)")
-                    
-                    priorities = []
-                    metric_names = {
-                        "spine_tilt": "Độ nghiêng lưng", "lead_arm_angle": "Góc tay dẫn",
-                        "knee_flex_avg": "Góc gập đầu gối", "posture_stability": "Ổn định tư thế",
-                        "hip_rotation": "Xoay hông", "shoulder_rotation": "Xoay vai",
-                        "x_factor": "X-Factor", "shoulder_tilt": "Nghiêng vai",
-                        "hip_tilt": "Nghiêng hông", "spine_lateral_bend": "Nghiêng bên lưng",
-                        "weight_shift": "Chuyển trọng tâm", "head_stability": "Ổn định đầu"
-                    }
-                    
-                    for phase in detailed_scores:
-                        phase_names_full = {"setup": "SETUP", "top": "TOP", "impact": "IMPACT", "follow": "FOLLOW"}
-                        for metric, data in detailed_scores[phase].items():
-                            if metric != "phase_score" and isinstance(data, dict):
-                                if data["score"] < 70:
-                                    priorities.append({
-                                        "phase": phase_names_full.get(phase, phase.upper()),
-                                        "metric": metric,
-                                        "metric_vn": metric_names.get(metric, metric.replace("_", " ").title()),
-                                        "score": data["score"],
-                                        "user": data["user"],
-                                        "pro": data["pro"]
-                                    })
-                    
-                    priorities = sorted(priorities, key=lambda x: x["score"])[:3]
-                    
-                    if len(priorities) == 0:
-                        st.success("🎉 **Xuất sắc!** Tất cả chỉ số đều đạt mức tốt!")
-                    else:
-                        cols = st.columns(3)
-                        for idx, item in enumerate(priorities):
-                            with cols[idx]:
-                                actual_diff = abs(item['user'] - item['pro'])
-                                st.markdown(f"""
-                                <div class="score-card" style="border-left: 4px solid {get_score_color(item['score'])};">
-                                    <h4>Ưu tiên #{idx+1}</h4>
-                                    <h3 style="color: {get_score_color(item['score'])};">{item['score']:.0f}/100</h3>
-                                    <p><strong>{item['metric_vn']}</strong></p>
-                                    <p style="font-size: 0.9rem; color: #666;">
-                                        Giai đoạn: {item['phase']}<br>
-                                        Chênh lệch: {actual_diff:.1f}°
-                                    </p>
-                                </div>
-                                """, unsafe_allow_html=True)
-                        
-                        st.markdown("---")
-                        st.markdown("## 📋 HƯỚNG DẪN CẢI THIỆN CHI TIẾT")
-                        
-                        for idx, item in enumerate(priorities):
-                            actual_diff = abs(item['user'] - item['pro'])
-                            tips = get_improvement_tips(item['metric'], item['phase'], actual_diff)
-                            
-                            with st.expander(f"🎯 Ưu tiên #{idx+1}: {item['metric_vn']} ({item['phase']}) - {item['score']:.0f}/100", expanded=(idx==0)):
-                                st.markdown(f"### {tips['title']}")
-                                
-                                st.markdown("#### 📌 Các Điểm Cần Lưu Ý:")
-                                for tip in tips['tips']:
-                                    st.markdown(f'<div class="tip-box">{tip}</div>', unsafe_allow_html=True)
-                                
-                                st.markdown("#### 💪 Bài Tập Cải Thiện:")
-                                for exercise in tips['exercises']:
-                                    st.markdown(f'<div class="exercise-box">{exercise}</div>', unsafe_allow_html=True)
+            if pro_id:
+                start_job(
+                    "compare", run_library_compare_job,
+                    get_pose_pool(), user_video.getvalue(), user_video.name, pro_id, view,
+                    params={"view": view, "view_type": view_type, "video": user_video.name,
+                            "pro_video": entries[pro_id]["name"]},
+                )
+            else:
+                start_job(
+                    "compare", run_compare_job,
+                    get_pose_pool(), user_video.getvalue(), user_video.name, pro_video.getvalue(), pro_video.name, view,
+                    save_name or None,
+                    params={"view": view, "view_type": view_type, "video": user_video.name, "pro_video": pro_video.name},
+                )
+    
+    job = get_current_job("compare")
+    if job:
+        show_job(job, custom_pro=True)
 
 # Footer
 st.markdown("---")
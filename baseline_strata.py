@@ -0,0 +1,163 @@
+import itertools
+import json
+import os
+import numpy as np
+
+# Baseline theo nhóm golfer (stratum) thay vì 1 median chung cho mọi Pro:
+#   baseline_pro_{view}.strata.json = {"view", "attributes", "min_count", "build_centers",
+#                                      "strata": {key: {"count", "baseline"}}}
+# key ghép các thuộc tính theo thứ tự STRATA_ATTRIBUTES, vd "club=driver|handedness=right",
+# key "" là baseline chung. Stratum ít hơn min_count swing không được lưu, nên tra
+# cứu chỉ cần thử tối đa 2^3 key (dict lookup) rồi rơi về baseline chung.
+STRATA_ATTRIBUTES = ["club", "handedness", "build"]
+
+STRATA_SETTINGS = {
+    "min_count": 5,        # Số swing tối thiểu để 1 stratum có baseline riêng
+    "build_clusters": 3,   # Số nhóm vóc dáng (k-means trên tỉ lệ tay / chân so với thân)
+}
+
+# File thuộc tính trong folder pose: {"ten_file.npz": {"club": "driver", "handedness": "right"}}
+# (key là tên file hoặc tên không có đuôi)
+ATTRIBUTES_FILE = "attributes.json"
+
+
+def strata_path(baseline_file):
+    """baseline_pro_side.json -> baseline_pro_side.strata.json"""
+    return os.path.splitext(baseline_file)[0] + ".strata.json"
+
+
+def load_attributes(folder):
+    """Đọc attributes.json của folder pose, {} nếu không có"""
+    try:
+        with open(os.path.join(folder, ATTRIBUTES_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def file_attributes(attributes, filename):
+    """Thuộc tính (club, handedness) của 1 file pose, chuẩn hoá chữ thường"""
+    attrs = attributes.get(filename) or attributes.get(os.path.splitext(filename)[0]) or {}
+    return {a: str(attrs[a]).strip().lower() for a in ("club", "handedness") if attrs.get(a)}
+
+
+def stratum_key(attributes):
+    """Key của stratum từ dict thuộc tính (bỏ thuộc tính None)"""
+    return "|".join(f"{a}={attributes[a]}" for a in STRATA_ATTRIBUTES
+                    if attributes.get(a) is not None)
+
+
+def fallback_keys(attributes):
+    """Các key từ cụ thể nhất tới baseline chung ""
+
+    Bỏ dần thuộc tính từ cuối STRATA_ATTRIBUTES (build trước, club sau cùng).
+    """
+    present = [a for a in STRATA_ATTRIBUTES if attributes.get(a) is not None]
+    for r in range(len(present), -1, -1):
+        for combo in itertools.combinations(present, r):
+            yield stratum_key({a: attributes[a] for a in combo})
+
+
+def limb_ratios(frames):
+    """Tỉ lệ (tay, chân) / thân, median qua các frame, từ toạ độ x, y của landmarks
+
+    tay = vai-khuỷu + khuỷu-cổ tay, chân = hông-gối + gối-cổ chân (trung bình 2 bên),
+    thân = trung điểm vai -> trung điểm hông. Không tính được thì trả về None.
+    """
+    pts = np.asarray(frames, dtype=np.float64)
+    if pts.ndim != 3 or len(pts) == 0:
+        return None
+    pts = pts[:, :, :2]
+
+    def seg(i, j):
+        return np.linalg.norm(pts[:, i] - pts[:, j], axis=1)
+
+    torso = np.linalg.norm((pts[:, 11] + pts[:, 12]) / 2 - (pts[:, 23] + pts[:, 24]) / 2, axis=1)
+    arm = (seg(11, 13) + seg(13, 15) + seg(12, 14) + seg(14, 16)) / 2
+    leg = (seg(23, 25) + seg(25, 27) + seg(24, 26) + seg(26, 28)) / 2
+
+    ok = torso > 1e-6
+    if not ok.any():
+        return None
+    return [float(np.median(arm[ok] / torso[ok])), float(np.median(leg[ok] / torso[ok]))]
+
+
+def fit_build_centers(ratios, k=None, iterations=20):
+    """K-means nhỏ trên tỉ lệ chi của các Pro, trả về list tâm cụm sắp tăng dần
+
+    Khởi tạo theo quantile của tổng tỉ lệ nên kết quả không phụ thuộc ngẫu nhiên;
+    cụm 0 là dáng "ngắn chi" nhất.
+    """
+    k = k or STRATA_SETTINGS["build_clusters"]
+    points = np.asarray([r for r in ratios if r is not None], dtype=np.float64)
+    if len(points) == 0:
+        return []
+    k = min(k, len(np.unique(points, axis=0)))
+
+    order = np.argsort(points.sum(axis=1), kind="stable")
+    centers = points[order[np.linspace(0, len(points) - 1, k).round().astype(int)]]
+
+    for _ in range(iterations):
+        labels = np.argmin(((points[:, None] - centers[None]) ** 2).sum(axis=2), axis=1)
+        new = np.array([points[labels == c].mean(axis=0) if (labels == c).any() else centers[c]
+                        for c in range(k)])
+        if np.allclose(new, centers):
+            break
+        centers = new
+
+    centers = centers[np.lexsort(centers.T[::-1])]
+    return centers.tolist()
+
+
+def build_cluster(ratios, centers):
+    """Nhóm vóc dáng (index tâm cụm gần nhất), None nếu không xác định được"""
+    if ratios is None or not centers:
+        return None
+    d2 = ((np.asarray(centers) - np.asarray(ratios)) ** 2).sum(axis=1)
+    return int(np.argmin(d2))
+
+
+def user_attributes(frames, strata, club=None, handedness=None):
+    """Thuộc tính của swing người dùng: club / handedness chọn trên app, build tính từ landmarks"""
+    attrs = {"club": club or None, "handedness": handedness or None}
+    if strata and "build_centers" in strata:
+        attrs["build"] = build_cluster(limb_ratios(frames), strata["build_centers"])
+    return attrs
+
+
+def attribute_values(strata, attribute):
+    """Các giá trị của 1 thuộc tính có baseline riêng trong strata index (để làm selector)"""
+    values = set()
+    for key in strata["strata"]:
+        for part in key.split("|") if key else ():
+            name, value = part.split("=", 1)
+            if name == attribute:
+                values.add(value)
+    return sorted(values)
+
+
+def select_stratum(strata, attributes=None):
+    """(key, entry) của stratum khớp nhất với attributes, fallback về baseline chung"""
+    table = strata["strata"]
+    for key in fallback_keys(attributes or {}):
+        entry = table.get(key)
+        if entry is not None:
+            return key, entry
+    raise KeyError("Strata index không có baseline chung")
+
+
+def select_baseline(baseline, attributes=None):
+    """Baseline dùng để chấm điểm: baseline thường thì trả về nguyên,
+    strata index thì chọn stratum khớp nhất với attributes"""
+    if "strata" not in baseline:
+        return baseline
+    return select_stratum(baseline, attributes)[1]["baseline"]
+
+
+def load_strata(path):
+    """Đọc strata index, None nếu chưa có"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -1,17 +1,54 @@
 import math
 import numpy as np
+import baseline_strata
 
+def angle_3d_batch(a, b, c):
+    """Tính góc 3D (độ) tại b cho cả stack điểm (N, 3) cùng lúc
+
+    a, b, c broadcast được với nhau, ví dụ (N, 3) với (3,). Vector độ dài 0 -> 0.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    c = np.asarray(c, dtype=np.float64)
+    ba = a[..., :3] - b[..., :3]
+    bc = c[..., :3] - b[..., :3]
+    dot = ba[..., 0]*bc[..., 0] + ba[..., 1]*bc[..., 1] + ba[..., 2]*bc[..., 2]
+    mag = (np.sqrt(ba[..., 0]*ba[..., 0] + ba[..., 1]*ba[..., 1] + ba[..., 2]*ba[..., 2])
+           * np.sqrt(bc[..., 0]*bc[..., 0] + bc[..., 1]*bc[..., 1] + bc[..., 2]*bc[..., 2]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_angle = np.clip(dot / mag, -1, 1)
+    return np.where(mag == 0, 0.0, np.degrees(np.arccos(cos_angle)))
+
+def angle_2d_batch(a, b, c):
+    """Tính góc 2D (độ, chỉ dùng x, y) tại b cho cả stack điểm (N, >=2) cùng lúc"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    c = np.asarray(c, dtype=np.float64)
+    ba_x, ba_y = a[..., 0] - b[..., 0], a[..., 1] - b[..., 1]
+    bc_x, bc_y = c[..., 0] - b[..., 0], c[..., 1] - b[..., 1]
+    dot = ba_x*bc_x + ba_y*bc_y
+    mag = np.sqrt(ba_x*ba_x + ba_y*ba_y) * np.sqrt(bc_x*bc_x + bc_y*bc_y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos_angle = np.clip(dot / mag, -1, 1)
+    return np.where(mag == 0, 0.0, np.degrees(np.arccos(cos_angle)))
+
+# angle_3d / angle_2d không gọi qua bản _batch mà giữ công thức scalar gốc, vì
+# không làm bản _batch trùng từng bit được: np.arccos (SIMD) lệch math.acos 1 ulp
+# ở ~10% giá trị, np.dot / norm (BLAS, có FMA) cộng khác thứ tự với phép vector.
+# Gần 180° 1 ulp của cos thành ~1e-6 độ, đủ đổi frame top / impact mà
+# detect_swing_phases chọn (tín hiệu hông luôn ~180°). angle_3d chỉ bỏ phần
+# overhead không ảnh hưởng kết quả (np.linalg.norm == sqrt(ba.dot(ba)), clip).
 def angle_3d(a, b, c):
     """Tính góc 3D chính xác hơn"""
     ba = np.array([a[0]-b[0], a[1]-b[1], a[2]-b[2]])
     bc = np.array([c[0]-b[0], c[1]-b[1], c[2]-b[2]])
-    dot = np.dot(ba, bc)
-    mag1 = np.linalg.norm(ba)
-    mag2 = np.linalg.norm(bc)
+    dot = ba.dot(bc)
+    mag1 = math.sqrt(ba.dot(ba))
+    mag2 = math.sqrt(bc.dot(bc))
     if mag1 * mag2 == 0:
         return 0
     cos_angle = dot / (mag1 * mag2)
-    cos_angle = np.clip(cos_angle, -1, 1)
+    cos_angle = max(-1.0, min(1.0, cos_angle))
     return math.degrees(math.acos(cos_angle))
 
 def angle_2d(a, b, c):
@@ -107,19 +144,86 @@ def compute_features_frame(points, view_type="side"):
     
     return features
 
+# Thứ tự cột của compute_features_batch (giống thứ tự key của compute_features_frame)
+FEATURE_NAMES = {
+    "side": [
+        "spine_tilt", "hip_rotation", "shoulder_rotation", "lead_arm_angle",
+        "trail_arm_angle", "x_factor", "knee_flex_avg", "posture_stability",
+    ],
+    "back": [
+        "shoulder_tilt", "hip_tilt", "spine_lateral_bend", "weight_shift", "head_stability",
+    ],
+}
+
+def compute_features_batch(frames, view_type="side"):
+    """Tính tất cả chỉ số của mọi frame cùng lúc
+
+    frames: list-of-lists hoặc array (T, 33, 3).
+    Trả về array (T, len(FEATURE_NAMES[view_type])), cột theo FEATURE_NAMES,
+    giá trị giống compute_features_frame cho từng frame (lệch ~1e-12, gần
+    0° / 180° tới ~1e-6 độ do np.arccos vector hoá, xem angle_2d / angle_3d).
+    """
+    pts = np.asarray(frames, dtype=np.float64).reshape(-1, 33, 3)
+    
+    nose = pts[:, 0]
+    l_shoulder, r_shoulder = pts[:, 11], pts[:, 12]
+    l_elbow, r_elbow = pts[:, 13], pts[:, 14]
+    l_wrist, r_wrist = pts[:, 15], pts[:, 16]
+    l_hip, r_hip = pts[:, 23], pts[:, 24]
+    l_knee, r_knee = pts[:, 25], pts[:, 26]
+    l_ankle, r_ankle = pts[:, 27], pts[:, 28]
+    
+    mid_shoulder = (l_shoulder + r_shoulder) / 2
+    mid_hip = (l_hip + r_hip) / 2
+    
+    if view_type == "side":
+        spine_tilt = np.abs(90 - angle_2d_batch(nose, mid_shoulder, mid_hip))
+        hip_rotation = angle_2d_batch(l_hip, mid_hip, r_hip)
+        shoulder_rotation = angle_2d_batch(l_shoulder, mid_shoulder, r_shoulder)
+        lead_arm = angle_3d_batch(l_shoulder, l_elbow, l_wrist)
+        trail_arm = angle_3d_batch(r_shoulder, r_elbow, r_wrist)
+        x_factor = np.abs(shoulder_rotation - hip_rotation)
+        knee_flex = (angle_3d_batch(l_hip, l_knee, l_ankle) + angle_3d_batch(r_hip, r_knee, r_ankle)) / 2
+        posture = np.abs(mid_hip[:, 1] - (l_ankle[:, 1] + r_ankle[:, 1])/2) * 100
+        
+        columns = [spine_tilt, hip_rotation, shoulder_rotation, lead_arm,
+                   trail_arm, x_factor, knee_flex, posture]
+    else:  # back view
+        shoulder_tilt = np.abs(90 - angle_2d_batch(l_hip, l_shoulder, r_shoulder))
+        hip_tilt = np.abs(90 - angle_2d_batch(l_shoulder, l_hip, r_hip))
+        spine_lateral = np.abs(mid_shoulder[:, 0] - mid_hip[:, 0])
+        weight_dist = np.abs(l_hip[:, 0] - r_hip[:, 0])
+        head_center = np.abs(nose[:, 0] - (l_shoulder[:, 0] + r_shoulder[:, 0])/2)
+        
+        columns = [shoulder_tilt, hip_tilt, spine_lateral, weight_dist, head_center]
+    
+    return np.stack(columns, axis=1)
+
+def _frame_points(frames, idx):
+    """Lấy landmarks 1 frame dạng list (nhận cả list-of-lists lẫn array (frames, 33, 3))"""
+    pts = frames[idx]
+    if isinstance(pts, np.ndarray):
+        # float32 -> float Python giữ nguyên giá trị, kết quả giống hệt khi đọc JSON
+        return pts.tolist()
+    return pts
+
 def detect_swing_phases(frames):
     """Tự động phát hiện các phase của swing"""
     if len(frames) < 20:
         return None
     
-    # Tính hip rotation cho mỗi frame để tìm top và impact
+    if isinstance(frames, np.ndarray):
+        hips = frames[:, 23:25].tolist()
+    else:
+        hips = [(pts[23], pts[24]) for pts in frames]
+    
+    # Tính hip rotation cho mỗi frame để tìm top và impact.
+    # Giữ đường scalar (angle_2d): hip rotation luôn ~180° nên argmax / argmin
+    # bên dưới phụ thuộc cả sai số ulp cuối, bản vector (np.arccos) chọn khác frame.
     hip_rotations = []
-    for pts in frames:
-        l_hip = pts[23]
-        r_hip = pts[24]
+    for l_hip, r_hip in hips:
         mid_hip = [(l_hip[i] + r_hip[i])/2 for i in range(3)]
-        rotation = angle_2d(l_hip, mid_hip, r_hip)
-        hip_rotations.append(rotation)
+        hip_rotations.append(angle_2d(l_hip, mid_hip, r_hip))
     
     # Smooth signal
     hip_rotations = np.convolve(hip_rotations, np.ones(5)/5, mode='same')
@@ -154,72 +258,80 @@ def compute_swing_features(frames, view_type="side"):
     features = {}
     for phase_name, idx in phases_idx.items():
         if idx < len(frames):
-            features[phase_name] = compute_features_frame(frames[idx], view_type)
+            features[phase_name] = compute_features_frame(_frame_points(frames, idx), view_type)
     
     return features
 
-def calculate_score(user_features, baseline_features, view_type="side"):
-    """Tính điểm tổng 100 với tolerance đã tối ưu"""
-    
-    if view_type == "side":
-        weights = {
-            "setup": {
-                "spine_tilt": (0.30, 5),
-                "lead_arm_angle": (0.25, 10),
-                "knee_flex_avg": (0.20, 12),
-                "posture_stability": (0.15, 15),       # ← TĂNG tolerance lên 15
-                "hip_rotation": (0.10, 8),
-            },
-            "top": {
-                "x_factor": (0.30, 10),
-                "shoulder_rotation": (0.25, 12),
-                "spine_tilt": (0.20, 8),
-                "lead_arm_angle": (0.15, 12),
-                "knee_flex_avg": (0.10, 15),
-            },
-            "impact": {
-                "hip_rotation": (0.30, 10),
-                "spine_tilt": (0.25, 6),
-                "lead_arm_angle": (0.20, 10),
-                "posture_stability": (0.15, 15),       # ← TĂNG tolerance lên 15
-                "x_factor": (0.10, 12),
-            },
-            "follow": {
-                "shoulder_rotation": (0.30, 15),
-                "spine_tilt": (0.25, 10),
-                "lead_arm_angle": (0.20, 15),
-                "posture_stability": (0.15, 20),       # ← TĂNG tolerance lên 20
-                "knee_flex_avg": (0.10, 18),
-            }
+# (weight, tolerance) cho từng chỉ số của từng phase, theo góc quay
+SCORE_WEIGHTS = {
+    "side": {
+        "setup": {
+            "spine_tilt": (0.30, 5),
+            "lead_arm_angle": (0.25, 10),
+            "knee_flex_avg": (0.20, 12),
+            "posture_stability": (0.15, 15),       # ← TĂNG tolerance lên 15
+            "hip_rotation": (0.10, 8),
+        },
+        "top": {
+            "x_factor": (0.30, 10),
+            "shoulder_rotation": (0.25, 12),
+            "spine_tilt": (0.20, 8),
+            "lead_arm_angle": (0.15, 12),
+            "knee_flex_avg": (0.10, 15),
+        },
+        "impact": {
+            "hip_rotation": (0.30, 10),
+            "spine_tilt": (0.25, 6),
+            "lead_arm_angle": (0.20, 10),
+            "posture_stability": (0.15, 15),       # ← TĂNG tolerance lên 15
+            "x_factor": (0.10, 12),
+        },
+        "follow": {
+            "shoulder_rotation": (0.30, 15),
+            "spine_tilt": (0.25, 10),
+            "lead_arm_angle": (0.20, 15),
+            "posture_stability": (0.15, 20),       # ← TĂNG tolerance lên 20
+            "knee_flex_avg": (0.10, 18),
         }
-    else:  # back view
-        weights = {
-            "setup": {
-                "shoulder_tilt": (0.30, 6),
-                "hip_tilt": (0.25, 6),
-                "spine_lateral_bend": (0.20, 0.08),
-                "head_stability": (0.15, 0.08),
-                "weight_shift": (0.10, 0.15),
-            },
-            "top": {
-                "shoulder_tilt": (0.35, 10),
-                "weight_shift": (0.30, 0.15),
-                "spine_lateral_bend": (0.20, 0.10),
-                "hip_tilt": (0.15, 10),
-            },
-            "impact": {
-                "shoulder_tilt": (0.30, 8),
-                "hip_tilt": (0.25, 8),
-                "weight_shift": (0.25, 0.15),
-                "head_stability": (0.20, 0.10),
-            },
-            "follow": {
-                "shoulder_tilt": (0.35, 12),
-                "spine_lateral_bend": (0.25, 0.12),
-                "weight_shift": (0.20, 0.20),
-                "head_stability": (0.20, 0.12),
-            }
+    },
+    "back": {
+        "setup": {
+            "shoulder_tilt": (0.30, 6),
+            "hip_tilt": (0.25, 6),
+            "spine_lateral_bend": (0.20, 0.08),
+            "head_stability": (0.15, 0.08),
+            "weight_shift": (0.10, 0.15),
+        },
+        "top": {
+            "shoulder_tilt": (0.35, 10),
+            "weight_shift": (0.30, 0.15),
+            "spine_lateral_bend": (0.20, 0.10),
+            "hip_tilt": (0.15, 10),
+        },
+        "impact": {
+            "shoulder_tilt": (0.30, 8),
+            "hip_tilt": (0.25, 8),
+            "weight_shift": (0.25, 0.15),
+            "head_stability": (0.20, 0.10),
+        },
+        "follow": {
+            "shoulder_tilt": (0.35, 12),
+            "spine_lateral_bend": (0.25, 0.12),
+            "weight_shift": (0.20, 0.20),
+            "head_stability": (0.20, 0.12),
         }
+    },
+}
+
+def calculate_score(user_features, baseline_features, view_type="side", attributes=None):
+    """Tính điểm tổng 100 với tolerance đã tối ưu
+
+    baseline_features có thể là strata index (baseline_strata): khi đó chọn
+    baseline của stratum khớp attributes (club, handedness, build) nhất.
+    """
+    baseline_features = baseline_strata.select_baseline(baseline_features, attributes)
+    
+    weights = SCORE_WEIGHTS["side" if view_type == "side" else "back"]
     
     total_score = 0
     detailed_scores = {}
@@ -266,3 +378,108 @@ def calculate_score(user_features, baseline_features, view_type="side"):
     
     final_score = total_score / valid_phases if valid_phases > 0 else 0
     return round(final_score, 1), detailed_scores
+
+SCORE_PHASES = ["setup", "top", "impact", "follow"]
+
+def compile_score_table(view_type="side"):
+    """Đổi SCORE_WEIGHTS của 1 góc quay thành mảng để chấm điểm batch
+
+    Trục chỉ số theo FEATURE_NAMES[view_type]. "order" giữ thứ tự chỉ số trong
+    SCORE_WEIGHTS của từng phase để cộng điểm phase đúng thứ tự như calculate_score.
+    """
+    view_type = "side" if view_type == "side" else "back"
+    phases = SCORE_PHASES
+    metrics = FEATURE_NAMES[view_type]
+    weight = np.zeros((len(phases), len(metrics)))
+    tolerance = np.full((len(phases), len(metrics)), np.nan)
+    order = []
+    
+    for p, phase in enumerate(phases):
+        cols = []
+        for metric, (w, tol) in SCORE_WEIGHTS[view_type][phase].items():
+            m = metrics.index(metric)
+            weight[p, m] = w
+            tolerance[p, m] = tol
+            cols.append(m)
+        order.append(cols)
+    
+    return {"view": view_type, "phases": phases, "metrics": metrics,
+            "weight": weight, "tolerance": tolerance, "order": order}
+
+def features_to_tensor(features_list, view_type="side"):
+    """List các dict features (kết quả compute_swing_features) -> array (N, phases, metrics)
+
+    Phase / chỉ số không có (hoặc features None) để NaN.
+    """
+    view_type = "side" if view_type == "side" else "back"
+    metrics = FEATURE_NAMES[view_type]
+    tensor = np.full((len(features_list), len(SCORE_PHASES), len(metrics)), np.nan)
+    
+    for n, features in enumerate(features_list):
+        if not features:
+            continue
+        for p, phase in enumerate(SCORE_PHASES):
+            values = features.get(phase)
+            if not values:
+                continue
+            for m, metric in enumerate(metrics):
+                if metric in values:
+                    tensor[n, p, m] = values[metric]
+    
+    return tensor
+
+def calculate_scores_batch(user_tensor, baseline, view_type="side", table=None):
+    """Chấm điểm N swing với cùng 1 baseline trong 1 lần tính vector
+
+    user_tensor: array (N, phases, metrics) từ features_to_tensor.
+    baseline: dict features baseline hoặc array (phases, metrics).
+    Trả về (total (N,), metric_scores (N, phases, metrics), phase_scores (N, phases)),
+    NaN ở chỗ không chấm. Công thức và thứ tự cộng giống calculate_score, nên
+    round(x, 1) của các giá trị này bằng đúng kết quả của calculate_score.
+    """
+    if table is None:
+        table = compile_score_table(view_type)
+    if isinstance(baseline, dict):
+        baseline = features_to_tensor([baseline], table["view"])[0]
+    
+    user = np.asarray(user_tensor, dtype=np.float64)
+    base = np.asarray(baseline, dtype=np.float64)
+    tol = table["tolerance"]
+    
+    # Công thức gradient như calculate_score, tính cho mọi (swing, phase, chỉ số)
+    diff = np.abs(user - base)
+    with np.errstate(invalid="ignore"):
+        metric_scores = np.select(
+            [diff <= tol, diff <= tol * 2, diff <= tol * 3],
+            [100.0,
+             100 - (diff - tol) / tol * 30,
+             70 - (diff - tol * 2) / tol * 30],
+            np.maximum(0, 40 - (diff - tol * 3) / tol * 10),
+        )
+    metric_scores = np.clip(metric_scores, 0, 100)
+    
+    scored = ~np.isnan(user) & ~np.isnan(base) & ~np.isnan(tol)
+    metric_scores = np.where(scored, metric_scores, np.nan)
+    
+    # Phase có mặt khi user có phase đó và baseline cũng có
+    user_phase = ~np.all(np.isnan(user), axis=2)
+    base_phase = ~np.all(np.isnan(base), axis=1)
+    phase_valid = user_phase & base_phase
+    
+    n = len(user)
+    phase_scores = np.full((n, len(table["phases"])), np.nan)
+    total = np.zeros(n)
+    valid_phases = np.zeros(n)
+    for p, cols in enumerate(table["order"]):
+        # Cộng lần lượt theo thứ tự chỉ số như vòng lặp của calculate_score
+        phase_score = np.zeros(n)
+        for m in cols:
+            phase_score = phase_score + np.where(scored[:, p, m], metric_scores[:, p, m] * table["weight"][p, m], 0)
+        phase_scores[:, p] = np.where(phase_valid[:, p], phase_score, np.nan)
+        total = total + np.where(phase_valid[:, p], phase_score, 0)
+        valid_phases += phase_valid[:, p]
+    
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = np.where(valid_phases > 0, total / valid_phases, 0.0)
+    
+    return total, metric_scores, phase_scores
@@ -2,32 +2,208 @@ import cv2
 import mediapipe as mp
 import json
 import os
+import io
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from tqdm import tqdm
+import landmark_cache
+import landmark_io
+import pose_roi
+import pose_stream
 
 mp_pose = mp.solutions.pose
 
-def extract_landmarks(video_path, visualize=False):
-    """Extract landmarks với option visualize để kiểm tra"""
+# Tăng confidence để detection chính xác hơn
+POSE_SETTINGS = {
+    "model_complexity": 2,  # Dùng model phức tạp nhất
+    "min_detection_confidence": 0.7,
+    "min_tracking_confidence": 0.7,
+}
+
+# Pass 1 của chế độ two-pass: model nhẹ chỉ để tìm vùng swing
+COARSE_POSE_SETTINGS = {
+    "model_complexity": 0,
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5,
+}
+
+TWO_PASS_SETTINGS = {
+    "stride": 2,           # Chỉ chạy model nhẹ trên 1/stride frame
+    "margin_sec": 0.5,     # Lấy thêm trước/sau vùng swing
+    "motion_ratio": 0.15,  # Ngưỡng chuyển động = ratio * tốc độ cổ tay lớn nhất
+    "max_gap_sec": 0.3,    # Khoảng lặng ngắn vẫn tính là cùng một swing
+}
+
+# Pose model riêng của mỗi worker process (giữ warm qua nhiều video)
+_worker_pose = None
+_worker_coarse_pose = None
+
+
+def create_pose(settings=None):
+    """Tạo MediaPipe Pose với settings chuẩn của batch extractor"""
+    return mp_pose.Pose(**(settings or POSE_SETTINGS))
+
+
+def find_swing_window(video_path, pose=None, stride=None, margin_sec=None, motion_ratio=None,
+                      max_gap_sec=None):
+    """Pass nhẹ: tìm (start_frame, end_frame) của swing từ chuyển động cổ tay/hông
+
+    Chạy model_complexity=0 trên mỗi `stride` frame, lấy đoạn chuyển động liên tục
+    chứa tốc độ cổ tay lớn nhất (downswing) rồi nới thêm margin. Trả về None nếu
+    không xác định được (khi đó nên chạy trên cả video).
+    """
+    stride = stride or TWO_PASS_SETTINGS["stride"]
+    margin_sec = TWO_PASS_SETTINGS["margin_sec"] if margin_sec is None else margin_sec
+    motion_ratio = TWO_PASS_SETTINGS["motion_ratio"] if motion_ratio is None else motion_ratio
+    max_gap_sec = TWO_PASS_SETTINGS["max_gap_sec"] if max_gap_sec is None else max_gap_sec
+    
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    
+    owns_pose = pose is None
+    if owns_pose:
+        pose = create_pose(COARSE_POSE_SETTINGS)
+    else:
+        pose.reset()
+    
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    sample_idx = []
+    positions = []
+    frame_idx = 0
+    
+    while True:
+        # grab() không convert frame, rẻ hơn read() cho các frame bị bỏ qua
+        if not cap.grab():
+            break
+        
+        if frame_idx % stride == 0:
+            ok, frame = cap.retrieve()
+            if not ok:
+                break
+            res = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            if res.pose_landmarks:
+                lms = res.pose_landmarks.landmark
+                positions.append([
+                    (lms[15].x + lms[16].x) / 2, (lms[15].y + lms[16].y) / 2,
+                    (lms[23].x + lms[24].x) / 2, (lms[23].y + lms[24].y) / 2,
+                ])
+                sample_idx.append(frame_idx)
+        
+        frame_idx += 1
+    
+    cap.release()
+    if owns_pose:
+        pose.close()
+    
+    if len(sample_idx) < 10:
+        return None
+    
+    sample_idx = np.array(sample_idx)
+    positions = np.array(positions)
+    
+    # Tốc độ cổ tay + hông (đơn vị normalized / frame)
+    step = np.diff(positions, axis=0)
+    speed = (np.hypot(step[:, 0], step[:, 1]) + np.hypot(step[:, 2], step[:, 3])) / np.diff(sample_idx)
+    speed = np.convolve(speed, np.ones(3)/3, mode='same')
+    
+    active = speed >= speed.max() * motion_ratio
+    peak = int(np.argmax(speed))
+    
+    # Mở rộng từ đỉnh ra 2 phía, bỏ qua khoảng lặng ngắn hơn max_gap
+    max_gap = max(1, int(max_gap_sec * fps / stride))
+    lo = hi = peak
+    gap = 0
+    for i in range(peak - 1, -1, -1):
+        gap = 0 if active[i] else gap + 1
+        if gap > max_gap:
+            break
+        if active[i]:
+            lo = i
+    gap = 0
+    for i in range(peak + 1, len(active)):
+        gap = 0 if active[i] else gap + 1
+        if gap > max_gap:
+            break
+        if active[i]:
+            hi = i
+    
+    margin = int(margin_sec * fps)
+    start = max(0, int(sample_idx[lo]) - margin)
+    end = min(frame_idx - 1, int(sample_idx[hi + 1]) + margin)
+    return start, end
+
+
+def extract_landmarks(video_path, visualize=False, pose=None, show_progress=True, use_cache=True,
+                      return_meta=False, two_pass=False, coarse_pose=None, motion_threshold=None,
+                      roi=False, roi_max_side=None, stop_after_follow=False):
+    """Extract landmarks với option visualize để kiểm tra
+
+    Nếu truyền `pose` thì dùng lại model đó (được reset trước khi chạy),
+    ngược lại tạo model mới và đóng sau khi xong.
+    use_cache: dùng lại landmarks đã extract của video giống hệt (bỏ qua khi visualize).
+    return_meta: trả về (frames, meta) với meta gồm fps, frame_indices, visibility.
+    two_pass: chạy model nhẹ tìm vùng swing trước (find_swing_window), model nặng
+        chỉ chạy trên vùng đó. coarse_pose: model nhẹ dùng lại (nếu có).
+    motion_threshold: bật motion gate - frame gần như giống frame đã inference gần
+        nhất (chênh lệch < ngưỡng, thang 0-255) dùng lại landmarks cũ thay vì chạy pose.
+    roi: chỉ chạy pose trên vùng quanh golfer (bbox landmarks frame trước + padding),
+        roi_max_side: thu nhỏ crop về cạnh dài tối đa (px). Mất tracking -> full frame.
+    stop_after_follow: dừng decode ngay khi xác nhận được follow-through.
+    Việc xử lý từng frame dùng pose_stream.iter_landmarks (streaming).
+    """
+    use_cache = use_cache and not visualize
+    if use_cache:
+        cache_settings = POSE_SETTINGS
+        if two_pass:
+            cache_settings = dict(POSE_SETTINGS, coarse=COARSE_POSE_SETTINGS, two_pass=TWO_PASS_SETTINGS)
+        if motion_threshold:
+            cache_settings = dict(cache_settings, motion_threshold=motion_threshold)
+        if roi:
+            cache_settings = dict(cache_settings, roi=pose_roi.ROI_PADDING, roi_max_side=roi_max_side)
+        if stop_after_follow:
+            cache_settings = dict(cache_settings, stop_after_follow=pose_stream.FOLLOW_SETTINGS)
+        cache_key = landmark_cache.video_key(video_path, cache_settings)
+        cached = landmark_cache.load_cached(cache_key)
+        if cached is not None:
+            frames, meta = cached
+            print(f"   ⚡ Loaded {len(frames)} frames from landmark cache")
+            return (frames, meta) if return_meta else frames
+    
     cap = cv2.VideoCapture(video_path)
     
     if not cap.isOpened():
         print(f"❌ Cannot open video: {video_path}")
         return None
     
-    # Tăng confidence để detection chính xác hơn
-    pose = mp_pose.Pose(
-        model_complexity=2,  # Dùng model phức tạp nhất
-        min_detection_confidence=0.7,
-        min_tracking_confidence=0.7
-    )
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    start_frame, end_frame = 0, None
+    if two_pass:
+        window = find_swing_window(video_path, pose=coarse_pose)
+        if window is not None:
+            start_frame, end_frame = window
+            total_frames = end_frame - start_frame + 1
+            print(f"   🎯 Swing window: frames {start_frame}-{end_frame}")
+        else:
+            print(f"   ⚠️  Swing window not found, using full video")
+    
+    owns_pose = pose is None
+    if owns_pose:
+        pose = create_pose()
+    else:
+        # Xóa tracking state của video trước
+        pose.reset()
 
     frames = []
-    frame_count = 0
-    detected_count = 0
+    frame_indices = []
+    visibility = []
+    stats = {}
     
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    video_fps = cap.get(cv2.CAP_PROP_FPS)
     
     # Setup video writer nếu visualize
+    out = None
     if visualize:
         fps = int(cap.get(cv2.CAP_PROP_FPS))
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
@@ -37,57 +213,192 @@ def extract_landmarks(video_path, visualize=False):
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
 
-    pbar = tqdm(total=total_frames, desc="Extracting frames")
+    pbar = tqdm(total=total_frames, desc="Extracting frames", disable=not show_progress)
+    follow_done = pose_stream.make_follow_through_check(video_fps) if stop_after_follow else None
+    stopped_at = None
     
-    while True:
-        ok, frame = cap.read()
-        if not ok:
-            break
-        
-        frame_count += 1
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        res = pose.process(rgb)
-
-        if res.pose_landmarks:
-            detected_count += 1
-            pts = []
-            for lm in res.pose_landmarks.landmark:
-                pts.append([lm.x, lm.y, lm.z])
-            frames.append(pts)
+    stream = pose_stream.iter_landmarks(
+        cap, pose,
+        start_frame=start_frame,
+        end_frame=end_frame,
+        motion_threshold=motion_threshold,
+        roi=roi,
+        roi_max_side=roi_max_side,
+        writer=out,
+        with_visibility=True,
+        stats=stats,
+    )
+    with contextlib.closing(stream):
+        for idx, _, landmarks in stream:
+            if landmarks is not None:
+                frames.append([lm[:3] for lm in landmarks])
+                visibility.append([lm[3] for lm in landmarks])
+                frame_indices.append(idx)
             
-            # Visualize nếu cần
-            if visualize:
-                mp.solutions.drawing_utils.draw_landmarks(
-                    frame,
-                    res.pose_landmarks,
-                    mp_pose.POSE_CONNECTIONS,
-                    mp.solutions.drawing_styles.get_default_pose_landmarks_style()
-                )
-        
-        if visualize:
-            out.write(frame)
-        
-        pbar.update(1)
+            pbar.update(1)
+            
+            if follow_done is not None and follow_done(landmarks):
+                stopped_at = idx
+                break
 
     pbar.close()
     cap.release()
+    if owns_pose:
+        pose.close()
     
     if visualize:
         out.release()
         print(f"   📹 Saved visualization: {output_path}")
     
+    frame_count = stats["frames"]
+    detected_count = stats["detected"]
     detection_rate = (detected_count / frame_count * 100) if frame_count > 0 else 0
     print(f"   📊 Detection rate: {detection_rate:.1f}% ({detected_count}/{frame_count} frames)")
+    if stopped_at is not None:
+        print(f"   🏁 Follow-through confirmed at frame {stopped_at}, stopped decoding")
+    if motion_threshold:
+        print(f"   ⏭️  Motion gate skipped inference on {stats['skipped']}/{frame_count} frames")
+    if roi:
+        inferred = stats["crop_frames"] + stats["full_frames"]
+        print(f"   ✂️  ROI crop: {stats['crop_frames']}/{inferred} inferences cropped, "
+              f"{stats['fallbacks']} fallbacks to full frame, {stats['resets']} tracking resets")
+        if stats["crop_frames"] and stats["full_frames"]:
+            crop_ms = stats["crop_time"] / stats["crop_frames"] * 1000
+            full_ms = stats["full_time"] / stats["full_frames"] * 1000
+            print(f"   ⏱️  Inference: {full_ms:.1f} ms/frame full vs {crop_ms:.1f} ms/frame ROI "
+                  f"(~{full_ms / crop_ms:.1f}x speedup)")
     
     # Cảnh báo nếu detection rate thấp
     if detection_rate < 70:
         print(f"   ⚠️  Low detection rate! Video quality might be poor.")
     
-    return frames
+    meta = {
+        "fps": video_fps,
+        "frame_indices": frame_indices,
+        "visibility": visibility,
+    }
+    
+    if use_cache and frames:
+        landmark_cache.save_cached(cache_key, frames, meta)
+    
+    return (frames, meta) if return_meta else frames
+
+
+def _process_video(video_path, output_folder, visualize=False, pose=None, show_progress=True,
+                   output_format="npz", **extract_options):
+    """Extract 1 video và lưu landmarks (.npz hoặc .json), trả về dict kết quả cho summary
+
+    "cached": True/False nếu video đã tra landmark cache (hit/miss), không có key
+    nếu cache không được dùng (tắt cache, visualize, lỗi trước khi tra).
+    """
+    file = os.path.basename(video_path)
+    stats_before = dict(landmark_cache.cache_stats)
+    
+    def cache_result():
+        hits = landmark_cache.cache_stats["hits"] - stats_before["hits"]
+        misses = landmark_cache.cache_stats["misses"] - stats_before["misses"]
+        return {"cached": hits > 0} if hits or misses else {}
+    
+    try:
+        extracted = extract_landmarks(video_path, visualize=visualize, pose=pose,
+                                      show_progress=show_progress, return_meta=True,
+                                      **extract_options)
+        data, meta = extracted if extracted is not None else (None, None)
+        
+        if data is None or len(data) == 0:
+            print(f"   ❌ Failed to extract landmarks")
+            return {
+                "file": file,
+                "status": "failed",
+                "frames": 0,
+                **cache_result()
+            }
+        
+        if output_format == "json":
+            # Save JSON (format cũ)
+            output_name = os.path.splitext(file)[0] + ".json"
+            output_path = os.path.join(output_folder, output_name)
+            
+            with open(output_path, "w") as f:
+                json.dump(data, f)
+        else:
+            # Save .npz float32 (frames, 33, 3) + metadata
+            output_name = os.path.splitext(file)[0] + landmark_io.LANDMARK_EXT
+            output_path = os.path.join(output_folder, output_name)
+            
+            landmark_io.save_landmarks(output_path, data, **meta)
+        
+        print(f"   ✅ Saved {len(data)} frames to: {output_name}")
+        
+        return {
+            "file": file,
+            "status": "success",
+            "frames": len(data),
+            **cache_result()
+        }
+        
+    except Exception as e:
+        print(f"   ❌ Error: {str(e)}")
+        return {
+            "file": file,
+            "status": "error",
+            "frames": 0,
+            "error": str(e),
+            **cache_result()
+        }
+
+
+def _init_worker():
+    """Khởi tạo Pose model một lần cho mỗi worker process"""
+    global _worker_pose
+    _worker_pose = create_pose()
+
+
+def _process_video_worker(video_path, output_folder, visualize=False, output_format="npz",
+                          extract_options=None):
+    """Chạy _process_video trong worker, gom log để in lại theo thứ tự"""
+    global _worker_coarse_pose
+    extract_options = dict(extract_options or {})
+    if extract_options.get("two_pass"):
+        if _worker_coarse_pose is None:
+            _worker_coarse_pose = create_pose(COARSE_POSE_SETTINGS)
+        extract_options["coarse_pose"] = _worker_coarse_pose
+    
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        result = _process_video(video_path, output_folder, visualize=visualize,
+                                pose=_worker_pose, show_progress=False,
+                                output_format=output_format, **extract_options)
+    return result, log.getvalue()
+
+
+def _list_videos(folder):
+    return [f for f in os.listdir(folder)
+            if f.lower().endswith((".mp4", ".mov", ".avi"))]
+
+
+def _submit_folder(executor, folder, output_folder=None, visualize=False, output_format="npz",
+                   **extract_options):
+    """Đẩy tất cả video trong folder vào pool, trả về list futures theo thứ tự file"""
+    if output_folder is None:
+        output_folder = folder
+    os.makedirs(output_folder, exist_ok=True)
+    
+    return [executor.submit(_process_video_worker, os.path.join(folder, f),
+                            output_folder, visualize, output_format, extract_options)
+            for f in _list_videos(folder)]
+
 
+def process_folder(folder, output_folder=None, visualize=False, workers=1, futures=None,
+                   output_format="npz", **extract_options):
+    """Process tất cả video trong folder
 
-def process_folder(folder, output_folder=None, visualize=False):
-    """Process tất cả video trong folder"""
+    output_format: "npz" (float32, memory-map được) hoặc "json" (list-of-lists cũ).
+    extract_options: truyền thẳng vào extract_landmarks (vd two_pass=True).
+    workers > 1: chạy song song trên process pool, mỗi worker giữ một Pose model.
+    futures: kết quả đã submit sẵn từ _submit_folder (dùng chung pool giữa các folder).
+    Log và summary in ra giống hệt chế độ tuần tự.
+    """
     
     if output_folder is None:
         output_folder = folder
@@ -95,60 +406,53 @@ def process_folder(folder, output_folder=None, visualize=False):
     # Tạo folder output nếu chưa có
     os.makedirs(output_folder, exist_ok=True)
     
-    video_files = [f for f in os.listdir(folder) 
-                   if f.lower().endswith((".mp4", ".mov", ".avi"))]
+    video_files = _list_videos(folder)
     
     if not video_files:
         print(f"⚠️  No video files found in {folder}")
         return
     
+    executor = None
+    if futures is None and workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        futures = _submit_folder(executor, folder, output_folder, visualize, output_format,
+                                 **extract_options)
+    
     print(f"\n{'='*60}")
     print(f"Found {len(video_files)} videos in {folder}")
     print(f"{'='*60}\n")
     
     results = []
     
-    for i, file in enumerate(video_files, 1):
-        print(f"\n[{i}/{len(video_files)}] Processing: {file}")
-        print("-" * 60)
-        
-        video_path = os.path.join(folder, file)
-        
-        try:
-            data = extract_landmarks(video_path, visualize=visualize)
-            
-            if data is None or len(data) == 0:
-                print(f"   ❌ Failed to extract landmarks")
-                results.append({
-                    "file": file,
-                    "status": "failed",
-                    "frames": 0
-                })
-                continue
-            
-            # Save JSON
-            output_name = os.path.splitext(file)[0] + ".json"
-            output_path = os.path.join(output_folder, output_name)
-            
-            with open(output_path, "w") as f:
-                json.dump(data, f)
-            
-            print(f"   ✅ Saved {len(data)} frames to: {output_name}")
+    try:
+        for i, file in enumerate(video_files, 1):
+            print(f"\n[{i}/{len(video_files)}] Processing: {file}")
+            print("-" * 60)
             
-            results.append({
-                "file": file,
-                "status": "success",
-                "frames": len(data)
-            })
+            if futures is not None:
+                # Worker chết (vd hết RAM) -> BrokenProcessPool cho file này và các
+                # file còn lại: ghi nhận lỗi như chế độ tuần tự thay vì dừng cả folder
+                try:
+                    result, log = futures[i - 1].result()
+                except Exception as e:
+                    print(f"   ❌ Error: {str(e)}")
+                    result = {
+                        "file": file,
+                        "status": "error",
+                        "frames": 0,
+                        "error": str(e)
+                    }
+                else:
+                    print(log, end="")
+            else:
+                result = _process_video(os.path.join(folder, file), output_folder,
+                                        visualize=visualize, output_format=output_format,
+                                        **extract_options)
             
-        except Exception as e:
-            print(f"   ❌ Error: {str(e)}")
-            results.append({
-                "file": file,
-                "status": "error",
-                "frames": 0,
-                "error": str(e)
-            })
+            results.append(result)
+    finally:
+        if executor is not None:
+            executor.shutdown()
     
     # Print summary
     print(f"\n{'='*60}")
@@ -158,10 +462,15 @@ def process_folder(folder, output_folder=None, visualize=False):
     success = sum(1 for r in results if r["status"] == "success")
     failed = len(results) - success
     total_frames = sum(r["frames"] for r in results)
+    # Chỉ đếm video đã thực sự tra cache (future lỗi / cache tắt không tính là miss)
+    cache_hits = sum(1 for r in results if r.get("cached") is True)
+    cache_misses = sum(1 for r in results if r.get("cached") is False)
     
     print(f"✅ Success: {success}/{len(results)}")
     print(f"❌ Failed: {failed}/{len(results)}")
     print(f"📊 Total frames extracted: {total_frames}")
+    if cache_hits or cache_misses:
+        print(f"⚡ Landmark cache: {cache_hits} hits, {cache_misses} misses")
     
     if failed > 0:
         print(f"\n⚠️  Failed videos:")
@@ -170,8 +479,12 @@ def process_folder(folder, output_folder=None, visualize=False):
                 print(f"   - {r['file']}: {r.get('error', 'Unknown error')}")
 
 
-def batch_process_with_structure(base_folder, visualize=False):
-    """Process theo cấu trúc folder sideview/backview"""
+def batch_process_with_structure(base_folder, visualize=False, workers=1, output_format="npz",
+                                 **extract_options):
+    """Process theo cấu trúc folder sideview/backview
+
+    workers > 1: sideview và backview dùng chung một process pool.
+    """
     
     side_folder = os.path.join(base_folder, "sideview")
     back_folder = os.path.join(base_folder, "backview")
@@ -179,19 +492,37 @@ def batch_process_with_structure(base_folder, visualize=False):
     print("🏌️ GOLF SWING POSE EXTRACTION")
     print("="*60)
     
-    # Process sideview
-    if os.path.exists(side_folder):
-        print(f"\n📂 Processing SIDEVIEW folder...")
-        process_folder(side_folder, visualize=visualize)
-    else:
-        print(f"\n⚠️  Sideview folder not found: {side_folder}")
+    executor = None
+    side_futures = back_futures = None
+    if workers > 1:
+        # Submit cả 2 folder trước để pool không phải chờ hết sideview
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        if os.path.exists(side_folder):
+            side_futures = _submit_folder(executor, side_folder, visualize=visualize,
+                                          output_format=output_format, **extract_options)
+        if os.path.exists(back_folder):
+            back_futures = _submit_folder(executor, back_folder, visualize=visualize,
+                                          output_format=output_format, **extract_options)
     
-    # Process backview
-    if os.path.exists(back_folder):
-        print(f"\n📂 Processing BACKVIEW folder...")
-        process_folder(back_folder, visualize=visualize)
-    else:
-        print(f"\n⚠️  Backview folder not found: {back_folder}")
+    try:
+        # Process sideview
+        if os.path.exists(side_folder):
+            print(f"\n📂 Processing SIDEVIEW folder...")
+            process_folder(side_folder, visualize=visualize, futures=side_futures,
+                           output_format=output_format, **extract_options)
+        else:
+            print(f"\n⚠️  Sideview folder not found: {side_folder}")
+        
+        # Process backview
+        if os.path.exists(back_folder):
+            print(f"\n📂 Processing BACKVIEW folder...")
+            process_folder(back_folder, visualize=visualize, futures=back_futures,
+                           output_format=output_format, **extract_options)
+        else:
+            print(f"\n⚠️  Backview folder not found: {back_folder}")
+    finally:
+        if executor is not None:
+            executor.shutdown()
     
     print(f"\n{'='*60}")
     print("🎉 EXTRACTION COMPLETE!")
@@ -207,8 +538,21 @@ if __name__ == "__main__":
     # Set visualize=False để chạy nhanh hơn
     visualize = False
     
+    # Số process chạy song song (1 = tuần tự như cũ)
+    workers = max(1, (os.cpu_count() or 1) // 2)
+    
+    # two_pass=True: model nhẹ tìm vùng swing, model nặng chỉ chạy trên vùng đó
+    two_pass = False
+    
+    # Bỏ qua inference cho frame tĩnh (None = tắt), vd motion_gate.DEFAULT_MOTION_THRESHOLD
+    motion_threshold = None
+    
+    # roi=True: crop quanh golfer theo landmarks frame trước (nhanh hơn với video 1080p/4K)
+    roi = False
+    
     # Nếu muốn process từng folder riêng
     # process_folder(r"path/to/your/folder", visualize=False)
     
     # Hoặc process theo cấu trúc
-    batch_process_with_structure(base_path, visualize=visualize)
\ No newline at end of file
+    batch_process_with_structure(base_path, visualize=visualize, workers=workers, two_pass=two_pass,
+                                 motion_threshold=motion_threshold, roi=roi)
\ No newline at end of file
@@ -1,89 +1,119 @@
+import array
+import bisect
+import hashlib
+import itertools
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from compute_features import compute_swing_features
+from compute_features import FEATURE_NAMES, SCORE_WEIGHTS, compute_swing_features
+from online_phases import PHASES
+import baseline_strata
+import landmark_io
 
-def generate_baseline(folder, output_file, view_type="side"):
-    """Generate baseline với outlier removal"""
-    data_list = []
+# Bootstrap khoảng tin cậy cho từng giá trị baseline (ghi ra <baseline>.ci.json)
+BOOTSTRAP_SETTINGS = {
+    "samples": 2000,       # Số lần resample các swing
+    "confidence": 0.95,
+    "seed": 0,             # Cố định để file CI không đổi giữa các lần chạy
+    "max_cells": 4_000_000,  # Số phần tử tối đa của 1 khối (samples x swings) trong RAM
+    "unstable_ratio": 1.0, # validate: CI rộng hơn unstable_ratio * tolerance -> không ổn định
+}
+
+def _list_pose_files(folder):
+    """Lấy các file pose (.npz hoặc .json cũ), bỏ .json nếu đã có bản .npz cùng tên"""
+    files = sorted(os.listdir(folder))
+    npz_stems = {os.path.splitext(f)[0] for f in files if f.endswith(landmark_io.LANDMARK_EXT)}
+    return [f for f in files
+            if f.endswith(landmark_io.LANDMARK_EXT)
+            or (landmark_io.is_landmark_json(f) and os.path.splitext(f)[0] not in npz_stems)]
+
+
+def _file_features(filepath, view_type="side"):
+    """Đọc 1 file pose và tính features, trả về (features, tỉ lệ chi, số frame, lỗi)
+
+    Chạy được trong process con: chỉ trả về features (nhỏ), landmarks không
+    rời khỏi process đọc file.
+    """
+    try:
+        if filepath.endswith(landmark_io.LANDMARK_EXT):
+            frames, _ = landmark_io.load_landmarks(filepath)
+        else:
+            with open(filepath, 'r') as file:
+                frames = json.load(file)
+        
+        # Compute features với view type
+        features = compute_swing_features(frames, view_type)
+        return features, baseline_strata.limb_ratios(frames), len(frames), None
+    except Exception as e:
+        return None, None, 0, str(e)
+
+
+def _new_columns():
+    """Bộ gom features dạng cột: mỗi (phase, metric) 1 mảng float64 theo thứ tự file
+
+    rows[(phase, metric)] là số thứ tự file của từng giá trị, để tách cột theo stratum.
+    """
+    return {"count": 0, "phases": set(), "metrics": {}, "values": {}, "rows": {}}
+
+
+def _add_features(columns, feat):
+    """Thêm features của 1 file vào các cột
+
+    Thứ tự key trong file baseline do _ordered quyết định, không theo các set này.
+    """
+    row = columns["count"]
+    columns["count"] += 1
+    columns["phases"].update(feat.keys())
+    for phase, values in feat.items():
+        columns["metrics"].setdefault(phase, set()).update(values.keys())
+        for metric, value in values.items():
+            columns["values"].setdefault((phase, metric), array.array("d")).append(value)
+            columns["rows"].setdefault((phase, metric), array.array("i")).append(row)
+
+
+def _iqr_filter(values):
+    """Bỏ outliers bằng IQR (1.5 * IQR ngoài Q1/Q3), lọc hết thì giữ nguyên"""
+    q1 = np.percentile(values, 25)
+    q3 = np.percentile(values, 75)
+    iqr = q3 - q1
     
-    print(f"\n{'='*50}")
-    print(f"Generating baseline for {view_type.upper()} view")
-    print(f"{'='*50}\n")
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
+    
+    # Lọc values
+    filtered_values = values[(values >= lower_bound) & (values <= upper_bound)]
+    
+    if len(filtered_values) == 0:
+        filtered_values = values  # Nếu lọc hết thì giữ nguyên
+    return filtered_values
 
-    # Load tất cả json pose files
-    for f in os.listdir(folder):
-        if f.endswith(".json"):
-            filepath = os.path.join(folder, f)
-            print(f"📂 Reading: {f}")
-            
-            try:
-                with open(filepath, 'r') as file:
-                    frames = json.load(file)
-                
-                # Compute features với view type
-                feat = compute_swing_features(frames, view_type)
-                
-                if feat is not None:
-                    data_list.append(feat)
-                    print(f"   ✅ Extracted {len(frames)} frames")
-                else:
-                    print(f"   ⚠️  Could not extract features (too short)")
-                    
-            except Exception as e:
-                print(f"   ❌ Error: {str(e)}")
-
-    if not data_list:
-        print("\n❌ No valid data found!")
-        return
 
-    print(f"\n✅ Successfully processed {len(data_list)} videos")
-    print(f"\nCalculating baseline with outlier removal...\n")
+def _ordered(names, order):
+    """Sắp key theo thứ tự chuẩn `order`, key lạ xếp sau theo tên
 
-    # Tính baseline với median (robust hơn mean)
+    Thứ tự key của file baseline không phụ thuộc thứ tự duyệt set / file, nên
+    generate_baseline và update_baseline cho ra file giống nhau từng byte.
+    """
+    rank = {name: i for i, name in enumerate(order)}
+    return sorted(names, key=lambda name: (rank.get(name, len(rank)), name))
+
+
+def _baseline_from_columns(columns, view_type="side"):
+    """IQR filter + median cho từng cột, trả về dict baseline (phase / chỉ số theo thứ tự chuẩn)"""
     baseline = {}
     
-    # Lấy tất cả phases
-    all_phases = set()
-    for data in data_list:
-        all_phases.update(data.keys())
-    
-    for phase in all_phases:
+    for phase in _ordered(columns["phases"], PHASES):
         baseline[phase] = {}
         
-        # Lấy tất cả features trong phase này
-        phase_data = [d[phase] for d in data_list if phase in d]
-        
-        if not phase_data:
-            continue
-        
-        # Lấy tất cả metrics
-        all_metrics = set()
-        for pd in phase_data:
-            all_metrics.update(pd.keys())
-        
-        for metric in all_metrics:
-            # Lấy tất cả giá trị của metric này
-            values = [pd[metric] for pd in phase_data if metric in pd]
+        for metric in _ordered(columns["metrics"].get(phase, ()), FEATURE_NAMES.get(view_type, ())):
+            values = np.frombuffer(columns["values"][(phase, metric)], dtype=np.float64)
             
-            if not values:
+            if not len(values):
                 continue
             
-            values = np.array(values)
-            
             # Loại bỏ outliers bằng IQR method
-            q1 = np.percentile(values, 25)
-            q3 = np.percentile(values, 75)
-            iqr = q3 - q1
-            
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            
-            # Lọc values
-            filtered_values = values[(values >= lower_bound) & (values <= upper_bound)]
-            
-            if len(filtered_values) == 0:
-                filtered_values = values  # Nếu lọc hết thì giữ nguyên
+            filtered_values = _iqr_filter(values)
             
             # Dùng median thay vì mean (robust hơn)
             baseline[phase][metric] = float(np.median(filtered_values))
@@ -93,6 +123,229 @@ def generate_baseline(folder, output_file, view_type="side"):
             print(f"    Median: {np.median(values):.2f}°")
             print(f"    Baseline (filtered): {baseline[phase][metric]:.2f}°")
             print(f"    Removed {len(values) - len(filtered_values)} outliers")
+    
+    return baseline
+
+
+def _build_strata(columns, file_attrs, file_ratios, baseline, view_type="side"):
+    """Baseline cho mọi stratum trong 1 lần duyệt các cột đã gom
+
+    file_attrs / file_ratios theo số thứ tự file trong columns. Mỗi file góp
+    vào mọi tổ hợp thuộc tính của nó; stratum dưới min_count swing bị bỏ
+    (lúc chấm điểm sẽ fallback). Thứ tự key giống baseline chung.
+    """
+    centers = baseline_strata.fit_build_centers(file_ratios)
+    groups = {}
+    for row, (attrs, ratios) in enumerate(zip(file_attrs, file_ratios)):
+        attrs = dict(attrs, build=baseline_strata.build_cluster(ratios, centers))
+        present = [a for a in baseline_strata.STRATA_ATTRIBUTES if attrs.get(a) is not None]
+        for r in range(1, len(present) + 1):
+            for combo in itertools.combinations(present, r):
+                key = baseline_strata.stratum_key({a: attrs[a] for a in combo})
+                groups.setdefault(key, []).append(row)
+
+    min_count = baseline_strata.STRATA_SETTINGS["min_count"]
+    strata = {"": {"count": columns["count"], "baseline": baseline}}
+    skipped = 0
+    for key in sorted(groups):
+        members = groups[key]
+        if len(members) < min_count:
+            skipped += 1
+            continue
+        
+        in_stratum = np.zeros(columns["count"], dtype=bool)
+        in_stratum[members] = True
+        stratum = {}
+        for phase, metrics in baseline.items():
+            stratum[phase] = {}
+            for metric in metrics:
+                values = np.frombuffer(columns["values"][(phase, metric)], dtype=np.float64)
+                rows = np.frombuffer(columns["rows"][(phase, metric)], dtype=np.int32)
+                values = values[in_stratum[rows]]
+                if len(values):
+                    stratum[phase][metric] = float(np.median(_iqr_filter(values)))
+        strata[key] = {"count": len(members), "baseline": stratum}
+
+    print(f"📚 {len(strata) - 1} strata (skipped {skipped} with < {min_count} swings)")
+    return {
+        "view": view_type,
+        "attributes": baseline_strata.STRATA_ATTRIBUTES,
+        "min_count": min_count,
+        "build_centers": centers,
+        "strata": strata,
+    }
+
+
+def _bootstrap_medians(values, samples, rng, max_cells):
+    """Median sau IQR filter của `samples` lần resample, vector hoá theo khối
+
+    Mỗi hàng là 1 lần resample đã sort: Q1/Q3 nội suy tuyến tính như
+    np.percentile, phần giữ lại sau lọc là 1 đoạn liên tục [start, stop) của
+    hàng nên median lấy thẳng bằng index, không có vòng lặp theo resample.
+    """
+    n = len(values)
+    pos = (n - 1) * np.array([0.25, 0.75])
+    below = np.floor(pos).astype(np.int64)
+    above = np.minimum(below + 1, n - 1)
+    frac = pos - below
+    
+    medians = np.empty(samples)
+    block = max(1, int(max_cells // n))
+    for begin in range(0, samples, block):
+        rows = min(block, samples - begin)
+        sample = np.sort(values[rng.integers(0, n, size=(rows, n))], axis=1)
+        
+        q1, q3 = (sample[:, below] * (1 - frac) + sample[:, above] * frac).T
+        iqr = q3 - q1
+        start = (sample < (q1 - 1.5 * iqr)[:, None]).sum(axis=1)
+        stop = (sample <= (q3 + 1.5 * iqr)[:, None]).sum(axis=1)
+        
+        # Lọc hết thì giữ nguyên cả hàng (giống _iqr_filter)
+        empty = stop <= start
+        start = np.where(empty, 0, start)
+        stop = np.where(empty, n, stop)
+        
+        count = stop - start
+        r = np.arange(rows)
+        medians[begin:begin + rows] = (sample[r, start + (count - 1) // 2] + sample[r, start + count // 2]) / 2
+    
+    return medians
+
+
+def bootstrap_baseline(columns, baseline, view_type="side", samples=None, **settings):
+    """Khoảng tin cậy bootstrap cho từng giá trị baseline
+
+    columns: {(phase, metric): array giá trị của các swing}. Mỗi chỉ số có
+    value, ci_low, ci_high, std (độ lệch chuẩn bootstrap), iqr của dữ liệu gốc,
+    n và degenerate (mọi swing cùng 1 giá trị, vd bị kẹp ở 180).
+    """
+    cfg = dict(BOOTSTRAP_SETTINGS, **settings)
+    samples = samples or cfg["samples"]
+    alpha = (1 - cfg["confidence"]) / 2
+    
+    metrics = {}
+    for phase, values_by_metric in baseline.items():
+        metrics[phase] = {}
+        for metric, value in values_by_metric.items():
+            # Sort trước để kết quả không phụ thuộc thứ tự file (generate / update giống nhau)
+            values = np.sort(np.asarray(columns[(phase, metric)], dtype=np.float64))
+            # Mỗi chỉ số 1 dòng random riêng (seed + tên) -> không phụ thuộc thứ tự duyệt
+            name_hash = int.from_bytes(hashlib.sha256(f"{phase}.{metric}".encode()).digest()[:4], "little")
+            rng = np.random.default_rng([cfg["seed"], name_hash])
+            medians = _bootstrap_medians(values, samples, rng, cfg["max_cells"])
+            ci_low, ci_high = np.percentile(medians, [100 * alpha, 100 * (1 - alpha)])
+            q1, q3 = np.percentile(values, [25, 75])
+            metrics[phase][metric] = {
+                "value": value,
+                "ci_low": float(ci_low),
+                "ci_high": float(ci_high),
+                "std": float(np.std(medians)),
+                "iqr": float(q3 - q1),
+                "n": len(values),
+                "degenerate": bool(np.ptp(values) < 1e-4),
+            }
+    
+    return {
+        "view": view_type,
+        "baseline_hash": _baseline_hash(baseline),
+        "samples": samples,
+        "confidence": cfg["confidence"],
+        "seed": cfg["seed"],
+        "metrics": metrics,
+    }
+
+
+def _ci_path(baseline_file):
+    return os.path.splitext(baseline_file)[0] + ".ci.json"
+
+
+def _baseline_hash(baseline):
+    """Hash nội dung baseline, lưu trong file CI để biết CI tính cho đúng baseline nào"""
+    return hashlib.sha256(json.dumps(baseline, sort_keys=True).encode()).hexdigest()
+
+
+def _save_ci(ci, output_file):
+    path = _ci_path(output_file)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ci, f, indent=2, ensure_ascii=False)
+    print(f"✅ Saved confidence intervals ({ci['samples']} bootstrap samples): {path}")
+
+
+def _remove_ci(output_file):
+    """Xoá file CI cũ khi baseline được ghi lại mà không bootstrap (CI không còn đúng)"""
+    path = _ci_path(output_file)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return
+    print(f"🗑️  Removed stale confidence intervals: {path}")
+
+
+def _save_strata(strata, output_file):
+    path = baseline_strata.strata_path(output_file)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(strata, f, indent=2, ensure_ascii=False)
+    print(f"✅ Saved strata: {path}")
+
+
+def generate_baseline(folder, output_file, view_type="side", workers=1, bootstrap=0):
+    """Generate baseline với outlier removal
+
+    workers > 1: tính features của các file song song trong process pool,
+    kết quả được gom dần vào các cột (không giữ list features của cả folder).
+    File baseline giống hệt từng byte với khi chạy tuần tự.
+    Cùng lần duyệt đó dựng luôn baseline theo stratum (<output>.strata.json),
+    thuộc tính club / handedness lấy từ attributes.json trong folder.
+    bootstrap > 0: thêm khoảng tin cậy với từng ấy lần resample (<output>.ci.json).
+    """
+    columns = _new_columns()
+    attributes = baseline_strata.load_attributes(folder)
+    file_attrs = []
+    file_ratios = []
+    
+    print(f"\n{'='*50}")
+    print(f"Generating baseline for {view_type.upper()} view")
+    print(f"{'='*50}\n")
+
+    files = _list_pose_files(folder)
+    paths = [os.path.join(folder, f) for f in files]
+    
+    if workers > 1 and len(paths) > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        # map giữ thứ tự file -> thứ tự gom vào cột giống bản tuần tự
+        results = executor.map(_file_features, paths, [view_type] * len(paths),
+                               chunksize=max(1, len(paths) // (workers * 4)))
+    else:
+        executor = None
+        results = (_file_features(path, view_type) for path in paths)
+    
+    try:
+        # Load tất cả pose files
+        for f, (feat, ratios, n_frames, error) in zip(files, results):
+            print(f"📂 Reading: {f}")
+            
+            if error is not None:
+                print(f"   ❌ Error: {error}")
+            elif feat is not None:
+                _add_features(columns, feat)
+                file_attrs.append(baseline_strata.file_attributes(attributes, f))
+                file_ratios.append(ratios)
+                print(f"   ✅ Extracted {n_frames} frames")
+            else:
+                print(f"   ⚠️  Could not extract features (too short)")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if not columns["count"]:
+        print("\n❌ No valid data found!")
+        return
+
+    print(f"\n✅ Successfully processed {columns['count']} videos")
+    print(f"\nCalculating baseline with outlier removal...\n")
+
+    # Tính baseline với median (robust hơn mean)
+    baseline = _baseline_from_columns(columns, view_type)
 
     # Save baseline
     with open(output_file, "w", encoding='utf-8') as f:
@@ -100,6 +353,12 @@ def generate_baseline(folder, output_file, view_type="side"):
     
     print(f"\n{'='*50}")
     print(f"✅ Saved baseline: {output_file}")
+    _save_strata(_build_strata(columns, file_attrs, file_ratios, baseline, view_type), output_file)
+    if bootstrap:
+        values = {key: np.frombuffer(column, dtype=np.float64) for key, column in columns["values"].items()}
+        _save_ci(bootstrap_baseline(values, baseline, view_type, samples=bootstrap), output_file)
+    else:
+        _remove_ci(output_file)
     print(f"{'='*50}\n")
     
     # Print summary
@@ -108,15 +367,193 @@ def generate_baseline(folder, output_file, view_type="side"):
         print(f"\n{phase.upper()}:")
         for metric, value in baseline[phase].items():
             print(f"  {metric}: {value:.2f}")
+    
+    return baseline
+
+
+def _file_signature(filepath):
+    st = os.stat(filepath)
+    return st.st_size, st.st_mtime_ns
+
+
+def _file_hash(filepath):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _state_path(output_file):
+    return os.path.splitext(output_file)[0] + ".state.json"
+
+
+def load_state(state_file, view_type="side"):
+    """Đọc state của baseline (features từng file + cột giá trị đã sắp xếp)"""
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = None
+    
+    if not state or state.get("view") != view_type:
+        state = {"view": view_type, "files": {}, "columns": {}}
+    return state
+
+
+def _save_state(state, state_file):
+    tmp_path = f"{state_file}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_file)
+
+
+def _remove_values(state, feat):
+    """Bỏ giá trị của 1 swing khỏi các cột đã sắp xếp"""
+    for phase, values in feat.items():
+        for metric, value in values.items():
+            column = state["columns"][phase][metric]
+            del column[bisect.bisect_left(column, value)]
+            if not column:
+                del state["columns"][phase][metric]
+        if not state["columns"][phase]:
+            del state["columns"][phase]
+
+
+def _insert_values(state, feat):
+    """Chèn giá trị của 1 swing vào các cột, giữ thứ tự tăng dần"""
+    for phase, values in feat.items():
+        for metric, value in values.items():
+            column = state["columns"].setdefault(phase, {}).setdefault(metric, [])
+            bisect.insort(column, float(value))
+
+
+def update_baseline(folder, output_file, view_type="side", state_file=None, workers=1, bootstrap=0):
+    """Cập nhật baseline theo các file pose được thêm / sửa / xoá trong folder
+
+    State (mặc định <output>.state.json) lưu hash + features của từng file và
+    mỗi (phase, metric) 1 mảng giá trị đã sắp xếp, nên chỉ file thay đổi mới
+    phải tính lại features; IQR + median tính lại từ các cột trong vài ms.
+    File baseline giống hệt từng byte với generate_baseline trên cùng folder.
+    """
+    state_file = state_file or _state_path(output_file)
+    state = load_state(state_file, view_type)
+    files = state["files"]
+    
+    listed = _list_pose_files(folder)
+    removed = [f for f in files if f not in listed]
+    to_compute = []
+    unchanged = 0
+    
+    for f in listed:
+        filepath = os.path.join(folder, f)
+        size, mtime = _file_signature(filepath)
+        entry = files.get(f)
+        if entry is not None and entry["size"] == size and entry["mtime"] == mtime:
+            unchanged += 1
+            continue
+        
+        file_hash = _file_hash(filepath)
+        if entry is not None and entry["hash"] == file_hash:
+            # Chỉ đổi mtime (copy lại, touch...) -> không cần tính lại
+            entry["size"], entry["mtime"] = size, mtime
+            unchanged += 1
+            continue
+        to_compute.append((f, size, mtime, file_hash))
+    
+    for f in removed:
+        entry = files.pop(f)
+        if entry["features"]:
+            _remove_values(state, entry["features"])
+        print(f"   🗑️  Removed: {f}")
+    
+    paths = [os.path.join(folder, item[0]) for item in to_compute]
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_file_features, paths, [view_type] * len(paths)))
+    else:
+        results = [_file_features(path, view_type) for path in paths]
+    
+    for (f, size, mtime, file_hash), (feat, ratios, n_frames, error) in zip(to_compute, results):
+        old = files.get(f)
+        if old is not None and old["features"]:
+            _remove_values(state, old["features"])
+        
+        if error is not None:
+            print(f"   ❌ {f}: {error}")
+            files.pop(f, None)
+            continue
+        
+        if feat is not None:
+            feat = {phase: {metric: float(v) for metric, v in values.items()} for phase, values in feat.items()}
+            _insert_values(state, feat)
+            print(f"   {'🔄 Changed' if old else '✅ Added'}: {f} ({n_frames} frames)")
+        else:
+            print(f"   ⚠️  {f}: Could not extract features (too short)")
+        files[f] = {"size": size, "mtime": mtime, "hash": file_hash, "features": feat, "ratios": ratios}
+    
+    print(f"\n📊 {len(to_compute)} computed, {len(removed)} removed, {unchanged} unchanged")
+    
+    # Cùng thứ tự key với generate_baseline
+    columns = state["columns"]
+    baseline = {}
+    for phase in _ordered(columns, PHASES):
+        baseline[phase] = {}
+        for metric in _ordered(columns[phase], FEATURE_NAMES.get(view_type, ())):
+            values = np.asarray(columns[phase][metric], dtype=np.float64)
+            baseline[phase][metric] = float(np.median(_iqr_filter(values)))
+    
+    if not baseline:
+        print("\n❌ No valid data found!")
+    else:
+        with open(output_file, "w", encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print(f"✅ Saved baseline: {output_file}")
+        
+        # Strata dựng lại từ features đã lưu trong state (không đọc lại file pose)
+        attributes = baseline_strata.load_attributes(folder)
+        strata_columns = _new_columns()
+        file_attrs = []
+        file_ratios = []
+        for name in sorted(files):
+            entry = files[name]
+            if entry["features"]:
+                _add_features(strata_columns, entry["features"])
+                file_attrs.append(baseline_strata.file_attributes(attributes, name))
+                file_ratios.append(entry.get("ratios"))
+        _save_strata(_build_strata(strata_columns, file_attrs, file_ratios, baseline, view_type), output_file)
+        
+        if bootstrap:
+            values = {(phase, metric): columns[phase][metric] for phase in baseline for metric in baseline[phase]}
+            _save_ci(bootstrap_baseline(values, baseline, view_type, samples=bootstrap), output_file)
+        else:
+            _remove_ci(output_file)
+    
+    _save_state(state, state_file)
+    return baseline
 
 
 def validate_baseline(baseline_file):
-    """Kiểm tra baseline có hợp lý không"""
+    """Kiểm tra baseline có hợp lý không
+
+    Có <baseline>.ci.json (bootstrap) thì báo thêm chỉ số không ổn định: mọi
+    swing cùng 1 giá trị, hoặc khoảng tin cậy rộng hơn tolerance chấm điểm.
+    File CI tính cho baseline khác (hash không khớp) thì bị bỏ qua.
+    """
     print(f"\n🔍 Validating {baseline_file}...")
     
     with open(baseline_file, 'r') as f:
         baseline = json.load(f)
     
+    try:
+        with open(_ci_path(baseline_file), 'r', encoding='utf-8') as f:
+            ci = json.load(f)
+    except (OSError, ValueError):
+        ci = None
+    if ci and ci.get("baseline_hash") != _baseline_hash(baseline):
+        print(f"⚠️  Ignoring {_ci_path(baseline_file)}: computed for a different baseline")
+        ci = None
+    
     issues = []
     
     for phase, metrics in baseline.items():
@@ -129,6 +566,24 @@ def validate_baseline(baseline_file):
             if value < 5 and 'angle' in metric:
                 issues.append(f"⚠️  {phase}.{metric} = {value:.2f}° (suspiciously low)")
     
+    if ci:
+        weights = SCORE_WEIGHTS["side" if ci["view"] == "side" else "back"]
+        ratio = BOOTSTRAP_SETTINGS["unstable_ratio"]
+        for phase, metrics in ci["metrics"].items():
+            for metric, stats in metrics.items():
+                if stats["degenerate"] and stats["n"] > 1:
+                    issues.append(f"⚠️  {phase}.{metric} = {stats['value']:.2f} "
+                                  f"(degenerate: all {stats['n']} swings identical)")
+                    continue
+                
+                # Chỉ số có chấm điểm: CI rộng hơn tolerance thì baseline chưa đáng tin
+                tolerance = weights.get(phase, {}).get(metric, (None, None))[1]
+                width = stats["ci_high"] - stats["ci_low"]
+                if tolerance is not None and width > ratio * tolerance:
+                    issues.append(f"⚠️  {phase}.{metric} = {stats['value']:.2f} "
+                                  f"(unstable: {ci['confidence']:.0%} CI [{stats['ci_low']:.2f}, "
+                                  f"{stats['ci_high']:.2f}] wider than tolerance {tolerance})")
+    
     if issues:
         print("\n❌ Found issues:")
         for issue in issues:
@@ -145,19 +600,28 @@ if __name__ == "__main__":
     side_folder = r"D:\Documents\Data Storm\video vdv pro\sideview"
     back_folder = r"D:\Documents\Data Storm\video vdv pro\backview"
     
+    # Số process tính features song song (1 = tuần tự như cũ)
+    workers = max(1, (os.cpu_count() or 1) // 2)
+    
+    # Mặc định cập nhật incremental từ <baseline>.state.json, --full để tính lại toàn bộ
+    import sys
+    build = generate_baseline if "--full" in sys.argv else update_baseline
+    # --bootstrap: thêm khoảng tin cậy cho từng giá trị baseline (<baseline>.ci.json)
+    bootstrap = BOOTSTRAP_SETTINGS["samples"] if "--bootstrap" in sys.argv else 0
+    
     # Generate baselines
     print("🏌️ GENERATING PRO BASELINES")
     
     # Side view
     if os.path.exists(side_folder):
-        generate_baseline(side_folder, "baseline_pro_side.json", view_type="side")
+        build(side_folder, "baseline_pro_side.json", view_type="side", workers=workers, bootstrap=bootstrap)
         validate_baseline("baseline_pro_side.json")
     else:
         print(f"⚠️  Folder not found: {side_folder}")
     
     # Back view
     if os.path.exists(back_folder):
-        generate_baseline(back_folder, "baseline_pro_back.json", view_type="back")
+        build(back_folder, "baseline_pro_back.json", view_type="back", workers=workers, bootstrap=bootstrap)
         validate_baseline("baseline_pro_back.json")
     else:
         print(f"⚠️  Folder not found: {back_folder}")
@@ -0,0 +1,207 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+# CLI chung cho cả pipeline (thay cho sửa đường dẫn trong __main__ của từng file):
+#   python golf_cli.py extract   <folder video> [--structured] [--workers N] ...
+#   python golf_cli.py baseline  <folder landmarks> --view side [--full] [--bootstrap N]
+#   python golf_cli.py validate  baseline_pro_side.json
+#   python golf_cli.py features  <file> ... --view side
+#   python golf_cli.py score     <file> ... --view side [--club driver] [--json]
+# cv2 / mediapipe chỉ được import khi thật sự phải chạy pose (extract, hoặc
+# features / score trên file video), nên score trên landmarks đã extract khởi
+# động nhanh khi chạy hàng loạt từ cron.
+
+VIDEO_EXTS = (".mp4", ".mov", ".avi")
+
+
+def _load_frames(path, motion_threshold=None):
+    """Landmarks của 1 file: .npz / .json đọc thẳng, video thì extract (có cache)"""
+    if path.lower().endswith(VIDEO_EXTS):
+        import extract_pose  # cv2 + mediapipe, chỉ load khi cần
+        # Log extract ra stderr: stdout chỉ có kết quả (JSON lines cho cron)
+        with contextlib.redirect_stdout(sys.stderr):
+            return extract_pose.extract_landmarks(path, show_progress=False,
+                                                  motion_threshold=motion_threshold)
+
+    import landmark_io
+    frames, _ = landmark_io.load_landmarks(path)
+    return frames
+
+
+def _iter_files(paths):
+    """Mở rộng folder thành các file landmarks / video bên trong (sắp theo tên)
+
+    Mỗi swing (cùng tên không đuôi) chỉ lấy 1 file, ưu tiên .npz > .json > video
+    như generate_baseline._list_pose_files: video đã extract (process_folder ghi
+    .npz cạnh video) không bị chấm 2 lần hay chạy lại mediapipe.
+    """
+    import landmark_io
+    rank = {landmark_io.LANDMARK_EXT: 0, ".json": 1}
+    rank.update((ext, 2) for ext in VIDEO_EXTS)
+    for path in paths:
+        if os.path.isdir(path):
+            chosen = {}
+            for f in os.listdir(path):
+                stem, ext = os.path.splitext(f)
+                ext = ext.lower()
+                if ext not in rank or (ext == ".json" and not landmark_io.is_landmark_json(f)):
+                    continue
+                if stem not in chosen or (rank[ext], f) < chosen[stem]:
+                    chosen[stem] = (rank[ext], f)
+            for f in sorted(f for _, f in chosen.values()):
+                yield os.path.join(path, f)
+        else:
+            yield path
+
+
+def cmd_extract(args):
+    import extract_pose
+
+    options = {"two_pass": args.two_pass, "motion_threshold": args.motion_threshold, "roi": args.roi}
+    for folder in args.folders:
+        if args.structured:
+            extract_pose.batch_process_with_structure(
+                folder, visualize=args.visualize, workers=args.workers,
+                output_format=args.format, **options)
+        else:
+            extract_pose.process_folder(
+                folder, output_folder=args.output, visualize=args.visualize,
+                workers=args.workers, output_format=args.format, **options)
+    return 0
+
+
+def cmd_baseline(args):
+    import generate_baseline
+
+    output = args.output or f"baseline_pro_{args.view}.json"
+    build = generate_baseline.generate_baseline if args.full else generate_baseline.update_baseline
+    baseline = build(args.folder, output, view_type=args.view, workers=args.workers,
+                     bootstrap=args.bootstrap)
+    if not baseline:
+        return 1
+    if args.validate:
+        return 0 if generate_baseline.validate_baseline(output) else 1
+    return 0
+
+
+def cmd_validate(args):
+    import generate_baseline
+
+    ok = True
+    for path in args.baselines:
+        ok = generate_baseline.validate_baseline(path) and ok
+    return 0 if ok else 1
+
+
+def cmd_features(args):
+    from compute_features import compute_swing_features
+
+    failed = 0
+    for path in _iter_files(args.files):
+        try:
+            features = compute_swing_features(_load_frames(path, args.motion_threshold), args.view)
+        except Exception as e:
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+        print(json.dumps({"file": path, "features": features}, ensure_ascii=False))
+    return 1 if failed else 0
+
+
+def cmd_score(args):
+    from compute_features import calculate_score, compute_swing_features
+    import baseline_strata
+
+    baseline_file = args.baseline or f"baseline_pro_{args.view}.json"
+    # Có strata index thì chấm theo nhóm golfer, không thì dùng baseline chung
+    baseline = None if args.no_strata else baseline_strata.load_strata(baseline_strata.strata_path(baseline_file))
+    if baseline is None:
+        with open(baseline_file, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    failed = 0
+    for path in _iter_files(args.files):
+        try:
+            frames = _load_frames(path, args.motion_threshold)
+            features = compute_swing_features(frames, args.view)
+            if features is None:
+                raise ValueError("Swing quá ngắn, không tính được features")
+            attributes = baseline_strata.user_attributes(frames, baseline, args.club, args.handedness)
+            score, detailed_scores = calculate_score(features, baseline, args.view, attributes=attributes)
+        except Exception as e:
+            print(f"❌ {path}: {e}", file=sys.stderr)
+            failed += 1
+            continue
+
+        if args.json:
+            result = {"file": path, "score": score, "detailed_scores": detailed_scores}
+            if "strata" in baseline:
+                result["stratum"] = baseline_strata.select_stratum(baseline, attributes)[0]
+            print(json.dumps(result, ensure_ascii=False))
+        else:
+            print(f"{path}\t{score}")
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="golf_cli", description="Golf swing analysis pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("extract", help="Extract landmarks từ folder video (process_folder)")
+    p.add_argument("folders", nargs="+")
+    p.add_argument("--output", help="Folder output (mặc định: cùng folder video)")
+    p.add_argument("--structured", action="store_true",
+                   help="Folder gốc có sideview/ và backview/ (batch_process_with_structure)")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--format", choices=["npz", "json"], default="npz")
+    p.add_argument("--visualize", action="store_true")
+    p.add_argument("--two-pass", action="store_true")
+    p.add_argument("--roi", action="store_true")
+    p.add_argument("--motion-threshold", type=float)
+    p.set_defaults(func=cmd_extract)
+
+    p = sub.add_parser("baseline", help="Tạo / cập nhật baseline Pro (generate_baseline)")
+    p.add_argument("folder")
+    p.add_argument("--view", choices=["side", "back"], default="side")
+    p.add_argument("--output", help="Mặc định baseline_pro_<view>.json")
+    p.add_argument("--full", action="store_true", help="Tính lại toàn bộ thay vì cập nhật incremental")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                   help="Ghi khoảng tin cậy với N lần resample")
+    p.add_argument("--validate", action="store_true")
+    p.set_defaults(func=cmd_baseline)
+
+    p = sub.add_parser("validate", help="Kiểm tra file baseline (validate_baseline)")
+    p.add_argument("baselines", nargs="+")
+    p.set_defaults(func=cmd_validate)
+
+    p = sub.add_parser("features", help="In features từng swing (JSON lines)")
+    p.add_argument("files", nargs="+", help="File .npz / .json / video hoặc folder")
+    p.add_argument("--view", choices=["side", "back"], default="side")
+    p.add_argument("--motion-threshold", type=float)
+    p.set_defaults(func=cmd_features)
+
+    p = sub.add_parser("score", help="Chấm điểm swing với baseline (calculate_score)")
+    p.add_argument("files", nargs="+", help="File .npz / .json / video hoặc folder")
+    p.add_argument("--view", choices=["side", "back"], default="side")
+    p.add_argument("--baseline", help="Mặc định baseline_pro_<view>.json")
+    p.add_argument("--no-strata", action="store_true", help="Bỏ qua baseline theo nhóm golfer")
+    p.add_argument("--club", type=str.lower, help="Loại gậy, vd driver / iron")
+    p.add_argument("--handedness", type=str.lower, help="right / left")
+    p.add_argument("--json", action="store_true", help="In JSON lines gồm điểm chi tiết")
+    p.add_argument("--motion-threshold", type=float)
+    p.set_defaults(func=cmd_score)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+import zipfile
+import landmark_io
+
+# Cache landmarks trên đĩa, key = hash(bytes video + Pose settings)
+CACHE_DIR = os.environ.get("GOLF_LANDMARK_CACHE", ".landmark_cache")
+CACHE_MAX_BYTES = int(os.environ.get("GOLF_LANDMARK_CACHE_MAX_MB", "512")) * 1024 * 1024
+
+# Bộ đếm trong process hiện tại
+cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+CHUNK_SIZE = 1 << 20
+
+
+def video_key(video, settings):
+    """Tính key cache từ nội dung video (path hoặc bytes) và Pose settings"""
+    h = hashlib.sha256()
+
+    if isinstance(video, (bytes, bytearray, memoryview)):
+        h.update(video)
+    else:
+        with open(video, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+
+    # Settings khác nhau cho ra landmarks khác nhau -> phải nằm trong key
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _entry_path(key, cache_dir):
+    return os.path.join(cache_dir, key + landmark_io.LANDMARK_EXT)
+
+
+def load_cached(key, cache_dir=None):
+    """Đọc (frames, meta) từ cache, trả về None nếu chưa có"""
+    cache_dir = cache_dir or CACHE_DIR
+    path = _entry_path(key, cache_dir)
+
+    try:
+        landmarks, meta = landmark_io.load_landmarks(path, mmap=False)
+    except FileNotFoundError:
+        cache_stats["misses"] += 1
+        return None
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        # Entry hỏng (file bị cắt, đĩa lỗi...) -> xoá để lần extract sau ghi lại
+        cache_stats["misses"] += 1
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+    # Cập nhật mtime để đánh dấu vừa dùng (LRU)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+    cache_stats["hits"] += 1
+    # float32 -> list giữ nguyên giá trị gốc của MediaPipe (cũng là float32)
+    return landmarks.tolist(), meta
+
+
+def save_cached(key, frames, meta=None, cache_dir=None, max_bytes=None):
+    """Ghi landmarks vào cache rồi evict các entry cũ nếu vượt dung lượng"""
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    os.makedirs(cache_dir, exist_ok=True)
+
+    path = _entry_path(key, cache_dir)
+    # Ghi ra file tạm rồi rename để process/thread khác không đọc phải file dở dang
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    meta = meta or {}
+    landmark_io.save_landmarks(
+        tmp_path, frames,
+        fps=meta.get("fps"),
+        frame_indices=meta.get("frame_indices"),
+        visibility=meta.get("visibility"),
+    )
+    os.replace(tmp_path, path)
+
+    evict(cache_dir, max_bytes)
+
+
+def evict(cache_dir=None, max_bytes=None):
+    """Xóa entry ít dùng nhất (mtime cũ nhất) cho tới khi tổng dung lượng <= max_bytes"""
+    cache_dir = cache_dir or CACHE_DIR
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    entries = []
+    total = 0
+    for name in os.listdir(cache_dir):
+        if not name.endswith(landmark_io.LANDMARK_EXT):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        cache_stats["evictions"] += 1
+
+    return total
@@ -0,0 +1,183 @@
+import json
+import os
+import struct
+import zipfile
+import numpy as np
+import baseline_strata
+
+# Format nhị phân cho landmarks: .npz không nén gồm
+#   landmarks      float32 (frames, 33, 3)
+#   frame_indices  int32   (frames,)      - index frame gốc trong video
+#   visibility     float32 (frames, 33)   - rỗng nếu không có
+#   fps            float64 ()             - 0 nếu không rõ
+# Không nén để loader có thể memory-map trực tiếp từng mảng trong file.
+LANDMARK_EXT = ".npz"
+NUM_LANDMARKS = 33
+
+_ZIP_LOCAL_HEADER = 30
+
+# File JSON đi kèm baseline / dữ liệu pro, không phải landmarks
+SIDECAR_SUFFIXES = (".ci.json", ".strata.json", ".state.json")
+
+
+def save_landmarks(path, landmarks, fps=None, frame_indices=None, visibility=None):
+    """Lưu landmarks (list-of-lists hoặc array) ra file .npz"""
+    landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+    n = len(landmarks)
+
+    if frame_indices is None:
+        frame_indices = np.arange(n, dtype=np.int32)
+    else:
+        frame_indices = np.asarray(frame_indices, dtype=np.int32)
+
+    if visibility is None:
+        visibility = np.zeros((0, NUM_LANDMARKS), dtype=np.float32)
+    else:
+        visibility = np.asarray(visibility, dtype=np.float32).reshape(-1, NUM_LANDMARKS)
+
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            landmarks=landmarks,
+            frame_indices=frame_indices,
+            visibility=visibility,
+            fps=np.float64(fps or 0.0),
+        )
+
+
+def _mmap_member(path, zf, name):
+    """Memory-map một mảng .npy nằm (không nén) trong file .npz"""
+    info = zf.getinfo(name + ".npy")
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        local = f.read(_ZIP_LOCAL_HEADER)
+        name_len, extra_len = struct.unpack("<HH", local[26:30])
+        f.seek(info.header_offset + _ZIP_LOCAL_HEADER + name_len + extra_len)
+
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    if dtype.hasobject or int(np.prod(shape)) == 0:
+        return None
+
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+def load_landmarks(path, mmap=True):
+    """Đọc landmarks, trả về (landmarks array (frames, 33, 3), meta dict)
+
+    Nhận cả file .npz lẫn file JSON cũ. Với .npz và mmap=True, mảng
+    landmarks được memory-map thay vì đọc hết vào RAM.
+    """
+    if not path.endswith(LANDMARK_EXT):
+        with open(path, "r") as f:
+            frames = json.load(f)
+        landmarks = np.asarray(frames, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+        meta = {
+            "fps": None,
+            "frame_indices": np.arange(len(landmarks), dtype=np.int32),
+            "visibility": None,
+        }
+        return landmarks, meta
+
+    arrays = {}
+    if mmap:
+        with zipfile.ZipFile(path) as zf:
+            for name in ("landmarks", "frame_indices", "visibility"):
+                arrays[name] = _mmap_member(path, zf, name)
+
+    with np.load(path) as data:
+        for name in ("landmarks", "frame_indices", "visibility"):
+            if arrays.get(name) is None:
+                arrays[name] = data[name]
+        fps = float(data["fps"])
+
+    landmarks = arrays["landmarks"].reshape(-1, NUM_LANDMARKS, 3)
+    visibility = arrays["visibility"]
+    meta = {
+        "fps": fps or None,
+        "frame_indices": arrays["frame_indices"],
+        "visibility": visibility if len(visibility) else None,
+    }
+    return landmarks, meta
+
+
+def is_landmark_json(name):
+    """File .json trong folder pose có phải landmarks không (bỏ attributes/sidecar)"""
+    return (name.endswith(".json")
+            and name != baseline_strata.ATTRIBUTES_FILE
+            and not name.endswith(SIDECAR_SUFFIXES))
+
+
+def _frames_array(frames):
+    """List frames JSON -> array (frames, 33, 3), ValueError nếu sai shape"""
+    if not isinstance(frames, list):
+        raise ValueError(f"không phải list frames ({type(frames).__name__})")
+    if not frames:
+        return np.zeros((0, NUM_LANDMARKS, 3), dtype=np.float32)
+
+    try:
+        arr = np.asarray(frames, dtype=np.float32)
+    except (TypeError, ValueError):
+        raise ValueError("frames không đều hoặc không phải số")
+    if arr.ndim != 3 or arr.shape[1:] != (NUM_LANDMARKS, 3):
+        raise ValueError(f"shape {arr.shape}, cần (frames, {NUM_LANDMARKS}, 3)")
+    return arr
+
+
+def convert_json_to_npz(json_path, npz_path=None, fps=None):
+    """Chuyển 1 file landmarks JSON cũ sang .npz (kiểm tra shape trước khi ghi)"""
+    if npz_path is None:
+        npz_path = os.path.splitext(json_path)[0] + LANDMARK_EXT
+
+    with open(json_path, "r") as f:
+        frames = _frames_array(json.load(f))
+
+    save_landmarks(npz_path, frames, fps=fps)
+    return npz_path
+
+
+def convert_folder(folder, remove_json=False):
+    """Chuyển tất cả file landmarks JSON trong folder sang .npz"""
+    converted = 0
+
+    for f in sorted(os.listdir(folder)):
+        if not is_landmark_json(f):
+            continue
+
+        json_path = os.path.join(folder, f)
+        try:
+            npz_path = convert_json_to_npz(json_path)
+        except Exception as e:
+            print(f"   ❌ {f}: {str(e)}")
+            continue
+
+        json_size = os.path.getsize(json_path)
+        npz_size = os.path.getsize(npz_path)
+        print(f"   ✅ {f} -> {os.path.basename(npz_path)} "
+              f"({json_size / 1024:.0f} KB -> {npz_size / 1024:.0f} KB)")
+
+        if remove_json:
+            os.remove(json_path)
+        converted += 1
+
+    return converted
+
+
+if __name__ == "__main__":
+    # Chuyển các folder landmarks JSON cũ sang .npz
+    # python landmark_io.py "path/to/sideview" "path/to/backview"
+    import sys
+
+    for folder in sys.argv[1:]:
+        print(f"\n📂 Converting {folder}")
+        n = convert_folder(folder)
+        print(f"✅ Converted {n} files")
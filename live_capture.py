@@ -0,0 +1,232 @@
+import collections
+import json
+import threading
+import time
+import cv2
+import mediapipe as mp
+from compute_features import calculate_score
+import online_phases
+import pose_stream
+
+mp_pose = mp.solutions.pose
+
+# Chế độ live (camera ở bay tập / file đang được ghi): luôn xử lý frame MỚI NHẤT,
+# frame cũ chưa kịp xử lý bị bỏ, và đổi model_complexity để giữ độ trễ trong budget
+LIVE_SETTINGS = {
+    "latency_budget": 0.15,  # Độ trễ mục tiêu (giây) từ lúc có frame tới lúc có landmarks
+    "min_complexity": 0,
+    "max_complexity": 2,
+    "adapt_window": 30,      # Số frame dùng để tính độ trễ trung bình trước khi đổi model
+    "upgrade_ratio": 0.5,    # Độ trễ < upgrade_ratio * budget thì thử model nặng hơn
+    "idle_timeout": 2.0,     # File đang ghi: không có frame mới sau chừng này giây thì dừng
+}
+
+LIVE_POSE_SETTINGS = {
+    "min_detection_confidence": 0.5,
+    "min_tracking_confidence": 0.5,
+}
+
+
+def open_source(source):
+    """Mở camera (số / "0") hoặc file video, trả về (cap, là_file)"""
+    if isinstance(source, int) or str(source).isdigit():
+        return cv2.VideoCapture(int(source)), False
+    return cv2.VideoCapture(source), True
+
+
+def _reader(source, slot, stop, realtime, follow, idle_timeout):
+    """Thread đọc: luôn giữ frame mới nhất trong slot, ghi đè frame chưa xử lý
+
+    File được phát theo tốc độ thực (realtime) để giả lập camera. follow=True:
+    hết file thì chờ file được ghi thêm (mở lại và seek tới frame tiếp theo).
+    """
+    cap, is_file = open_source(source)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    start = time.monotonic()
+    idx = 0
+    idle_since = None
+
+    try:
+        while not stop.is_set():
+            ok, frame = cap.read()
+            if not ok:
+                if not (is_file and follow):
+                    break
+                if idle_since is None:
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since > idle_timeout:
+                    break
+                # File đang ghi: mở lại, đọc tiếp từ frame chưa đọc
+                time.sleep(0.1)
+                cap.release()
+                cap, _ = open_source(source)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+                continue
+            idle_since = None
+
+            if is_file and realtime:
+                # Chờ tới "thời điểm quay" của frame này
+                delay = start + idx / fps - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            with slot["cond"]:
+                if slot["item"] is not None:
+                    slot["dropped"] += 1
+                slot["item"] = (idx, time.monotonic(), frame)
+                slot["captured"] += 1
+                slot["cond"].notify()
+            idx += 1
+    finally:
+        cap.release()
+        with slot["cond"]:
+            slot["done"] = True
+            slot["cond"].notify()
+
+
+def _next_frame(slot):
+    """Chờ và lấy frame mới nhất, None khi nguồn đã hết"""
+    with slot["cond"]:
+        while slot["item"] is None and not slot["done"]:
+            slot["cond"].wait()
+        item = slot["item"]
+        slot["item"] = None
+        return item
+
+
+def iter_live(source, baseline_features, view_type="side", realtime=True, follow=False,
+              complexity=1, metrics=None, **settings):
+    """Generator: chạy pose trên nguồn live, yield kết quả mỗi khi xong 1 swing
+
+    Mỗi kết quả: {"swing", "events", "features", "score", "detailed_scores", "metrics"}.
+    metrics (dict truyền vào, cập nhật liên tục): số frame captured / processed /
+    dropped, drop_rate, lag trung bình & lớn nhất gần đây, complexity đang dùng
+    và số lần đổi complexity.
+    """
+    cfg = dict(LIVE_SETTINGS, **settings)
+    budget = cfg["latency_budget"]
+
+    cap, _ = open_source(source)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video source: {source}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    cap.release()
+
+    if metrics is None:
+        metrics = {}
+    metrics.update({
+        "captured": 0, "processed": 0, "dropped": 0, "drop_rate": 0.0,
+        "lag_avg": 0.0, "lag_max": 0.0, "complexity": complexity, "switches": 0, "swings": 0,
+    })
+
+    slot = {"cond": threading.Condition(), "item": None, "done": False, "captured": 0, "dropped": 0}
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_reader,
+        args=(source, slot, stop, realtime, follow, cfg["idle_timeout"]),
+        daemon=True,
+    )
+    reader.start()
+
+    # Mỗi mức complexity 1 model, tạo khi cần lần đầu rồi giữ lại để đổi qua lại nhanh
+    poses = {}
+    process = None
+    stats = {"skipped": 0}
+    lags = collections.deque(maxlen=cfg["adapt_window"])
+    detector = online_phases.make_phase_detector(fps)
+    events = []
+
+    try:
+        while True:
+            item = _next_frame(slot)
+            if item is None:
+                break
+            idx, captured_at, frame = item
+
+            if process is None:
+                if complexity not in poses:
+                    poses[complexity] = mp_pose.Pose(model_complexity=complexity, **LIVE_POSE_SETTINGS)
+                process = pose_stream.make_frame_processor(poses[complexity], stats)
+            res = process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+            lag = time.monotonic() - captured_at
+            lags.append(lag)
+            metrics["processed"] += 1
+            metrics["captured"] = slot["captured"]
+            metrics["dropped"] = slot["dropped"]
+            metrics["drop_rate"] = slot["dropped"] / max(1, slot["captured"])
+            metrics["lag_avg"] = sum(lags) / len(lags)
+            metrics["lag_max"] = max(lags)
+
+            # Đủ 1 cửa sổ đo: chậm quá budget thì hạ model, dư nhiều thì nâng model
+            if len(lags) == lags.maxlen:
+                new = complexity
+                if metrics["lag_avg"] > budget and complexity > cfg["min_complexity"]:
+                    new = complexity - 1
+                elif metrics["lag_avg"] < budget * cfg["upgrade_ratio"] and complexity < cfg["max_complexity"]:
+                    new = complexity + 1
+                if new != complexity:
+                    complexity = new
+                    metrics["complexity"] = complexity
+                    metrics["switches"] += 1
+                    lags.clear()
+                    # Model đã dùng trước đó: tracking còn giữ pose cũ -> reset
+                    if complexity in poses:
+                        poses[complexity].reset()
+                    process = None
+
+            landmarks = pose_stream.to_landmarks(res)
+
+            # idx là index frame lúc capture (có khoảng trống khi bỏ frame), detector
+            # tính tốc độ / thời gian đứng yên theo index nên không bị lệch khi bỏ frame
+            for ev in detector(idx, landmarks):
+                if ev["phase"] == "setup":
+                    events = []
+                events.append(ev)
+                if ev["phase"] != "follow" or len(events) != len(online_phases.PHASES):
+                    continue
+
+                # Đủ 4 phase -> chấm điểm swing này ngay
+                features = online_phases.swing_features(events, view_type)
+                score, detailed_scores = calculate_score(features, baseline_features, view_type)
+                metrics["swings"] += 1
+                yield {
+                    "swing": metrics["swings"],
+                    "events": [{k: e[k] for k in ("phase", "frame", "timestamp")} for e in events],
+                    "features": features,
+                    "score": score,
+                    "detailed_scores": detailed_scores,
+                    "metrics": dict(metrics),
+                }
+                events = []
+
+        metrics["captured"] = slot["captured"]
+        metrics["dropped"] = slot["dropped"]
+        metrics["drop_rate"] = slot["dropped"] / max(1, slot["captured"])
+    finally:
+        stop.set()
+        reader.join()
+        for pose in poses.values():
+            pose.close()
+
+
+if __name__ == "__main__":
+    # python live_capture.py <camera index | video file> [side|back]
+    import sys
+
+    source = sys.argv[1] if len(sys.argv) > 1 else "0"
+    view = sys.argv[2] if len(sys.argv) > 2 else "side"
+    with open(f"baseline_pro_{view}.json", "r") as f:
+        baseline = json.load(f)
+
+    metrics = {}
+    print(f"🎥 Live: {source} ({view})")
+    for result in iter_live(source, baseline, view, metrics=metrics):
+        m = result["metrics"]
+        print(f"🏌️ Swing #{result['swing']}: {result['score']}/100 | "
+              f"lag {m['lag_avg'] * 1000:.0f} ms | drop {m['drop_rate']:.0%} | "
+              f"complexity {m['complexity']}")
+
+    print(f"\n📊 {metrics['processed']}/{metrics['captured']} frames processed, "
+          f"{metrics['dropped']} dropped ({metrics['drop_rate']:.0%}), "
+          f"complexity {metrics['complexity']} ({metrics['switches']} switches)")
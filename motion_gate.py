@@ -0,0 +1,28 @@
+import cv2
+
+# Motion gate: so sánh frame hiện tại (thu nhỏ, grayscale) với frame đã chạy
+# pose gần nhất. Nếu gần như không đổi thì dùng lại landmarks cũ, bỏ qua inference.
+GATE_WIDTH = 64
+
+# Chênh lệch trung bình (thang 0-255) dưới ngưỡng này coi là frame tĩnh
+DEFAULT_MOTION_THRESHOLD = 1.5
+
+
+def frame_signature(frame, width=GATE_WIDTH):
+    """Thu nhỏ frame BGR về ảnh xám rộng `width` px để so sánh nhanh"""
+    h, w = frame.shape[:2]
+    height = max(1, round(h * width / w))
+    small = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+
+def motion_score(sig_a, sig_b):
+    """Chênh lệch tuyệt đối trung bình giữa 2 signature"""
+    return float(cv2.absdiff(sig_a, sig_b).mean())
+
+
+def is_static(last_sig, sig, threshold):
+    """True nếu frame gần như giống frame đã inference gần nhất"""
+    if last_sig is None or not threshold:
+        return False
+    return motion_score(last_sig, sig) < threshold
@@ -0,0 +1,163 @@
+import collections
+import math
+from compute_features import compute_features_frame
+
+# Phát hiện phase swing theo thời gian thực: nhận landmarks từng frame (O(1) mỗi
+# frame), phát event setup/top/impact/follow với độ trễ tối đa lookahead_sec,
+# không cần cả video như detect_swing_phases. Tín hiệu chính là độ cao cổ tay
+# so với thân: h = (hông_y - cổ tay_y) / (hông_y - vai_y)
+# (0 = ngang hông, 1 = ngang vai, lớn hơn = trên vai).
+PHASE_SETTINGS = {
+    "smooth": 5,             # Cửa sổ trung bình trượt (frame), như np.convolve của detect_swing_phases
+    "still_sec": 0.3,        # Đứng yên bao lâu thì coi là setup / finish
+    "still_speed": 0.5,      # Tốc độ cổ tay (chiều dài thân / giây) coi như đứng yên
+    "setup_max_height": 0.5, # Setup: tay thấp hơn nửa thân trên
+    "top_min_height": 0.8,   # Top: tay lên gần / trên vai
+    "drop": 0.25,            # Tay đi xuống / lên lại bao nhiêu thì xác nhận top / impact
+    "lookahead_sec": 0.5,    # Chờ tối đa sau điểm cực trị trước khi phát event
+}
+
+PHASES = ["setup", "top", "impact", "follow"]
+
+
+def make_phase_detector(fps, **settings):
+    """Tạo hàm update(frame_index, landmarks) -> list event mới phát
+
+    Mỗi event là dict {"phase", "frame", "timestamp", "landmarks"}; frame là
+    frame của phase (có thể trước frame hiện tại tối đa lookahead). Sau
+    follow, detector quay về chờ setup của swing tiếp theo.
+
+    frame_index có thể nhảy cóc (live bỏ frame): tốc độ, cửa sổ smooth, still
+    và lookahead đều tính theo khoảng cách frame_index chứ không theo số lần gọi.
+    """
+    cfg = dict(PHASE_SETTINGS, **settings)
+    fps = fps or 30
+    smooth = max(1, int(cfg["smooth"]))
+    still_frames = max(1, int(cfg["still_sec"] * fps))
+    lookahead = max(1, int(cfg["lookahead_sec"] * fps))
+    # Trung bình trượt causal trễ (smooth - 1) / 2 frame -> lấy frame ở giữa cửa sổ
+    center = (smooth - 1) // 2
+
+    window = collections.deque()  # (frame, landmarks, h, x, y, thân) trong `smooth` frame gần nhất
+    state = {
+        "stage": 0,       # 0 chờ setup, 1 backswing, 2 downswing, 3 follow-through
+        "sum_h": 0.0,
+        "first": None,    # frame_index đầu tiên (chờ đủ 1 cửa sổ smooth)
+        "prev": None,     # (x, y, frame) cổ tay ở giữa cửa sổ của lần trước
+        "still": 0,       # Số frame (theo index) đã đứng yên liên tục
+        "still_from": None,
+        "setup": None,    # Ứng viên setup: frame đứng yên gần nhất
+        "best": None,     # Ứng viên cực trị của stage hiện tại: (h, frame, landmarks)
+    }
+
+    def event(phase, candidate):
+        _, frame, landmarks = candidate
+        return {"phase": phase, "frame": frame, "timestamp": frame / fps, "landmarks": landmarks}
+
+    def update(frame_index, landmarks):
+        if landmarks is None:
+            return []
+
+        wrist_x = (landmarks[15][0] + landmarks[16][0]) / 2
+        wrist_y = (landmarks[15][1] + landmarks[16][1]) / 2
+        shoulder_y = (landmarks[11][1] + landmarks[12][1]) / 2
+        hip_y = (landmarks[23][1] + landmarks[24][1]) / 2
+        torso = max(hip_y - shoulder_y, 1e-6)
+        h = (hip_y - wrist_y) / torso
+
+        # Cửa sổ gồm các frame trong `smooth` frame_index gần nhất (ít hơn nếu bị bỏ frame)
+        while window and window[0][0] <= frame_index - smooth:
+            state["sum_h"] -= window.popleft()[2]
+        window.append((frame_index, landmarks, h, wrist_x, wrist_y, torso))
+        state["sum_h"] += h
+        if state["first"] is None:
+            state["first"] = frame_index
+        if frame_index - state["first"] < smooth - 1:
+            return []
+
+        # Giá trị đã smooth, gán cho frame gần giữa cửa sổ nhất
+        h_s = state["sum_h"] / len(window)
+        target = frame_index - (smooth - 1 - center)
+        mid_frame, mid_landmarks, _, x, y, torso = min(window, key=lambda w: abs(w[0] - target))
+
+        prev = state["prev"]
+        if prev is not None and mid_frame == prev[2]:
+            return []  # Frame giữa chưa đổi (cửa sổ thưa do bỏ frame)
+        state["prev"] = (x, y, mid_frame)
+        if prev is None:
+            return []
+        speed = math.hypot(x - prev[0], y - prev[1]) / torso * fps / (mid_frame - prev[2])
+        still = speed < cfg["still_speed"]
+        if not still:
+            state["still_from"] = None
+        elif state["still_from"] is None:
+            state["still_from"] = mid_frame
+        state["still"] = mid_frame - state["still_from"] + 1 if still else 0
+
+        events = []
+        stage = state["stage"]
+
+        if stage == 0:
+            # Setup: tay thấp và đứng yên; phát event khi tay bắt đầu chuyển động
+            if still and h_s < cfg["setup_max_height"]:
+                if state["still"] >= still_frames:
+                    state["setup"] = (h_s, mid_frame, mid_landmarks)
+            elif state["setup"] is not None and not still:
+                events.append(event("setup", state["setup"]))
+                state["stage"] = 1
+                state["best"] = None
+
+        elif stage == 1:
+            # Top: điểm tay cao nhất, xác nhận khi tay đã hạ xuống `drop`
+            # hoặc đã qua lookahead frame mà không cao hơn
+            best = state["best"]
+            if best is None or h_s > best[0]:
+                state["best"] = (h_s, mid_frame, mid_landmarks)
+            elif best[0] >= cfg["top_min_height"] and (
+                    h_s < best[0] - cfg["drop"] or mid_frame - best[1] >= lookahead):
+                events.append(event("top", best))
+                state["stage"] = 2
+                state["best"] = None
+
+        elif stage == 2:
+            # Impact: điểm tay thấp nhất sau top (tay về vị trí bóng),
+            # xác nhận khi tay đã lên lại `drop` hoặc qua lookahead frame
+            best = state["best"]
+            if best is None or h_s < best[0]:
+                state["best"] = (h_s, mid_frame, mid_landmarks)
+            elif h_s > best[0] + cfg["drop"] or mid_frame - best[1] >= lookahead:
+                events.append(event("impact", best))
+                state["stage"] = 3
+                state["best"] = None
+
+        else:
+            # Follow: tay lên cao lại rồi đứng yên (finish), phát event sau still_sec
+            best = state["best"]
+            if best is None or h_s > best[0]:
+                state["best"] = (h_s, mid_frame, mid_landmarks)
+            if state["still"] >= still_frames and state["best"][0] >= cfg["top_min_height"]:
+                events.append(event("follow", state["best"]))
+                # Chờ swing tiếp theo
+                state["stage"] = 0
+                state["setup"] = None
+                state["best"] = None
+                state["still"] = 0
+                state["still_from"] = None
+
+        return events
+
+    return update
+
+
+def iter_phase_events(stream, fps, **settings):
+    """Generator: nhận stream (frame_index, timestamp, landmarks) như
+    pose_stream.iter_landmarks, yield event phase ngay khi được xác nhận"""
+    update = make_phase_detector(fps, **settings)
+    for frame_index, _, landmarks in stream:
+        for ev in update(frame_index, landmarks):
+            yield ev
+
+
+def swing_features(events, view_type="side"):
+    """Dict features {phase: chỉ số} (giống compute_swing_features) từ các event của 1 swing"""
+    return {ev["phase"]: compute_features_frame(ev["landmarks"], view_type) for ev in events}
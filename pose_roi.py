@@ -0,0 +1,82 @@
+import cv2
+import numpy as np
+
+# ROI crop: chỉ đưa vùng quanh golfer (lấy từ landmarks frame trước) vào MediaPipe
+ROI_PADDING = 0.25      # Nới bbox thêm 25% mỗi chiều
+ROI_EDGE_MARGIN = 0.08  # Landmarks vào sát mép crop (8%) thì tính lại bbox
+ROI_MIN_SIDE = 64
+ROI_RESET_SHIFT = 0.2   # Mép vùng input dịch quá 20% cạnh thì reset tracking của MediaPipe
+# (box tính lại khi người chạm mép crop chỉ dịch cỡ padding, ~1/6 cạnh: không reset)
+
+
+def landmarks_bbox(points, width, height, padding=ROI_PADDING):
+    """Bbox (x0, y0, x1, y1) theo pixel, nới padding, từ landmarks normalized full-frame"""
+    pts = np.asarray(points, dtype=np.float64)
+    xs = pts[:, 0] * width
+    ys = pts[:, 1] * height
+
+    x0, x1 = xs.min(), xs.max()
+    y0, y1 = ys.min(), ys.max()
+    pad_x = (x1 - x0) * padding + ROI_MIN_SIDE / 2
+    pad_y = (y1 - y0) * padding + ROI_MIN_SIDE / 2
+
+    x0 = int(max(0, np.floor(x0 - pad_x)))
+    y0 = int(max(0, np.floor(y0 - pad_y)))
+    x1 = int(min(width, np.ceil(x1 + pad_x)))
+    y1 = int(min(height, np.ceil(y1 + pad_y)))
+
+    if x1 - x0 < ROI_MIN_SIDE or y1 - y0 < ROI_MIN_SIDE:
+        return None
+    return x0, y0, x1, y1
+
+
+def needs_new_box(points, box, width, height, edge_margin=ROI_EDGE_MARGIN):
+    """True nếu có landmark nằm sát/ra ngoài mép crop hiện tại"""
+    x0, y0, x1, y1 = box
+    pts = np.asarray(points, dtype=np.float64)
+    xs = pts[:, 0] * width
+    ys = pts[:, 1] * height
+    mx = (x1 - x0) * edge_margin
+    my = (y1 - y0) * edge_margin
+    return bool((xs.min() < x0 + mx) or (xs.max() > x1 - mx)
+                or (ys.min() < y0 + my) or (ys.max() > y1 - my))
+
+
+def geometry_changed(old, new, threshold=ROI_RESET_SHIFT):
+    """True nếu vùng input mới (x0, y0, x1, y1) lệch khỏi vùng cũ quá threshold
+
+    Độ lệch của từng mép tính theo cạnh của vùng mới, tức là độ dịch của
+    toạ độ normalized mà tracking của MediaPipe nhìn thấy.
+    """
+    nx0, ny0, nx1, ny1 = new
+    ox0, oy0, ox1, oy1 = old
+    w = max(1, nx1 - nx0)
+    h = max(1, ny1 - ny0)
+    return (max(abs(nx0 - ox0), abs(nx1 - ox1)) > threshold * w
+            or max(abs(ny0 - oy0), abs(ny1 - oy1)) > threshold * h)
+
+
+def crop_frame(rgb, box, max_side=None):
+    """Cắt frame theo box, thu nhỏ (giữ tỉ lệ) nếu cạnh dài hơn max_side"""
+    x0, y0, x1, y1 = box
+    crop = rgb[y0:y1, x0:x1]
+    if max_side:
+        h, w = crop.shape[:2]
+        scale = max_side / max(h, w)
+        if scale < 1:
+            crop = cv2.resize(crop, (max(1, round(w * scale)), max(1, round(h * scale))),
+                              interpolation=cv2.INTER_AREA)
+    # MediaPipe cần mảng liên tục trong bộ nhớ
+    return np.ascontiguousarray(crop)
+
+
+def map_to_full_frame(pose_landmarks, box, width, height):
+    """Đổi landmarks (normalized theo crop) về normalized full-frame, sửa trực tiếp"""
+    x0, y0, x1, y1 = box
+    cw = x1 - x0
+    ch = y1 - y0
+    for lm in pose_landmarks.landmark:
+        lm.x = (x0 + lm.x * cw) / width
+        lm.y = (y0 + lm.y * ch) / height
+        # z của MediaPipe cùng thang với x (theo chiều rộng ảnh)
+        lm.z = lm.z * cw / width
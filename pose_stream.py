@@ -0,0 +1,299 @@
+import math
+import queue
+import threading
+import time
+import cv2
+import mediapipe as mp
+import motion_gate
+import pose_roi
+
+mp_pose = mp.solutions.pose
+
+# Số frame tối đa chờ giữa các tầng pipeline decode -> inference -> encode
+PIPELINE_QUEUE_SIZE = 4
+_END = object()
+
+# Xác nhận follow-through: tay lên cao (top) -> xuống thấp (impact) -> lên cao lại
+# và gần như đứng yên trong still_sec
+FOLLOW_SETTINGS = {
+    "still_sec": 0.3,
+    "still_speed": 0.004,  # Tốc độ cổ tay (normalized / frame) coi như đứng yên
+}
+
+
+def _put_until_stopped(q, item, stop):
+    """q.put nhưng bỏ cuộc khi consumer đã dừng (tránh treo thread)"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _decode_worker(cap, q, stop, start_frame, end_frame, keep_bgr, motion_threshold):
+    """Thread đọc: decode + convert màu + motion signature, đẩy vào queue"""
+    try:
+        frame_idx = 0
+        while not stop.is_set():
+            if end_frame is not None and frame_idx > end_frame:
+                break
+
+            # Bỏ qua các frame trước swing window (chỉ grab, không decode ra ảnh)
+            if frame_idx < start_frame:
+                if not cap.grab():
+                    break
+                frame_idx += 1
+                continue
+
+            ok, frame = cap.read()
+            if not ok:
+                break
+            msec = cap.get(cv2.CAP_PROP_POS_MSEC)
+
+            sig = motion_gate.frame_signature(frame) if motion_threshold else None
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            # Chỉ giữ frame BGR khi cần vẽ visualization
+            item = (frame_idx, frame if keep_bgr else None, rgb, sig, msec)
+            if not _put_until_stopped(q, item, stop):
+                return
+            frame_idx += 1
+    except Exception as e:
+        _put_until_stopped(q, e, stop)
+        return
+
+    _put_until_stopped(q, _END, stop)
+
+
+def _encode_worker(out, q, errors):
+    """Thread ghi: vẽ skeleton và encode video visualization"""
+    while True:
+        item = q.get()
+        if item is _END:
+            break
+        if errors:
+            continue  # Đã lỗi: chỉ rút queue để thread inference không bị chặn
+
+        frame, pose_landmarks = item
+        try:
+            if pose_landmarks:
+                mp.solutions.drawing_utils.draw_landmarks(
+                    frame,
+                    pose_landmarks,
+                    mp_pose.POSE_CONNECTIONS,
+                    mp.solutions.drawing_styles.get_default_pose_landmarks_style()
+                )
+            out.write(frame)
+        except Exception as e:
+            errors.append(e)
+
+
+def _track_region(pose, region, tracked, stats):
+    """Reset tracking của MediaPipe nếu vùng input đổi nhiều so với vùng đang track
+
+    ROI nội bộ của MediaPipe tính theo toạ độ normalized của input cũ: lệch
+    nhỏ thì frame sau nó tự bám lại theo landmarks, lệch lớn mới phải reset
+    (reset = chạy lại detector, đắt hơn nhiều so với 1 frame tracking).
+    """
+    if tracked is not None and pose_roi.geometry_changed(tracked, region):
+        pose.reset()
+        stats["resets"] += 1
+
+
+def process_roi(pose, rgb, box, max_side, stats, tracked=None):
+    """pose.process trên crop quanh golfer, trả về (res, box cho frame sau, vùng đang track)
+
+    Landmarks được đổi về toạ độ normalized full-frame. Mất tracking trong crop
+    thì chạy lại trên full frame. tracked: vùng input (x0, y0, x1, y1) của lần
+    detect được gần nhất, None nếu MediaPipe không còn tracking.
+    """
+    height, width = rgb.shape[:2]
+
+    if box is not None:
+        _track_region(pose, box, tracked, stats)
+        t0 = time.perf_counter()
+        res = pose.process(pose_roi.crop_frame(rgb, box, max_side))
+        stats["crop_time"] += time.perf_counter() - t0
+        stats["crop_frames"] += 1
+
+        if res.pose_landmarks:
+            pose_roi.map_to_full_frame(res.pose_landmarks, box, width, height)
+            points = [(lm.x, lm.y) for lm in res.pose_landmarks.landmark]
+            if pose_roi.needs_new_box(points, box, width, height):
+                return res, pose_roi.landmarks_bbox(points, width, height), box
+            return res, box, box
+
+        # Mất tracking trong crop -> fallback full frame. Không có landmarks thì
+        # MediaPipe cũng đã bỏ ROI cũ, frame sau tự chạy detector: không cần reset
+        stats["fallbacks"] += 1
+        tracked = None
+
+    full = (0, 0, width, height)
+    _track_region(pose, full, tracked, stats)
+    t0 = time.perf_counter()
+    res = pose.process(rgb)
+    stats["full_time"] += time.perf_counter() - t0
+    stats["full_frames"] += 1
+
+    if not res.pose_landmarks:
+        return res, None, None
+
+    points = [(lm.x, lm.y) for lm in res.pose_landmarks.landmark]
+    return res, pose_roi.landmarks_bbox(points, width, height), full
+
+
+def to_landmarks(res, with_visibility=False):
+    """Kết quả pose.process -> list 33 [x, y, z] ([x, y, z, visibility]), None nếu không detect được"""
+    if not res.pose_landmarks:
+        return None
+    if with_visibility:
+        return [[lm.x, lm.y, lm.z, lm.visibility] for lm in res.pose_landmarks.landmark]
+    return [[lm.x, lm.y, lm.z] for lm in res.pose_landmarks.landmark]
+
+
+def make_frame_processor(pose, stats, motion_threshold=None, roi=False, roi_max_side=None):
+    """Tạo hàm process(rgb, sig=None) -> res: inference 1 frame với motion gate và ROI crop
+
+    Giữ state giữa các frame (signature frame inference gần nhất, kết quả cũ,
+    box ROI) nên mỗi chuỗi frame liên tiếp dùng 1 processor. Đổi Pose model
+    giữa chừng thì tạo processor mới. stats được cập nhật skipped / ROI.
+    """
+    state = {"sig": None, "res": None, "box": None, "tracked": None}
+
+    def process(rgb, sig=None):
+        # Frame gần như không đổi so với frame inference gần nhất -> dùng lại kết quả
+        if state["res"] is not None and motion_gate.is_static(state["sig"], sig, motion_threshold):
+            stats["skipped"] += 1
+            return state["res"]
+        if roi:
+            res, state["box"], state["tracked"] = process_roi(pose, rgb, state["box"], roi_max_side,
+                                                              stats, state["tracked"])
+        else:
+            res = pose.process(rgb)
+        state["sig"] = sig
+        state["res"] = res
+        return res
+
+    return process
+
+
+def iter_landmarks(video, pose, start_frame=0, end_frame=None, motion_threshold=None,
+                   roi=False, roi_max_side=None, writer=None, with_visibility=False, stats=None):
+    """Generator: yield (frame_index, timestamp, landmarks) ngay khi mỗi frame xử lý xong
+
+    video: đường dẫn hoặc cv2.VideoCapture đã mở. landmarks là list 33 [x, y, z]
+    ([x, y, z, visibility] nếu with_visibility) hoặc None nếu không detect được.
+    timestamp tính bằng giây. writer: cv2.VideoWriter để ghi video có skeleton.
+    stats: dict sẽ được cập nhật số frame / detect / skip / ROI trong lúc chạy.
+    Muốn dừng sớm chỉ cần break (hoặc .close()) - các thread được dọn ngay.
+    """
+    owns_cap = not isinstance(video, cv2.VideoCapture)
+    cap = cv2.VideoCapture(video) if owns_cap else video
+    if not cap.isOpened():
+        raise IOError(f"Cannot open video: {video}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    if stats is None:
+        stats = {}
+    stats.update({
+        "frames": 0, "detected": 0, "skipped": 0,
+        "crop_frames": 0, "crop_time": 0.0, "full_frames": 0, "full_time": 0.0, "fallbacks": 0,
+        "resets": 0,
+    })
+
+    # Pipeline 3 tầng: decode (thread đọc) -> inference (thread này) -> vẽ/ghi video (thread ghi)
+    # Queue có giới hạn nên RAM không tăng theo độ dài video kể cả với 4K
+    stop = threading.Event()
+    decoded = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    reader = threading.Thread(
+        target=_decode_worker,
+        args=(cap, decoded, stop, start_frame, end_frame, writer is not None, motion_threshold),
+        daemon=True,
+    )
+    reader.start()
+
+    writer_errors = []
+    if writer is not None:
+        to_encode = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        encoder = threading.Thread(target=_encode_worker, args=(writer, to_encode, writer_errors),
+                                   daemon=True)
+        encoder.start()
+
+    process = make_frame_processor(pose, stats, motion_threshold=motion_threshold, roi=roi,
+                                   roi_max_side=roi_max_side)
+
+    try:
+        while True:
+            item = decoded.get()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            idx, frame, rgb, sig, msec = item
+            stats["frames"] += 1
+
+            res = process(rgb, sig)
+            landmarks = to_landmarks(res, with_visibility)
+            if landmarks is not None:
+                stats["detected"] += 1
+
+            # Vẽ skeleton + ghi video ở thread ghi
+            if writer is not None:
+                to_encode.put((frame, res.pose_landmarks))
+
+            timestamp = idx / fps if fps > 0 else msec / 1000
+            yield idx, timestamp, landmarks
+
+        if writer_errors:
+            raise writer_errors[0]
+    finally:
+        stop.set()
+        reader.join()
+        if writer is not None:
+            to_encode.put(_END)
+            encoder.join()
+        if owns_cap:
+            cap.release()
+
+
+def make_follow_through_check(fps, still_sec=None, still_speed=None):
+    """Tạo hàm check(landmarks) -> True khi follow-through đã được xác nhận
+
+    Theo dõi cổ tay so với vai/hông: tay lên trên vai (top) -> xuống dưới hông
+    (impact) -> lên trên vai lại (finish) rồi gần như đứng yên trong still_sec.
+    Mỗi frame O(1), dùng để dừng extraction sớm thay vì decode phần video thừa.
+    """
+    still_sec = FOLLOW_SETTINGS["still_sec"] if still_sec is None else still_sec
+    still_speed = FOLLOW_SETTINGS["still_speed"] if still_speed is None else still_speed
+    still_frames = max(1, int(still_sec * (fps or 30)))
+    state = {"stage": 0, "prev": None, "still": 0}
+
+    def check(landmarks):
+        if landmarks is None:
+            return False
+
+        wrist_x = (landmarks[15][0] + landmarks[16][0]) / 2
+        wrist_y = (landmarks[15][1] + landmarks[16][1]) / 2
+        shoulder_y = (landmarks[11][1] + landmarks[12][1]) / 2
+        hip_y = (landmarks[23][1] + landmarks[24][1]) / 2
+        prev = state["prev"]
+        state["prev"] = (wrist_x, wrist_y)
+
+        # y của ảnh tăng xuống dưới: tay "cao" khi wrist_y < shoulder_y
+        if state["stage"] == 0 and wrist_y < shoulder_y:
+            state["stage"] = 1  # top
+        elif state["stage"] == 1 and wrist_y > hip_y:
+            state["stage"] = 2  # impact
+        elif state["stage"] == 2 and wrist_y < shoulder_y:
+            state["stage"] = 3  # finish
+
+        if state["stage"] < 3 or prev is None:
+            return False
+
+        speed = math.hypot(wrist_x - prev[0], wrist_y - prev[1])
+        state["still"] = state["still"] + 1 if speed < still_speed else 0
+        return state["still"] >= still_frames
+
+    return check
@@ -0,0 +1,107 @@
+import numpy as np
+from compute_features import compile_score_table, features_to_tensor
+import pro_library
+
+# Index tìm Pro gần nhất: mỗi Pro là 1 vector gồm các chỉ số được chấm điểm
+# của mọi phase, chia cho tolerance trong SCORE_WEIGHTS (lệch 1 đơn vị = lệch
+# 1 tolerance), nên khoảng cách so sánh được giữa các chỉ số khác thang đo.
+
+
+def _scale(view_type):
+    """Mask các ô (phase, chỉ số) có chấm điểm và tolerance tương ứng"""
+    table = compile_score_table(view_type)
+    mask = table["weight"] > 0
+    return table, mask, table["tolerance"][mask]
+
+
+def feature_vector(features, view_type="side"):
+    """Dict features (compute_swing_features) -> vector đã chuẩn hoá, NaN chỗ thiếu"""
+    table, mask, scale = _scale(view_type)
+    tensor = features_to_tensor([features], table["view"])[0]
+    return tensor[mask] / scale
+
+
+def build_index(entries, view_type="side"):
+    """Tạo index từ list (pro_id, name, features)"""
+    table, mask, scale = _scale(view_type)
+    ids = [e[0] for e in entries]
+    names = [e[1] for e in entries]
+
+    tensor = features_to_tensor([e[2] for e in entries], table["view"])
+    vectors = tensor[:, mask] / scale
+
+    # Chỉ số Pro bị thiếu -> thay bằng trung bình các Pro khác để không làm lệch khoảng cách
+    if np.isnan(vectors).any():
+        col_mean = np.nanmean(np.where(np.isnan(vectors).all(axis=0), 0, vectors), axis=0)
+        vectors = np.where(np.isnan(vectors), col_mean, vectors)
+
+    phases, metrics = np.nonzero(mask)
+    dims = [f"{table['phases'][p]}.{table['metrics'][m]}" for p, m in zip(phases, metrics)]
+    return {
+        "view": table["view"],
+        "ids": ids,
+        "names": names,
+        "dims": dims,
+        "vectors": np.ascontiguousarray(vectors),
+    }
+
+
+def build_from_library(view_type="side", library_dir=None):
+    """Tạo index từ các Pro cùng góc quay trong pro_library"""
+    entries = [(pro_id, entry["name"], entry["features"])
+               for pro_id, entry in pro_library.list_pros(view_type, library_dir)]
+    return build_index(entries, view_type)
+
+
+def nearest_pros(index, features, k=5):
+    """Top-k Pro gần nhất với features: list (pro_id, name, khoảng cách) tăng dần"""
+    n = len(index["ids"])
+    if n == 0:
+        return []
+    k = min(k, n)
+
+    query = feature_vector(features, index["view"])
+    # Chỉ số user không có thì bỏ qua chiều đó
+    known = ~np.isnan(query)
+    diff = index["vectors"][:, known] - query[known]
+    dist2 = np.einsum("ij,ij->i", diff, diff)
+
+    top = np.argpartition(dist2, k - 1)[:k] if k < n else np.arange(n)
+    top = top[np.argsort(dist2[top], kind="stable")]
+    return [(index["ids"][i], index["names"][i], float(np.sqrt(dist2[i]))) for i in top]
+
+
+def save_index(index, path):
+    """Lưu index ra file .npz"""
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            view=np.array(index["view"]),
+            ids=np.array(index["ids"], dtype=str),
+            names=np.array(index["names"], dtype=str),
+            dims=np.array(index["dims"], dtype=str),
+            vectors=index["vectors"],
+        )
+
+
+def load_index(path):
+    """Đọc index đã lưu bằng save_index"""
+    with np.load(path) as data:
+        return {
+            "view": str(data["view"]),
+            "ids": data["ids"].tolist(),
+            "names": data["names"].tolist(),
+            "dims": data["dims"].tolist(),
+            "vectors": np.ascontiguousarray(data["vectors"]),
+        }
+
+
+if __name__ == "__main__":
+    # Dựng index từ thư viện Pro: python pro_index.py side back
+    import sys
+
+    for view in sys.argv[1:] or ["side", "back"]:
+        index = build_from_library(view)
+        path = f"pro_index_{view}.npz"
+        save_index(index, path)
+        print(f"✅ {view}: {len(index['ids'])} pros, {len(index['dims'])} dims -> {path}")
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import numpy as np
+from compute_features import compute_swing_features
+import landmark_io
+
+# Thư viện swing Pro dựng sẵn cho chế độ so sánh:
+#   pro_library/index.json   - {pro_id: {name, view, features, ...}}
+#   pro_library/<pro_id>.npz - landmarks (format của landmark_io)
+# Features đã tính sẵn nằm trong index nên chọn Pro là có ngay, không phải extract lại.
+LIBRARY_DIR = os.environ.get("GOLF_PRO_LIBRARY", "pro_library")
+INDEX_FILE = "index.json"
+
+_lock = threading.Lock()
+
+
+def _index_path(library_dir):
+    return os.path.join(library_dir, INDEX_FILE)
+
+
+def load_index(library_dir=None):
+    """Đọc index thư viện, {} nếu chưa có"""
+    library_dir = library_dir or LIBRARY_DIR
+    try:
+        with open(_index_path(library_dir), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_index(index, library_dir):
+    path = _index_path(library_dir)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def list_pros(view=None, library_dir=None):
+    """Danh sách (pro_id, entry) sắp theo tên, lọc theo góc quay nếu có"""
+    index = load_index(library_dir)
+    items = [(pro_id, entry) for pro_id, entry in index.items()
+             if view is None or entry["view"] == view]
+    return sorted(items, key=lambda item: item[1]["name"].lower())
+
+
+def get_pro(pro_id, library_dir=None):
+    """Entry của 1 Pro (gồm features), None nếu không có"""
+    return load_index(library_dir).get(pro_id)
+
+
+def load_pro_landmarks(pro_id, library_dir=None):
+    """Landmarks (array (frames, 33, 3), meta) của 1 Pro trong thư viện"""
+    library_dir = library_dir or LIBRARY_DIR
+    entry = get_pro(pro_id, library_dir)
+    if entry is None:
+        raise KeyError(pro_id)
+    return landmark_io.load_landmarks(os.path.join(library_dir, entry["landmarks"]))
+
+
+def add_pro(name, view, frames, meta=None, source=None, library_dir=None):
+    """Thêm 1 swing Pro vào thư viện, trả về pro_id
+
+    Features được tính 1 lần ở đây. pro_id lấy từ hash landmarks + góc quay
+    nên thêm lại cùng 1 swing chỉ cập nhật entry cũ.
+    """
+    library_dir = library_dir or LIBRARY_DIR
+    landmarks = np.asarray(frames, dtype=np.float32).reshape(-1, landmark_io.NUM_LANDMARKS, 3)
+
+    features = compute_swing_features(frames, view)
+    if features is None:
+        raise ValueError("Swing quá ngắn, không tính được features")
+
+    h = hashlib.sha256(landmarks.tobytes())
+    h.update(view.encode("utf-8"))
+    pro_id = h.hexdigest()[:16]
+
+    os.makedirs(library_dir, exist_ok=True)
+    meta = meta or {}
+    landmark_file = pro_id + landmark_io.LANDMARK_EXT
+    landmark_io.save_landmarks(
+        os.path.join(library_dir, landmark_file), landmarks,
+        fps=meta.get("fps"),
+        frame_indices=meta.get("frame_indices"),
+        visibility=meta.get("visibility"),
+    )
+
+    with _lock:
+        index = load_index(library_dir)
+        index[pro_id] = {
+            "name": name,
+            "view": view,
+            "source": source,
+            "frames": len(landmarks),
+            "landmarks": landmark_file,
+            "features": features,
+            "added": time.time(),
+        }
+        _save_index(index, library_dir)
+
+    return pro_id
+
+
+def remove_pro(pro_id, library_dir=None):
+    """Xóa 1 Pro khỏi thư viện, trả về True nếu có xóa"""
+    library_dir = library_dir or LIBRARY_DIR
+    with _lock:
+        index = load_index(library_dir)
+        entry = index.pop(pro_id, None)
+        if entry is None:
+            return False
+        _save_index(index, library_dir)
+
+    try:
+        os.remove(os.path.join(library_dir, entry["landmarks"]))
+    except OSError:
+        pass
+    return True
+
+
+def add_folder(folder, view, library_dir=None):
+    """Thêm tất cả file landmarks (.npz / .json) trong folder, tên Pro = tên file"""
+    added = 0
+
+    for f in sorted(os.listdir(folder)):
+        if not (f.endswith(landmark_io.LANDMARK_EXT) or f.endswith(".json")):
+            continue
+
+        try:
+            frames, meta = landmark_io.load_landmarks(os.path.join(folder, f), mmap=False)
+            pro_id = add_pro(os.path.splitext(f)[0], view, frames.tolist(), meta,
+                             source=f, library_dir=library_dir)
+        except Exception as e:
+            print(f"   ❌ {f}: {str(e)}")
+            continue
+
+        print(f"   ✅ {f} -> {pro_id}")
+        added += 1
+
+    return added
+
+
+if __name__ == "__main__":
+    # Dựng thư viện từ folder landmarks đã extract sẵn
+    # python pro_library.py side "path/to/pro_sideview_landmarks"
+    import sys
+
+    view = sys.argv[1]
+    for folder in sys.argv[2:]:
+        print(f"\n📂 Adding {folder} ({view})")
+        n = add_folder(folder, view)
+        print(f"✅ Added {n} swings to {LIBRARY_DIR}")
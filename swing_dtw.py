@@ -0,0 +1,142 @@
+import numpy as np
+from compute_features import FEATURE_NAMES, SCORE_WEIGHTS, compute_features_batch
+
+# So sánh toàn bộ swing: căn chỉnh đường cong chỉ số theo từng frame của user và
+# Pro bằng DTW (Sakoe-Chiba band) thay vì chỉ so 4 frame phase.
+DTW_BAND = 0.15  # Bề rộng band, tính theo tỉ lệ độ dài video dài hơn
+DTW_BLOCK_CELLS = 1 << 16  # Số ô tính khoảng cách mỗi lần (giới hạn RAM tạm (ô, chỉ số))
+
+
+def metric_scales(view_type="side"):
+    """Các chỉ số dùng cho DTW và thang chuẩn hoá (tolerance trung bình qua các phase)"""
+    view_type = "side" if view_type == "side" else "back"
+    tolerances = {}
+    for phase_weights in SCORE_WEIGHTS[view_type].values():
+        for metric, (_, tol) in phase_weights.items():
+            tolerances.setdefault(metric, []).append(tol)
+
+    columns = [m for m, name in enumerate(FEATURE_NAMES[view_type]) if name in tolerances]
+    scales = np.array([np.mean(tolerances[FEATURE_NAMES[view_type][m]]) for m in columns])
+    return columns, scales
+
+
+def feature_curves(frames, view_type="side"):
+    """Đường cong chỉ số (frames, metrics) đã chia tolerance, từ landmarks"""
+    columns, scales = metric_scales(view_type)
+    return compute_features_batch(frames, view_type)[:, columns] / scales
+
+
+def _band_limits(n, m, band):
+    """Cột đầu / cuối (lo, hi) của Sakoe-Chiba band cho từng hàng i"""
+    radius = max(1.0, band * max(n, m))
+    # Đường chéo nối (0, 0) với (n-1, m-1) để 2 video khác độ dài vẫn căn được
+    center = np.arange(n) * (m - 1) / max(1, n - 1)
+    lo = np.clip(np.ceil(center - radius), 0, m - 1).astype(np.int64)
+    hi = np.clip(np.floor(center + radius), 0, m - 1).astype(np.int64)
+    return lo, hi
+
+
+def _diagonal_limits(lo, hi, k_count):
+    """Hàng đầu / cuối (ilo, ihi) của các ô trong band trên từng đường chéo phụ k = i + j"""
+    rows = np.arange(len(lo))
+    # i + hi[i] và i + lo[i] tăng dần theo i nên tìm được bằng searchsorted
+    ilo = np.searchsorted(rows + hi, np.arange(k_count), side="left")
+    ihi = np.searchsorted(rows + lo, np.arange(k_count), side="right") - 1
+    return ilo, ihi
+
+
+def dtw_align(a, b, band=DTW_BAND):
+    """DTW giữa 2 chuỗi vector a (n, d) và b (m, d)
+
+    Trả về (cost, path): cost là tổng khoảng cách Euclid trên đường căn chỉnh,
+    path là array (L, 2) các cặp (frame a, frame b) từ đầu tới cuối.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    n, m = len(a), len(b)
+    if n == 0 or m == 0:
+        raise ValueError("Chuỗi rỗng, không căn chỉnh được")
+
+    # DP theo từng đường chéo phụ k = i + j, mỗi đường chéo chỉ lưu các ô trong
+    # band: acc[k, 1 + i - ilo[k]] (thêm 1 cột inf mỗi bên làm biên), bộ nhớ
+    # (n + m) x bề rộng band. 3 ô phụ thuộc (i-1, j), (i, j-1), (i-1, j-1) đều
+    # là slice của 2 đường chéo trước -> mỗi bước chỉ vài phép vector.
+    lo, hi = _band_limits(n, m, band)
+    diag = n + m - 1
+    ilo, ihi = _diagonal_limits(lo, hi, diag)
+    width = int((ihi - ilo).max()) + 1
+
+    # Khoảng cách các ô trong band, cùng layout với acc, tính theo khối đường chéo
+    cost = np.full((diag, width + 2), np.inf)
+    offsets = np.arange(width)
+    step = max(1, DTW_BLOCK_CELLS // width)
+    for k0 in range(0, diag, step):
+        k = np.arange(k0, min(diag, k0 + step))
+        rows = ilo[k, None] + offsets
+        valid = rows <= ihi[k, None]
+        kk, pos = np.nonzero(valid)
+        i = rows[kk, pos]
+        diff = a[i] - b[k[kk] - i]
+        cost[k[kk], pos + 1] = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+
+    acc = np.full((diag, width + 2), np.inf)
+    acc[0, 1] = cost[0, 1]
+    # int Python cho vòng lặp (số học trên scalar numpy chậm hơn nhiều)
+    ilo, ihi = ilo.tolist(), ihi.tolist()
+    for k in range(1, diag):
+        first = ilo[k]
+        count = ihi[k] - first + 1
+        if count <= 0:
+            continue
+        start = first - ilo[k - 1]
+        best = np.minimum(acc[k - 1, start:start + count], acc[k - 1, start + 1:start + 1 + count])
+        if k >= 2:
+            start = first - ilo[k - 2]
+            np.minimum(best, acc[k - 2, start:start + count], out=best)
+        np.add(best, cost[k, 1:1 + count], out=acc[k, 1:1 + count])
+
+    total = acc[diag - 1, n - ilo[diag - 1]]
+    if not np.isfinite(total):
+        raise ValueError("Band quá hẹp, không có đường căn chỉnh")
+
+    # Truy ngược đường đi từ (n-1, m-1) về (0, 0); ô ngoài band / ngoài biên = inf
+    inf = float("inf")
+
+    def value(i, j):
+        k = i + j
+        if i < 0 or j < 0 or i < ilo[k] or i > ihi[k]:
+            return inf
+        return acc.item(k, 1 + i - ilo[k])
+
+    path = [(n - 1, m - 1)]
+    i, j = n - 1, m - 1
+    while i > 0 or j > 0:
+        both = value(i - 1, j - 1)
+        up = value(i - 1, j)
+        left = value(i, j - 1)
+        if both <= up and both <= left:
+            i, j = i - 1, j - 1
+        elif up <= left:
+            i -= 1
+        else:
+            j -= 1
+        path.append((i, j))
+
+    return float(total), np.array(path[::-1], dtype=np.int32)
+
+
+def compare_swings(user_frames, pro_frames, view_type="side", band=DTW_BAND):
+    """Căn chỉnh toàn bộ swing user với Pro
+
+    Trả về dict: cost (tổng), normalized_cost (trung bình mỗi bước, đơn vị
+    tolerance), path (list cặp frame), tempo (độ dài user / độ dài Pro).
+    """
+    user_curves = feature_curves(user_frames, view_type)
+    pro_curves = feature_curves(pro_frames, view_type)
+    cost, path = dtw_align(user_curves, pro_curves, band)
+    return {
+        "cost": cost,
+        "normalized_cost": cost / len(path),
+        "path": path.tolist(),
+        "tempo": len(user_curves) / len(pro_curves),
+    }
@@ -0,0 +1,56 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import analysis_jobs
+
+
+def _run(tmp_path, target, *args):
+    jobs_dir = str(tmp_path)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        job_id = analysis_jobs.submit_job(executor, "test", target, *args, jobs_dir=jobs_dir)
+    return analysis_jobs.load_job(job_id, jobs_dir), job_id
+
+
+def test_job_done(tmp_path):
+    def target(report, x):
+        report(0.5, "half")
+        return {"value": x * 2}
+
+    job, job_id = _run(tmp_path, target, 21)
+    assert job["status"] == "done"
+    assert job["result"] == {"value": 42}
+    assert job_id not in analysis_jobs._active
+
+
+def test_job_error(tmp_path):
+    def target(report):
+        raise ValueError("Video quá ngắn")
+
+    job, _ = _run(tmp_path, target)
+    assert job["status"] == "error"
+    assert job["error"] == "Video quá ngắn"
+
+
+def test_unserializable_result_marks_job_error(tmp_path):
+    def target(report):
+        return {"frames": object()}
+
+    job, job_id = _run(tmp_path, target)
+    assert job["status"] == "error"
+    assert "Không lưu được kết quả" in job["error"]
+    assert job_id not in analysis_jobs._active
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".tmp")] == []
+
+
+def test_failed_final_write_does_not_stay_running(tmp_path, monkeypatch):
+    write_job = analysis_jobs._write_job
+
+    def failing_write(job, jobs_dir):
+        if job["status"] in ("done", "error"):
+            raise OSError("No space left on device")
+        write_job(job, jobs_dir)
+
+    monkeypatch.setattr(analysis_jobs, "_write_job", failing_write)
+    job, job_id = _run(tmp_path, lambda report: {"ok": True})
+    assert job_id not in analysis_jobs._active
+    # File còn trạng thái "running" cũ nhưng job không còn chạy -> báo lỗi
+    assert job["status"] == "error"
@@ -0,0 +1,73 @@
+import itertools
+import pytest
+import baseline_strata
+import compute_features as cf
+
+
+def _strata(keys):
+    """Strata index giả: baseline của mỗi stratum ghi lại key của nó"""
+    return {"strata": {key: {"count": 5, "baseline": {"key": key}} for key in keys}}
+
+
+ALL_KEYS = [baseline_strata.stratum_key(dict(zip(attrs, values)))
+            for r in range(4)
+            for attrs in itertools.combinations(baseline_strata.STRATA_ATTRIBUTES, r)
+            for values in [[{"club": "driver", "handedness": "left", "build": 1}[a] for a in attrs]]]
+
+
+def test_fallback_keys_order():
+    attrs = {"club": "driver", "handedness": "left", "build": 1}
+    assert list(baseline_strata.fallback_keys(attrs)) == [
+        "club=driver|handedness=left|build=1",
+        "club=driver|handedness=left",
+        "club=driver|build=1",
+        "handedness=left|build=1",
+        "club=driver",
+        "handedness=left",
+        "build=1",
+        "",
+    ]
+    # Thuộc tính None không tạo key
+    assert list(baseline_strata.fallback_keys({"club": "iron", "handedness": None})) == ["club=iron", ""]
+    assert list(baseline_strata.fallback_keys({})) == [""]
+
+
+def test_select_stratum_follows_fallback_order():
+    attrs = {"club": "driver", "handedness": "left", "build": 1}
+    order = list(baseline_strata.fallback_keys(attrs))
+    assert sorted(order) == sorted(ALL_KEYS)
+
+    # Bỏ dần stratum cụ thể nhất: lần nào cũng chọn key kế tiếp trong fallback_keys
+    for i, expected in enumerate(order):
+        strata = _strata(order[i:])
+        key, entry = baseline_strata.select_stratum(strata, attrs)
+        assert key == expected
+        assert entry["baseline"] == {"key": expected}
+        assert baseline_strata.select_baseline(strata, attrs) == {"key": expected}
+
+    # Mọi tập con của các stratum: luôn là key đầu tiên có mặt theo fallback_keys
+    for r in range(1, len(order)):
+        for keys in itertools.combinations(order[:-1], r):
+            strata = _strata(list(keys) + [""])
+            assert baseline_strata.select_stratum(strata, attrs)[0] == next(k for k in order if k in keys or k == "")
+
+
+def test_select_stratum_without_general_baseline():
+    with pytest.raises(KeyError):
+        baseline_strata.select_stratum(_strata(["club=driver"]), {"club": "iron"})
+
+
+def test_plain_baseline_passes_through():
+    baseline = {"top": {"x_factor": 40.0}}
+    assert baseline_strata.select_baseline(baseline, {"club": "driver"}) is baseline
+
+
+def test_calculate_score_uses_selected_stratum():
+    general = {phase: {"spine_tilt": 30.0} for phase in cf.SCORE_PHASES}
+    driver = {phase: {"spine_tilt": 60.0} for phase in cf.SCORE_PHASES}
+    strata = {"strata": {"": {"count": 20, "baseline": general},
+                         "club=driver": {"count": 6, "baseline": driver}}}
+    user = {phase: {"spine_tilt": 60.0} for phase in cf.SCORE_PHASES}
+
+    assert cf.calculate_score(user, strata, attributes={"club": "driver"}) == cf.calculate_score(user, driver)
+    assert cf.calculate_score(user, strata, attributes={"club": "iron"}) == cf.calculate_score(user, general)
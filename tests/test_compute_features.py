@@ -0,0 +1,162 @@
+import math
+import numpy as np
+import compute_features as cf
+
+
+# Công thức gốc (trước khi có bản batch), dùng làm chuẩn so sánh từng bit
+def _angle_3d_ref(a, b, c):
+    ba = np.array([a[0]-b[0], a[1]-b[1], a[2]-b[2]])
+    bc = np.array([c[0]-b[0], c[1]-b[1], c[2]-b[2]])
+    dot = np.dot(ba, bc)
+    mag1 = np.linalg.norm(ba)
+    mag2 = np.linalg.norm(bc)
+    if mag1 * mag2 == 0:
+        return 0
+    cos_angle = dot / (mag1 * mag2)
+    cos_angle = np.clip(cos_angle, -1, 1)
+    return math.degrees(math.acos(cos_angle))
+
+
+def _angle_2d_ref(a, b, c):
+    ba = (a[0]-b[0], a[1]-b[1])
+    bc = (c[0]-b[0], c[1]-b[1])
+    dot = ba[0]*bc[0] + ba[1]*bc[1]
+    mag1 = math.sqrt(ba[0]**2 + ba[1]**2)
+    mag2 = math.sqrt(bc[0]**2 + bc[1]**2)
+    if mag1*mag2 == 0:
+        return 0
+    cos_angle = dot/(mag1*mag2)
+    cos_angle = max(-1, min(1, cos_angle))
+    return math.degrees(math.acos(cos_angle))
+
+
+def _points(n, seed):
+    rng = np.random.default_rng(seed)
+    a, b, c = rng.random((3, n, 3)).tolist()
+    # Thêm trường hợp suy biến: b là trung điểm (góc ~180°) và vector độ dài 0
+    a += a[:100]
+    b += [[(x + z) / 2 for x, z in zip(p, q)] for p, q in zip(a[:100], c[:100])]
+    c += c[:100]
+    a.append([0.5, 0.5, 0.5]); b.append([0.5, 0.5, 0.5]); c.append([0.1, 0.2, 0.3])
+    return a, b, c
+
+
+def test_angle_2d_matches_original_formula():
+    a, b, c = _points(20000, 0)
+    for p, q, r in zip(a, b, c):
+        assert cf.angle_2d(p, q, r) == _angle_2d_ref(p, q, r)
+
+
+def test_angle_3d_matches_original_formula():
+    a, b, c = _points(20000, 1)
+    for p, q, r in zip(a, b, c):
+        assert cf.angle_3d(p, q, r) == _angle_3d_ref(p, q, r)
+
+
+def test_batch_kernels_close_to_scalar():
+    # Gần 180° arccos rất nhạy: lệch 1 ulp ở cos -> ~1e-6 độ
+    a, b, c = _points(2000, 2)
+    ref_2d = [_angle_2d_ref(p, q, r) for p, q, r in zip(a, b, c)]
+    ref_3d = [_angle_3d_ref(p, q, r) for p, q, r in zip(a, b, c)]
+    np.testing.assert_allclose(cf.angle_2d_batch(a, b, c), ref_2d, rtol=0, atol=1e-5)
+    np.testing.assert_allclose(cf.angle_3d_batch(a, b, c), ref_3d, rtol=0, atol=1e-5)
+
+
+def _detect_swing_phases_ref(frames):
+    # detect_swing_phases trước khi có engine vector hoá
+    if len(frames) < 20:
+        return None
+    hip_rotations = []
+    for pts in frames:
+        l_hip = pts[23]
+        r_hip = pts[24]
+        mid_hip = [(l_hip[i] + r_hip[i])/2 for i in range(3)]
+        hip_rotations.append(_angle_2d_ref(l_hip, mid_hip, r_hip))
+    hip_rotations = np.convolve(hip_rotations, np.ones(5)/5, mode='same')
+    setup_idx = int(len(frames) * 0.1)
+    top_idx = np.argmax(hip_rotations[:int(len(frames)*0.6)])
+    target_rotation = hip_rotations[setup_idx]
+    impact_candidates = hip_rotations[top_idx:]
+    impact_idx = top_idx + np.argmin(np.abs(impact_candidates - target_rotation))
+    follow_idx = int(len(frames) * 0.8)
+    return {"setup": setup_idx, "top": top_idx, "impact": impact_idx, "follow": follow_idx}
+
+
+def _synthetic_swing(rng, n):
+    # Landmarks trôi ngẫu nhiên; hip rotation luôn ~180° (tín hiệu suy biến)
+    base = rng.random((33, 3))
+    frames = base + np.cumsum(rng.normal(0, 0.01, (n, 33, 3)), axis=0)
+    return frames.astype(np.float32)
+
+
+def test_detect_swing_phases_matches_original():
+    rng = np.random.default_rng(4)
+    for _ in range(300):
+        frames = _synthetic_swing(rng, int(rng.integers(20, 120)))
+        as_list = frames.tolist()
+        expected = _detect_swing_phases_ref(as_list)
+        assert cf.detect_swing_phases(as_list) == expected
+        # File .npz (array float32) phải chọn đúng các frame như JSON
+        assert cf.detect_swing_phases(frames) == expected
+
+
+def _noisy_features(baseline, view_type, n, seed):
+    """Features quanh baseline, lệch 0..4 tolerance để rơi vào mọi khoảng chấm điểm
+
+    Có cả swing thiếu chỉ số / thiếu phase / phase lạ và features rỗng.
+    """
+    rng = np.random.default_rng(seed)
+    weights = cf.SCORE_WEIGHTS[view_type]
+    features_list = []
+    for i in range(n):
+        features = {}
+        for phase in cf.SCORE_PHASES:
+            if i % 7 == 3 and phase == "top":
+                continue
+            features[phase] = {}
+            for metric in cf.FEATURE_NAMES[view_type]:
+                if i % 5 == 1 and metric == cf.FEATURE_NAMES[view_type][0]:
+                    continue
+                tol = weights[phase].get(metric, (0, 10))[1]
+                features[phase][metric] = baseline[phase][metric] + rng.choice([-1, 1]) * rng.uniform(0, 4) * tol
+        if i % 11 == 5:
+            features["waggle"] = {"x_factor": 1.0}
+        features_list.append(features if i % 13 != 7 else {})
+    return features_list
+
+
+def test_scores_batch_matches_calculate_score():
+    for view_type in ("side", "back"):
+        baseline = {phase: {m: float(v) for m, v in zip(cf.FEATURE_NAMES[view_type],
+                                                        np.linspace(20, 160, len(cf.FEATURE_NAMES[view_type])))}
+                    for phase in cf.SCORE_PHASES}
+        features_list = _noisy_features(baseline, view_type, 300, seed=len(view_type))
+        table = cf.compile_score_table(view_type)
+        total, metric_scores, phase_scores = cf.calculate_scores_batch(
+            cf.features_to_tensor(features_list, view_type), baseline, view_type, table=table)
+
+        for n, features in enumerate(features_list):
+            score, detailed = cf.calculate_score(features, baseline, view_type)
+            assert round(total[n], 1) == score
+            for p, phase in enumerate(table["phases"]):
+                if phase not in detailed:
+                    assert np.isnan(phase_scores[n, p])
+                    continue
+                assert round(phase_scores[n, p], 1) == detailed[phase]["phase_score"]
+                for m, metric in enumerate(table["metrics"]):
+                    if metric in detailed[phase]:
+                        assert round(metric_scores[n, p, m], 1) == detailed[phase][metric]["score"]
+                    else:
+                        assert np.isnan(metric_scores[n, p, m])
+
+
+def test_scores_batch_on_real_features():
+    import json
+    import os
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "baseline_pro_side.json")
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rng = np.random.default_rng(5)
+    features_list = [cf.compute_swing_features(rng.random((60, 33, 3)).tolist(), "side") for _ in range(50)]
+    total, _, _ = cf.calculate_scores_batch(cf.features_to_tensor(features_list), baseline)
+    assert [round(t, 1) for t in total] == [cf.calculate_score(f, baseline)[0] for f in features_list]
@@ -0,0 +1,129 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+import cv2
+import numpy as np
+import pytest
+import extract_pose
+import landmark_cache
+
+
+def _future(result=None, error=None):
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+def test_process_folder_records_failed_futures(tmp_path, capsys):
+    for name in ("a.mp4", "b.mp4", "c.mp4"):
+        (tmp_path / name).write_bytes(b"")
+    files = extract_pose._list_videos(str(tmp_path))
+    ok = {"file": files[0], "status": "success", "frames": 10, "cached": False}
+    futures = [
+        _future((ok, "   ✅ Saved 10 frames\n")),
+        _future(error=BrokenProcessPool("worker died")),
+        _future(error=BrokenProcessPool("worker died")),
+    ]
+
+    extract_pose.process_folder(str(tmp_path), futures=futures)
+
+    out = capsys.readouterr().out
+    assert "✅ Success: 1/3" in out
+    assert "❌ Failed: 2/3" in out
+    # Future lỗi không tra cache -> không tính là miss
+    assert "⚡ Landmark cache: 0 hits, 1 misses" in out
+    for name in files[1:]:
+        assert f"   - {name}: worker died" in out
+
+
+
+@pytest.mark.parametrize("outcome, expected", [
+    ("hit", {"status": "success", "cached": True}),
+    ("miss", {"status": "success", "cached": False}),
+    ("miss_failed", {"status": "failed", "cached": False}),
+    ("no_cache", {"status": "success"}),
+    ("error", {"status": "error"}),
+])
+def test_process_video_cache_result(tmp_path, monkeypatch, outcome, expected):
+    frames = np.zeros((4, 33, 3)).tolist()
+
+    def fake_extract(video_path, **kwargs):
+        if outcome == "error":
+            raise RuntimeError("không mở được video")
+        if outcome == "hit":
+            landmark_cache.cache_stats["hits"] += 1
+        elif outcome.startswith("miss"):
+            landmark_cache.cache_stats["misses"] += 1
+        if outcome == "miss_failed":
+            return None
+        return frames, {"fps": 30.0}
+
+    monkeypatch.setattr(extract_pose, "extract_landmarks", fake_extract)
+    result = extract_pose._process_video(str(tmp_path / "a.mp4"), str(tmp_path))
+    assert result["status"] == expected["status"]
+    assert result.get("cached") == expected.get("cached")
+    assert ("cached" in result) == ("cached" in expected)
+
+
+def test_summary_counts_only_cache_lookups(tmp_path, capsys):
+    for name in ("a.mp4", "b.mp4", "c.mp4", "d.mp4"):
+        (tmp_path / name).write_bytes(b"")
+    files = extract_pose._list_videos(str(tmp_path))
+    results = [
+        {"file": files[0], "status": "success", "frames": 10, "cached": True},
+        {"file": files[1], "status": "success", "frames": 10, "cached": False},
+        {"file": files[2], "status": "failed", "frames": 0, "cached": False},
+        {"file": files[3], "status": "error", "frames": 0, "error": "boom"},
+    ]
+    futures = [_future((r, "")) for r in results]
+
+    extract_pose.process_folder(str(tmp_path), futures=futures)
+
+    out = capsys.readouterr().out
+    assert "❌ Failed: 2/4" in out
+    assert "⚡ Landmark cache: 1 hits, 2 misses" in out
+
+
+def test_summary_without_cache(tmp_path, capsys):
+    (tmp_path / "a.mp4").write_bytes(b"")
+    files = extract_pose._list_videos(str(tmp_path))
+    ok = {"file": files[0], "status": "success", "frames": 10}
+
+    extract_pose.process_folder(str(tmp_path), futures=[_future((ok, ""))])
+
+    assert "Landmark cache" not in capsys.readouterr().out
+
+
+class _FakeCoarsePose:
+    """Cổ tay trôi rất chậm, chỉ vung mạnh ở frame 40-50"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def reset(self):
+        self.calls = 0
+
+    def process(self, rgb):
+        i = self.calls
+        self.calls += 1
+        x = 0.001 * i + 0.05 * min(max(i - 40, 0), 10)
+        point = SimpleNamespace(x=x, y=0.5)
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=[point] * 33))
+
+
+def test_find_swing_window_motion_ratio_zero(tmp_path):
+    path = str(tmp_path / "swing.avi")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (64, 48))
+    for _ in range(100):
+        out.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    out.release()
+
+    options = dict(stride=1, margin_sec=0, max_gap_sec=0)
+    start, end = extract_pose.find_swing_window(path, pose=_FakeCoarsePose(), **options)
+    assert 35 <= start and end <= 55
+
+    # motion_ratio=0: mọi frame đều "chuyển động" -> cả video, không bị thay bằng mặc định
+    assert extract_pose.find_swing_window(path, pose=_FakeCoarsePose(), motion_ratio=0, **options) == (0, 99)
\ No newline at end of file
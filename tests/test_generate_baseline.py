@@ -0,0 +1,105 @@
+import json
+import os
+import numpy as np
+import generate_baseline
+
+
+def _write_baseline(path, baseline):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f)
+
+
+def test_validate_ignores_ci_of_other_baseline(tmp_path):
+    output = str(tmp_path / "baseline_pro_side.json")
+    baseline = {"top": {"spine_angle": 40.0}}
+    # Mọi swing cùng 1 giá trị -> CI "degenerate", validate phải báo lỗi
+    columns = {("top", "spine_angle"): np.full(10, 40.0)}
+    _write_baseline(output, baseline)
+    generate_baseline._save_ci(generate_baseline.bootstrap_baseline(columns, baseline, samples=50), output)
+    assert not generate_baseline.validate_baseline(output)
+
+    # Baseline ghi lại (vd chạy không --bootstrap ở bản cũ): CI cũ không còn áp dụng
+    _write_baseline(output, {"top": {"spine_angle": 41.0}})
+    assert generate_baseline.validate_baseline(output)
+
+
+def test_remove_ci(tmp_path):
+    output = str(tmp_path / "baseline_pro_side.json")
+    ci_file = generate_baseline._ci_path(output)
+    with open(ci_file, "w", encoding="utf-8") as f:
+        f.write("{}")
+    generate_baseline._remove_ci(output)
+    assert not os.path.exists(ci_file)
+    generate_baseline._remove_ci(output)  # Không có file thì bỏ qua
+
+
+def _write_swings(folder, seeds):
+    import landmark_io
+    for seed in seeds:
+        frames = np.random.default_rng(seed).random((60, 33, 3)).astype(np.float32)
+        landmark_io.save_landmarks(str(folder / f"swing{seed:02d}.npz"), frames, fps=30)
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_incremental_matches_full_rebuild(tmp_path):
+    import baseline_strata
+    from compute_features import FEATURE_NAMES
+    from online_phases import PHASES
+
+    pose_dir = tmp_path / "poses"
+    pose_dir.mkdir()
+    _write_swings(pose_dir, range(8))
+    with open(pose_dir / "attributes.json", "w", encoding="utf-8") as f:
+        json.dump({f"swing{i:02d}": {"club": "driver" if i % 3 else "iron"} for i in range(12)}, f)
+    incremental = str(tmp_path / "incremental.json")
+    full = str(tmp_path / "full.json")
+
+    def check():
+        generate_baseline.generate_baseline(str(pose_dir), full)
+        assert _read(incremental) == _read(full)
+        assert (_read(baseline_strata.strata_path(incremental))
+                == _read(baseline_strata.strata_path(full)))
+
+    # Lần đầu chưa có state
+    generate_baseline.update_baseline(str(pose_dir), incremental)
+    check()
+    with open(full, encoding="utf-8") as f:
+        baseline = json.load(f)
+    assert list(baseline) == PHASES
+    assert all(list(metrics) == FEATURE_NAMES["side"] for metrics in baseline.values())
+
+    # Thêm + xoá file: chỉ tính lại phần thay đổi nhưng kết quả như dựng lại từ đầu
+    _write_swings(pose_dir, [8, 9, 10])
+    os.remove(pose_dir / "swing02.npz")
+    os.remove(pose_dir / "swing05.npz")
+    generate_baseline.update_baseline(str(pose_dir), incremental)
+    check()
+
+
+def test_parallel_matches_serial(tmp_path):
+    import baseline_strata
+
+    pose_dir = tmp_path / "poses"
+    pose_dir.mkdir()
+    _write_swings(pose_dir, range(12))
+    # File lỗi / quá ngắn cũng phải được bỏ qua giống nhau
+    (pose_dir / "broken.json").write_text("{not json")
+    with open(pose_dir / "short.json", "w", encoding="utf-8") as f:
+        json.dump(np.zeros((5, 33, 3)).tolist(), f)
+    with open(pose_dir / "attributes.json", "w", encoding="utf-8") as f:
+        json.dump({f"swing{i:02d}": {"club": "driver", "handedness": "right"} for i in range(12)}, f)
+
+    serial = str(tmp_path / "serial.json")
+    parallel = str(tmp_path / "parallel.json")
+    generate_baseline.generate_baseline(str(pose_dir), serial, workers=1, bootstrap=50)
+    generate_baseline.generate_baseline(str(pose_dir), parallel, workers=3, bootstrap=50)
+
+    assert _read(serial) == _read(parallel)
+    assert _read(baseline_strata.strata_path(serial)) == _read(baseline_strata.strata_path(parallel))
+    ci_serial = json.loads(_read(generate_baseline._ci_path(serial)))
+    ci_parallel = json.loads(_read(generate_baseline._ci_path(parallel)))
+    assert ci_serial == ci_parallel
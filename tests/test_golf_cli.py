@@ -0,0 +1,69 @@
+import json
+import os
+import numpy as np
+import golf_cli
+import landmark_io
+
+BASELINE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "baseline_pro_side.json")
+
+
+def _frames(seed, n=60):
+    return np.random.default_rng(seed).random((n, 33, 3)).astype(np.float32)
+
+
+def _touch(folder, *names):
+    for name in names:
+        (folder / name).write_bytes(b"")
+
+
+def test_iter_files_one_file_per_swing(tmp_path):
+    _touch(tmp_path, "a.mp4", "a.npz", "b.json", "b.npz", "c.json", "d.MOV", "d.avi",
+           "attributes.json", "notes.txt")
+    files = [os.path.basename(f) for f in golf_cli._iter_files([str(tmp_path)])]
+    assert files == ["a.npz", "b.npz", "c.json", "d.MOV"]
+
+
+def test_iter_files_keeps_explicit_files(tmp_path):
+    paths = [str(tmp_path / "x.mp4"), str(tmp_path / "x.npz")]
+    assert list(golf_cli._iter_files(paths)) == paths
+
+
+def _json_lines(out):
+    return [json.loads(line) for line in out.splitlines()]
+
+
+def test_features_json_lines(tmp_path, capsys):
+    for i in range(3):
+        landmark_io.save_landmarks(str(tmp_path / f"swing{i}.npz"), _frames(i), fps=30)
+    assert golf_cli.main(["features", str(tmp_path), "--view", "side"]) == 0
+
+    rows = _json_lines(capsys.readouterr().out)
+    assert [os.path.basename(r["file"]) for r in rows] == ["swing0.npz", "swing1.npz", "swing2.npz"]
+    assert all(set(r["features"]) >= {"setup", "top", "impact"} for r in rows)
+
+
+def test_score_json_video_logs_go_to_stderr(tmp_path, capsys, monkeypatch):
+    import extract_pose
+
+    def fake_extract(path, **kwargs):
+        print("   📊 Detection rate: 100.0% (60/60 frames)")
+        return _frames(7).tolist()
+
+    monkeypatch.setattr(extract_pose, "extract_landmarks", fake_extract)
+    _touch(tmp_path, "video.mp4")
+    landmark_io.save_landmarks(str(tmp_path / "pose.npz"), _frames(3), fps=30)
+    (tmp_path / "broken.json").write_text("not json")
+
+    code = golf_cli.main(["score", str(tmp_path), "--view", "side", "--baseline", BASELINE,
+                          "--no-strata", "--json"])
+    captured = capsys.readouterr()
+    assert code == 1  # broken.json
+
+    rows = _json_lines(captured.out)
+    assert [os.path.basename(r["file"]) for r in rows] == ["pose.npz", "video.mp4"]
+    for r in rows:
+        assert 0 <= r["score"] <= 100
+        assert r["detailed_scores"]
+    assert "Detection rate" in captured.err
+    assert "broken.json" in captured.err
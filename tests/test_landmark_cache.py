@@ -0,0 +1,37 @@
+import os
+import numpy as np
+import pytest
+import landmark_cache
+
+
+def _frames(n=5):
+    return np.random.default_rng(0).random((n, 33, 3)).astype(np.float32).tolist()
+
+
+def test_roundtrip(tmp_path):
+    landmark_cache.save_cached("k", _frames(), {"fps": 30.0}, cache_dir=str(tmp_path))
+    frames, meta = landmark_cache.load_cached("k", cache_dir=str(tmp_path))
+    assert frames == _frames()
+    assert meta["fps"] == 30.0
+
+
+def test_missing_entry(tmp_path):
+    assert landmark_cache.load_cached("missing", cache_dir=str(tmp_path)) is None
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[: len(data) // 2],   # Ghi dở
+    lambda data: data[:10],                # Gần như rỗng
+    lambda data: b"",                      # Rỗng
+    lambda data: b"not a zip file" * 100,  # Rác
+])
+def test_corrupt_entry_is_removed(tmp_path, corrupt):
+    landmark_cache.save_cached("k", _frames(), cache_dir=str(tmp_path))
+    path = landmark_cache._entry_path("k", str(tmp_path))
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(corrupt(data))
+
+    assert landmark_cache.load_cached("k", cache_dir=str(tmp_path)) is None
+    assert not os.path.exists(path)
@@ -0,0 +1,97 @@
+import json
+import os
+import numpy as np
+import pytest
+import generate_baseline
+import landmark_io
+
+
+def _landmarks(n=6, seed=0):
+    return np.random.default_rng(seed).random((n, 33, 3)).astype(np.float32)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_roundtrip(tmp_path, mmap):
+    landmarks = _landmarks()
+    visibility = np.random.default_rng(1).random((6, 33)).astype(np.float32)
+    path = str(tmp_path / "swing.npz")
+    landmark_io.save_landmarks(path, landmarks.tolist(), fps=59.94,
+                               frame_indices=[3, 4, 6, 7, 9, 12], visibility=visibility)
+
+    loaded, meta = landmark_io.load_landmarks(path, mmap=mmap)
+    assert isinstance(loaded, np.memmap) == mmap
+    assert loaded.shape == (6, 33, 3) and loaded.dtype == np.float32
+    np.testing.assert_array_equal(loaded, landmarks)
+    assert meta["fps"] == 59.94
+    np.testing.assert_array_equal(meta["frame_indices"], [3, 4, 6, 7, 9, 12])
+    np.testing.assert_array_equal(meta["visibility"], visibility)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_roundtrip_defaults(tmp_path, mmap):
+    path = str(tmp_path / "swing.npz")
+    landmark_io.save_landmarks(path, _landmarks(4))
+
+    loaded, meta = landmark_io.load_landmarks(path, mmap=mmap)
+    np.testing.assert_array_equal(loaded, _landmarks(4))
+    assert meta["fps"] is None
+    assert meta["visibility"] is None
+    np.testing.assert_array_equal(meta["frame_indices"], np.arange(4))
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_roundtrip_empty(tmp_path, mmap):
+    path = str(tmp_path / "empty.npz")
+    landmark_io.save_landmarks(path, [], fps=30)
+
+    loaded, meta = landmark_io.load_landmarks(path, mmap=mmap)
+    assert loaded.shape == (0, 33, 3)
+    assert len(meta["frame_indices"]) == 0
+    assert meta["fps"] == 30.0
+
+
+def test_json_matches_npz(tmp_path):
+    landmarks = _landmarks()
+    json_path = str(tmp_path / "swing.json")
+    with open(json_path, "w") as f:
+        json.dump(landmarks.tolist(), f)
+
+    from_json, meta = landmark_io.load_landmarks(json_path)
+    assert meta["fps"] is None and meta["visibility"] is None
+    npz_path = landmark_io.convert_json_to_npz(json_path, fps=25)
+    from_npz, npz_meta = landmark_io.load_landmarks(npz_path)
+    np.testing.assert_array_equal(from_json, landmarks)
+    np.testing.assert_array_equal(from_npz, from_json)
+    assert npz_meta["fps"] == 25.0
+
+
+def test_convert_folder_skips_non_landmark_json(tmp_path):
+    for name in ("a.json", "b.json"):
+        with open(tmp_path / name, "w") as f:
+            json.dump(_landmarks(3).tolist(), f)
+    sidecars = {
+        "attributes.json": {"a": {"club": "driver"}},
+        "baseline_pro_side.ci.json": {"hash": "x"},
+        "baseline_pro_side.strata.json": {"strata": {}},
+        "baseline_pro_side.state.json": {"files": {}},
+        "notes.json": {"text": "không phải landmarks"},
+        "ragged.json": [[[0.0, 0.0, 0.0]] * 33, [[0.0, 0.0]] * 33],
+    }
+    for name, data in sidecars.items():
+        with open(tmp_path / name, "w") as f:
+            json.dump(data, f)
+
+    assert landmark_io.convert_folder(str(tmp_path)) == 2
+    npz = sorted(f for f in os.listdir(tmp_path) if f.endswith(".npz"))
+    assert npz == ["a.npz", "b.npz"]
+    # convert_folder và generate_baseline dùng cùng một bộ lọc
+    assert generate_baseline._list_pose_files(str(tmp_path)) == ["a.npz", "b.npz", "notes.json", "ragged.json"]
+
+
+def test_convert_rejects_bad_shape(tmp_path):
+    path = str(tmp_path / "bad.json")
+    with open(path, "w") as f:
+        json.dump([[[0.0, 0.0, 0.0]] * 32], f)
+    with pytest.raises(ValueError):
+        landmark_io.convert_json_to_npz(path)
+    assert not os.path.exists(tmp_path / "bad.npz")
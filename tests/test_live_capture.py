@@ -0,0 +1,109 @@
+import threading
+import time
+from types import SimpleNamespace
+import cv2
+import numpy as np
+import live_capture
+
+
+def _write_video(path, n, fps):
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (64, 48))
+    for i in range(n):
+        out.write(np.full((48, 64, 3), i % 255, dtype=np.uint8))
+    out.release()
+
+
+def _slot():
+    return {"cond": threading.Condition(), "item": None, "done": False, "captured": 0, "dropped": 0}
+
+
+def test_reader_counts_dropped_frames(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    _write_video(path, 40, 30)
+    slot = _slot()
+
+    # Không ai lấy frame: mỗi frame mới ghi đè frame trước -> bị tính là drop
+    live_capture._reader(path, slot, threading.Event(), realtime=False, follow=False, idle_timeout=1.0)
+
+    assert slot["done"]
+    assert slot["captured"] == 40
+    assert slot["dropped"] == 39
+    assert slot["item"][0] == 39
+
+
+def test_reader_idle_timeout(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    _write_video(path, 10, 30)
+    slot = _slot()
+
+    # follow=True: hết file thì chờ ghi thêm, quá idle_timeout không có frame mới thì dừng
+    t0 = time.monotonic()
+    live_capture._reader(path, slot, threading.Event(), realtime=False, follow=True, idle_timeout=0.3)
+    elapsed = time.monotonic() - t0
+
+    assert slot["done"]
+    assert slot["captured"] == 10
+    assert 0.3 <= elapsed < 2.0
+
+
+class FakePose:
+    """Pose giả: chạy mất `delay[complexity]` giây, ghi lại các lần process / reset"""
+
+    delays = {}
+    created = []
+
+    def __init__(self, model_complexity, **kwargs):
+        self.complexity = model_complexity
+        self.log = []
+        FakePose.created.append(self)
+
+    def process(self, rgb):
+        self.log.append("process")
+        time.sleep(FakePose.delays[self.complexity])
+        return SimpleNamespace(pose_landmarks=None)
+
+    def reset(self):
+        self.log.append("reset")
+
+    def close(self):
+        pass
+
+
+def _run_live(tmp_path, monkeypatch, delays, **settings):
+    path = str(tmp_path / "live.avi")
+    _write_video(path, 100, 100)  # 1 giây phát theo tốc độ thực
+    FakePose.delays = delays
+    FakePose.created = []
+    monkeypatch.setattr(live_capture.mp_pose, "Pose", FakePose)
+    metrics = {}
+    results = list(live_capture.iter_live(path, {}, realtime=True, metrics=metrics, **settings))
+    assert results == []  # Pose giả không có landmarks -> không có swing
+    return metrics
+
+
+def test_downgrades_when_over_budget(tmp_path, monkeypatch):
+    metrics = _run_live(tmp_path, monkeypatch, {0: 0.03, 1: 0.07, 2: 0.1},
+                        complexity=2, latency_budget=0.05, adapt_window=3)
+
+    assert metrics["complexity"] == 0
+    assert metrics["switches"] == 2
+    assert [p.complexity for p in FakePose.created] == [2, 1, 0]
+    # Inference chậm hơn khoảng cách giữa 2 frame -> frame cũ bị bỏ
+    assert metrics["dropped"] > 0
+    assert metrics["processed"] + metrics["dropped"] == metrics["captured"] == 100
+    assert metrics["drop_rate"] == metrics["dropped"] / 100
+
+
+def test_upgrade_downgrade_resets_reused_model(tmp_path, monkeypatch):
+    # Model 0 dư budget -> nâng lên 1, model 1 quá budget -> hạ về 0, lặp lại
+    metrics = _run_live(tmp_path, monkeypatch, {0: 0.0, 1: 0.07},
+                        complexity=0, max_complexity=1, latency_budget=0.05, adapt_window=3)
+
+    assert metrics["switches"] >= 3
+    assert sorted(p.complexity for p in FakePose.created) == [0, 1]  # Không tạo lại model
+    for pose in FakePose.created:
+        # Mỗi lần quay lại model đã có: reset trước khi process tiếp
+        runs = "".join("r" if e == "reset" else "p" for e in pose.log)
+        assert runs.startswith("p") and "rr" not in runs
+    resets = sum(p.log.count("reset") for p in FakePose.created)
+    assert resets == metrics["switches"] - 1
@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+import cv2
+import numpy as np
+import motion_gate
+import pose_stream
+
+
+def _frame(shift=0, width=320, height=240):
+    """Ảnh BGR có 1 hình chữ nhật sáng, dịch ngang `shift` px"""
+    img = np.full((height, width, 3), 40, dtype=np.uint8)
+    cv2.rectangle(img, (100 + shift, 60), (160 + shift, 200), (220, 200, 180), -1)
+    return img
+
+
+def test_frame_signature_shape():
+    sig = motion_gate.frame_signature(_frame())
+    assert sig.shape == (48, motion_gate.GATE_WIDTH)
+    assert sig.dtype == np.uint8
+
+
+def test_is_static():
+    base = motion_gate.frame_signature(_frame())
+    same = motion_gate.frame_signature(_frame())
+    moved = motion_gate.frame_signature(_frame(shift=40))
+    threshold = motion_gate.DEFAULT_MOTION_THRESHOLD
+
+    assert motion_gate.is_static(base, same, threshold)
+    assert not motion_gate.is_static(base, moved, threshold)
+    assert not motion_gate.is_static(None, same, threshold)  # Chưa có frame nào
+    assert not motion_gate.is_static(base, same, None)       # Gate tắt
+    assert not motion_gate.is_static(base, same, 0)
+
+
+class CountingPose:
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, rgb):
+        self.calls += 1
+        return SimpleNamespace(pose_landmarks=None)
+
+
+def _write_video(path, shifts):
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (320, 240))
+    for shift in shifts:
+        out.write(_frame(shift))
+    out.release()
+
+
+def test_skipped_frame_count(tmp_path):
+    # 10 frame đứng yên, 10 frame chuyển động, 10 frame đứng yên
+    shifts = [0] * 10 + [8 * i for i in range(1, 11)] + [80] * 10
+    path = str(tmp_path / "gate.avi")
+    _write_video(path, shifts)
+
+    pose = CountingPose()
+    stats = {}
+    idx = [i for i, _, _ in pose_stream.iter_landmarks(
+        path, pose, motion_threshold=motion_gate.DEFAULT_MOTION_THRESHOLD, stats=stats)]
+
+    assert idx == list(range(30))
+    assert stats["frames"] == 30
+    # Chỉ frame đầu của mỗi đoạn tĩnh và các frame chuyển động chạy pose
+    assert pose.calls == 1 + 10
+    assert stats["skipped"] == 30 - pose.calls
+
+
+def test_gate_off_runs_every_frame(tmp_path):
+    path = str(tmp_path / "gate.avi")
+    _write_video(path, [0] * 15)
+    pose = CountingPose()
+    stats = {}
+    list(pose_stream.iter_landmarks(path, pose, stats=stats))
+    assert pose.calls == 15
+    assert stats["skipped"] == 0
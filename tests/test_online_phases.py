@@ -0,0 +1,63 @@
+import numpy as np
+import online_phases
+
+FPS = 30
+
+
+def _swing_trace(fps=FPS):
+    """Landmarks tổng hợp của 1 swing: đứng yên -> backswing -> top -> impact -> finish -> đứng yên
+
+    Độ cao cổ tay h (0 = hông, 1 = vai) theo thời gian, thân dài 0.3.
+    Trả về (list landmarks từng frame, frame đúng của top / impact).
+    """
+    keys_t = [0.0, 1.0, 1.9, 2.2, 2.6, 4.0]
+    keys_h = [0.2, 0.2, 1.4, 0.1, 1.5, 1.5]
+    n = int(keys_t[-1] * fps)
+    t = np.arange(n) / fps
+    h = np.interp(t, keys_t, keys_h)
+    x = 0.5 + 0.1 * np.sin(np.interp(t, keys_t, [0, 0, 2, 3, 4, 4]))
+
+    frames = []
+    for i in range(n):
+        pts = np.full((33, 3), 0.5)
+        pts[11:13, 1] = 0.4            # vai
+        pts[23:25, 1] = 0.7            # hông
+        pts[15:17, 0] = x[i]           # cổ tay
+        pts[15:17, 1] = 0.7 - h[i] * 0.3
+        frames.append(pts.tolist())
+    return frames, {"top": int(1.9 * fps), "impact": int(2.2 * fps)}
+
+
+def _events(frames, keep):
+    update = online_phases.make_phase_detector(FPS)
+    events = []
+    for idx, landmarks in enumerate(frames):
+        if keep(idx):
+            events.extend(dict(e, emitted=idx) for e in update(idx, landmarks))
+    return events
+
+
+def test_detects_all_phases_in_order():
+    frames, truth = _swing_trace()
+    events = _events(frames, lambda idx: True)
+    assert [e["phase"] for e in events] == online_phases.PHASES
+    by_phase = {e["phase"]: e["frame"] for e in events}
+    assert abs(by_phase["top"] - truth["top"]) <= 2
+    assert abs(by_phase["impact"] - truth["impact"]) <= 2
+
+
+def test_gapped_stream_matches_ungapped():
+    # Live bỏ frame: frame_index nhảy cóc, event vẫn phải giống lúc đủ frame
+    frames, _ = _swing_trace()
+    full = _events(frames, lambda idx: True)
+    rng = np.random.default_rng(0)
+    dropped = set(rng.choice(len(frames), size=len(frames) * 2 // 5, replace=False).tolist())
+
+    for keep in (lambda idx: idx % 2 == 0, lambda idx: idx % 3 != 1, lambda idx: idx not in dropped):
+        gapped = _events(frames, keep)
+        assert [e["phase"] for e in gapped] == [e["phase"] for e in full]
+        for a, b in zip(gapped, full):
+            assert abs(a["frame"] - b["frame"]) <= 3
+            assert abs(a["timestamp"] - b["timestamp"]) <= 3 / FPS
+            # still / lookahead tính theo frame_index -> phát event cùng thời điểm
+            assert abs(a["emitted"] - b["emitted"]) <= 3
@@ -0,0 +1,85 @@
+from types import SimpleNamespace
+import numpy as np
+import pose_roi
+import pose_stream
+
+WIDTH, HEIGHT = 1280, 720
+
+
+def test_geometry_changed():
+    box = (400, 100, 800, 700)
+    assert not pose_roi.geometry_changed(box, box)
+    assert not pose_roi.geometry_changed(box, (420, 110, 820, 710))   # Dịch 5%
+    assert pose_roi.geometry_changed(box, (500, 100, 900, 700))       # Dịch 25% chiều ngang
+    assert pose_roi.geometry_changed((0, 0, WIDTH, HEIGHT), box)      # Full frame -> crop
+
+
+class FakePose:
+    """Trả về landmarks của 1 người ở vị trí cho trước (toạ độ full frame)"""
+
+    def __init__(self):
+        self.center = None
+        self.resets = 0
+        self.input_shape = None
+
+    def process(self, image):
+        self.input_shape = image.shape
+        if self.center is None:
+            return SimpleNamespace(pose_landmarks=None)
+        # Người cao 0.5 frame, rộng 0.2 frame; toạ độ normalized theo input
+        cx, cy = self.center
+        box = self.box if image.shape[:2] != (HEIGHT, WIDTH) else (0, 0, WIDTH, HEIGHT)
+        points = []
+        for dx, dy in [(-0.1, -0.25), (0.1, -0.25), (-0.1, 0.25), (0.1, 0.25)] * 9:
+            x = ((cx + dx) * WIDTH - box[0]) / (box[2] - box[0])
+            y = ((cy + dy) * HEIGHT - box[1]) / (box[3] - box[1])
+            points.append(SimpleNamespace(x=x, y=y, z=0.0))
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=points[:33]))
+
+    def reset(self):
+        self.resets += 1
+
+
+def _stats():
+    return {"crop_frames": 0, "crop_time": 0.0, "full_frames": 0, "full_time": 0.0,
+            "fallbacks": 0, "resets": 0}
+
+
+def test_process_roi_keeps_tracking_on_small_box_changes():
+    rgb = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    pose = FakePose()
+    stats = _stats()
+    box = tracked = None
+    boxes = []
+
+    # Người trôi dần sang phải: box được tính lại vài lần nhưng mỗi lần lệch ít
+    for i in range(60):
+        pose.center = (0.4 + i * 0.003, 0.5)
+        pose.box = box
+        res, box, tracked = pose_stream.process_roi(pose, rgb, box, None, stats, tracked)
+        assert res.pose_landmarks is not None
+        boxes.append(box)
+
+    assert stats["full_frames"] == 1
+    assert len(set(boxes)) > 2       # Box có đổi theo người
+    assert stats["resets"] == 1      # Chỉ reset khi full frame -> crop
+    assert pose.resets == stats["resets"]
+
+
+def test_process_roi_lost_tracking_falls_back_without_reset():
+    rgb = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    pose = FakePose()
+    stats = _stats()
+    pose.center = (0.5, 0.5)
+    pose.box = None
+    _, box, tracked = pose_stream.process_roi(pose, rgb, None, None, stats)
+    pose.box = box
+    _, box, tracked = pose_stream.process_roi(pose, rgb, box, None, stats, tracked)
+    resets = stats["resets"]
+
+    # Người biến mất: crop không thấy -> full frame, MediaPipe tự detect lại nên không reset
+    pose.center = None
+    res, box, tracked = pose_stream.process_roi(pose, rgb, box, None, stats, tracked)
+    assert res.pose_landmarks is None and box is None and tracked is None
+    assert stats["fallbacks"] == 1
+    assert stats["resets"] == resets
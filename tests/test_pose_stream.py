@@ -0,0 +1,78 @@
+import contextlib
+import threading
+from types import SimpleNamespace
+import cv2
+import numpy as np
+import pose_stream
+
+FPS = 30
+
+
+def _wrist_heights(n):
+    """Độ cao cổ tay (0 = hông, 1 = vai): đứng yên -> top -> impact -> finish -> đứng yên rất lâu"""
+    t = np.arange(n) / FPS
+    return np.interp(t, [0.0, 0.5, 1.2, 1.5, 1.9], [0.3, 0.3, 1.4, -0.2, 1.5])
+
+
+class TracePose:
+    """Trả về landmarks của swing tổng hợp theo thứ tự frame được process"""
+
+    def __init__(self, heights):
+        self.heights = heights
+        self.calls = 0
+
+    def process(self, rgb):
+        h = self.heights[min(self.calls, len(self.heights) - 1)]
+        self.calls += 1
+        points = [SimpleNamespace(x=0.5, y=0.5, z=0.0, visibility=1.0) for _ in range(33)]
+        for i in (11, 12):
+            points[i].y = 0.4                 # vai
+        for i in (23, 24):
+            points[i].y = 0.7                 # hông
+        for i in (15, 16):
+            points[i].y = 0.7 - h * 0.3       # cổ tay
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=points))
+
+
+class ListWriter:
+    def __init__(self):
+        self.frames = 0
+
+    def write(self, frame):
+        self.frames += 1
+
+
+def _write_video(path, n):
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), FPS, (64, 48))
+    for i in range(n):
+        out.write(np.full((48, 64, 3), i % 255, dtype=np.uint8))
+    out.release()
+
+
+def test_follow_through_stops_stream_and_threads(tmp_path, monkeypatch):
+    # Không vẽ skeleton thật (landmarks giả), chỉ kiểm tra thread ghi nhận frame
+    monkeypatch.setattr(pose_stream.mp.solutions.drawing_utils, "draw_landmarks", lambda *a, **k: None)
+    n = 6 * FPS
+    path = str(tmp_path / "swing.avi")
+    _write_video(path, n)
+    threads_before = set(threading.enumerate())
+
+    pose = TracePose(_wrist_heights(n))
+    writer = ListWriter()
+    stats = {}
+    follow_done = pose_stream.make_follow_through_check(FPS)
+    stream = pose_stream.iter_landmarks(path, pose, writer=writer, stats=stats)
+    stopped_at = None
+    with contextlib.closing(stream):
+        for idx, _, landmarks in stream:
+            if follow_done(landmarks):
+                stopped_at = idx
+                break
+
+    # Finish ở ~1.9s + 0.3s đứng yên -> dừng trước khi đọc hết 6s video
+    assert stopped_at is not None and stopped_at < 3 * FPS
+    assert stats["frames"] == stopped_at + 1
+    assert pose.calls == stopped_at + 1
+    assert writer.frames == stopped_at + 1
+    # Thread decode / encode đã được join khi đóng generator
+    assert set(threading.enumerate()) == threads_before
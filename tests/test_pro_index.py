@@ -0,0 +1,94 @@
+import math
+import numpy as np
+import pytest
+import pro_index
+from compute_features import SCORE_WEIGHTS
+
+
+def _features(rng, view="side", drop=0.0):
+    """Features ngẫu nhiên cho mọi chỉ số được chấm điểm, bỏ bớt một phần nếu drop > 0"""
+    features = {}
+    for phase, metrics in SCORE_WEIGHTS[view].items():
+        values = {m: float(rng.normal(0, 30)) for m in metrics if rng.random() >= drop}
+        features[phase] = values
+    return features
+
+
+def _brute_force(entries, features, view="side"):
+    """Khoảng cách tính tay: chia tolerance, Pro thiếu -> trung bình các Pro có, user thiếu -> bỏ"""
+    dims = [(phase, metric, tol) for phase, metrics in SCORE_WEIGHTS[view].items()
+            for metric, (w, tol) in metrics.items() if w > 0]
+    result = []
+    for pro_id, name, pro in entries:
+        total = 0.0
+        for phase, metric, tol in dims:
+            if metric not in features.get(phase, {}):
+                continue
+            value = pro.get(phase, {}).get(metric)
+            if value is None:
+                known = [e[2][phase][metric] for e in entries if metric in e[2].get(phase, {})]
+                value = sum(known) / len(known) if known else 0.0
+            total += ((value - features[phase][metric]) / tol) ** 2
+        result.append((pro_id, name, math.sqrt(total)))
+    return sorted(result, key=lambda r: r[2])
+
+
+@pytest.mark.parametrize("k", [1, 3, 5, 12, 20])
+def test_top_k_matches_brute_force(k):
+    rng = np.random.default_rng(0)
+    entries = [(f"pro{i}", f"Pro {i}", _features(rng)) for i in range(12)]
+    index = pro_index.build_index(entries)
+    user = _features(rng)
+
+    got = pro_index.nearest_pros(index, user, k=k)
+    expected = _brute_force(entries, user)[:k]
+    assert [g[0] for g in got] == [e[0] for e in expected]
+    assert [g[1] for g in got] == [e[1] for e in expected]
+    np.testing.assert_allclose([g[2] for g in got], [e[2] for e in expected], rtol=1e-9)
+    assert [g[2] for g in got] == sorted(g[2] for g in got)
+
+
+def test_missing_values():
+    rng = np.random.default_rng(1)
+    # Pro thiếu chỉ số (thay bằng trung bình), user thiếu chỉ số (bỏ chiều đó)
+    entries = [(f"pro{i}", f"Pro {i}", _features(rng, drop=0.3)) for i in range(8)]
+    index = pro_index.build_index(entries)
+    assert not np.isnan(index["vectors"]).any()
+
+    user = _features(rng, drop=0.5)
+    got = pro_index.nearest_pros(index, user, k=8)
+    expected = _brute_force(entries, user)
+    assert [g[0] for g in got] == [e[0] for e in expected]
+    np.testing.assert_allclose([g[2] for g in got], [e[2] for e in expected], rtol=1e-9)
+    assert all(math.isfinite(g[2]) for g in got)
+
+
+def test_metric_missing_for_every_pro():
+    rng = np.random.default_rng(2)
+    entries = [(f"pro{i}", f"Pro {i}", _features(rng)) for i in range(4)]
+    for _, _, features in entries:
+        features["top"].pop("x_factor", None)
+    index = pro_index.build_index(entries)
+    assert not np.isnan(index["vectors"]).any()
+    assert all(math.isfinite(g[2]) for g in pro_index.nearest_pros(index, _features(rng)))
+
+
+def test_empty_query_and_index():
+    rng = np.random.default_rng(3)
+    entries = [(f"pro{i}", f"Pro {i}", _features(rng)) for i in range(3)]
+    index = pro_index.build_index(entries)
+
+    # User không có chỉ số nào -> mọi Pro cách 0, giữ thứ tự trong index
+    assert pro_index.nearest_pros(index, {}, k=3) == [(e[0], e[1], 0.0) for e in entries]
+    assert pro_index.nearest_pros(pro_index.build_index([]), _features(rng)) == []
+
+
+def test_save_load_roundtrip(tmp_path):
+    rng = np.random.default_rng(4)
+    entries = [(f"pro{i}", f"Pro {i}", _features(rng)) for i in range(5)]
+    index = pro_index.build_index(entries)
+    path = str(tmp_path / "index.npz")
+    pro_index.save_index(index, path)
+
+    user = _features(rng)
+    assert pro_index.nearest_pros(pro_index.load_index(path), user) == pro_index.nearest_pros(index, user)
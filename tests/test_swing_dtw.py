@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import swing_dtw
+
+
+def _dtw_ref(a, b, band):
+    """DTW từng ô trên ma trận (n+1) x (m+1) đầy đủ, cùng band và cùng luật truy ngược"""
+    n, m = len(a), len(b)
+    lo, hi = swing_dtw._band_limits(n, m, band)
+    acc = np.full((n + 1, m + 1), np.inf)
+    acc[0, 0] = 0
+    for i in range(1, n + 1):
+        for j in range(lo[i - 1] + 1, hi[i - 1] + 2):
+            cost = np.linalg.norm(a[i - 1] - b[j - 1])
+            acc[i, j] = cost + min(acc[i - 1, j - 1], acc[i - 1, j], acc[i, j - 1])
+    if not np.isfinite(acc[n, m]):
+        return None, None
+
+    path = []
+    i, j = n, m
+    while i > 0 and j > 0:
+        path.append((i - 1, j - 1))
+        both, up, left = acc[i - 1, j - 1], acc[i - 1, j], acc[i, j - 1]
+        if both <= up and both <= left:
+            i, j = i - 1, j - 1
+        elif up <= left:
+            i -= 1
+        else:
+            j -= 1
+    return acc[n, m], np.array(path[::-1])
+
+
+@pytest.mark.parametrize("n, m", [(1, 1), (1, 6), (6, 1), (2, 3), (40, 55), (90, 60), (17, 120)])
+@pytest.mark.parametrize("band", [0.02, 0.15, 1.0])
+def test_dtw_align_matches_full_matrix(n, m, band):
+    rng = np.random.default_rng(n * 1000 + m)
+    a = rng.normal(size=(n, 3))
+    b = rng.normal(size=(m, 3))
+
+    total, path = _dtw_ref(a, b, band)
+    if total is None:
+        with pytest.raises(ValueError):
+            swing_dtw.dtw_align(a, b, band)
+        return
+
+    got_total, got_path = swing_dtw.dtw_align(a, b, band)
+    assert got_total == pytest.approx(total, rel=1e-9)
+    np.testing.assert_array_equal(got_path, path)
+
+
+def test_dtw_align_small_block(monkeypatch):
+    # Khoảng cách tính qua nhiều khối đường chéo vẫn phải giống tính 1 lần
+    rng = np.random.default_rng(7)
+    a = rng.normal(size=(80, 4))
+    b = rng.normal(size=(70, 4))
+    expected = swing_dtw.dtw_align(a, b)
+    monkeypatch.setattr(swing_dtw, "DTW_BLOCK_CELLS", 16)
+    total, path = swing_dtw.dtw_align(a, b)
+    assert total == expected[0]
+    np.testing.assert_array_equal(path, expected[1])